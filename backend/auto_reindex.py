@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """
 Auto-reindexing script for dynamic search engine
-Automatically recreates Elasticsearch index with fresh data
+Automatically recreates Elasticsearch index with fresh data, or with --check
+updates it in place based on what changed since the last indexing
 """
 
+import argparse
+import json
 import logging
 import os
 import sys
@@ -11,6 +14,9 @@ import time
 from datetime import datetime
 
 from elasticsearch_utils import ElasticsearchManager
+from game_columns import GameColumns
+from game_data import iter_games, resolve_data_file
+from index_state import COUNTERS, INCREMENTAL, NOOP, REBUILD, IndexState, plan, state_path
 
 # Setup logging
 logging.basicConfig(
@@ -23,8 +29,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def auto_reindex():
-    """Automatically reindex Elasticsearch for dynamic search engine"""
+UPDATE_BATCH_SIZE = 500
+
+# Relative to backend/, where cron and the scheduler run this script
+DATA_DIR = '../data'
+DATA_FILE_NAME = 'roblox_data.json'
+
+def record_index_state(data_file, failed_ids=()):
+    """Fingerprint the dataset that was just indexed so the next --check can diff against it"""
+    state = IndexState(state_path(data_file))
+    try:
+        start = time.monotonic()
+        digest = state.scan_file(resolve_data_file(data_file))
+        state.commit(digest, datetime.now().isoformat(), failed_ids)
+        logger.info(f"Recorded fingerprints of {state.current_count()} documents in "
+                    f"{time.monotonic() - start:.2f} seconds")
+    finally:
+        state.close()
+
+def auto_reindex(record_state=True, failed_ids=None, data_dir=DATA_DIR):
+    """
+    Automatically reindex Elasticsearch for dynamic search engine
+
+    Parameters:
+    - data_dir: directory holding roblox_data.json (and the index state)
+    - record_state: record the fingerprints of the indexed dataset for the next --check
+    - failed_ids: optional list that receives the ids of the documents that failed to index
+    """
+    failed_ids = failed_ids if failed_ids is not None else []
     try:
         start_time = datetime.now()
         logger.info("=== Starting automatic reindexing ===")
@@ -45,7 +77,7 @@ def auto_reindex():
             logger.info(f"Current index stats: {old_stats['total_documents']} docs, {old_stats['unique_games']} unique games")
         
         # Check data file
-        data_file = '../data/roblox_data.json'
+        data_file = os.path.join(data_dir, DATA_FILE_NAME)
         if not os.path.exists(data_file):
             logger.error(f"Data file not found: {data_file}")
             return 1
@@ -53,13 +85,10 @@ def auto_reindex():
         file_size = os.path.getsize(data_file) / (1024 * 1024)  # MB
         logger.info(f"Data file size: {file_size:.2f} MB")
         
-        # Recreate index automatically
+        # Recreate index automatically, reading the columnar copy when it is up to date
         logger.info("Recreating index...")
-        success = es.recreate_index(data_file=data_file)
-        
-        if not success:
-            logger.error("Failed to recreate index")
-            return 1
+        # Raises on failure; logged below
+        es.recreate_index(data_file=resolve_data_file(data_file), failed_ids=failed_ids)
         
         # Get final stats
         final_stats = es.get_index_stats()
@@ -78,6 +107,10 @@ def auto_reindex():
             else:
                 logger.warning(f"⚠️  {final_stats['duplicates']} duplicates detected")
         
+        if record_state:
+            # Documents that failed are left out of the state, so the next check indexes them again
+            record_index_state(data_file, failed_ids)
+
         end_time = datetime.now()
         duration = end_time - start_time
         logger.info(f"Reindexing completed in {duration.total_seconds():.2f} seconds")
@@ -89,48 +122,176 @@ def auto_reindex():
         logger.error(f"Error during automatic reindexing: {str(e)}")
         return 1
 
-def check_and_reindex_if_needed():
-    """Check if reindexing is needed based on data file modification time"""
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def select_games(source_file, game_ids):
+    """The records of the given games; a columnar dataset decodes only those records"""
+    wanted = set(str(game_id) for game_id in game_ids)
+    if os.path.isdir(source_file):
+        with GameColumns(source_file) as dataset:
+            # position() finds the first record of a duplicated id, as index_data keeps
+            return [game for game in map(dataset.get, sorted(wanted)) if game is not None]
+    selected = []
+    for game in iter_games(source_file):
+        game_id = str(game.get('id', ''))
+        if game_id in wanted:
+            wanted.discard(game_id)  # First record of a duplicated id wins, as in index_data
+            selected.append(game)
+    return selected
+
+
+def reindex_documents(es, source_file, game_ids):
+    """Re-embed and index only the given games; returns (indexed, failed)"""
+    selected = select_games(source_file, game_ids)
+    indexed = failed = 0
+    for batch in _batched(selected, UPDATE_BATCH_SIZE):
+        ok, bad = es.bulk_index(es.embed_games(batch))
+        indexed += ok
+        failed += bad
+    return indexed, failed
+
+
+def update_counters(es, state, source_file):
+    """
+    Partial update of the counter fields for counters-only changes; returns (updated, failed)
+
+    A document whose partial update fails (typically a 404: it is missing from
+    the index) is re-embedded and indexed whole instead.
+    """
+    updated = failed = 0
+    failed_ids = []
+    for batch in _batched(state.counter_updates(), UPDATE_BATCH_SIZE):
+        ok, _ = es.bulk_update_fields(batch, failed_ids)
+        updated += ok
+    if failed_ids:
+        logger.warning(f"{len(failed_ids)} counter updates failed - indexing those documents whole")
+        ok, failed = reindex_documents(es, source_file, failed_ids)
+        updated += ok
+    return updated, failed
+
+
+def check_and_reindex_if_needed(dry_run=False, report=None, data_dir=DATA_DIR):
+    """
+    Bring the index up to date with the least work, based on content fingerprints
+
+    The dataset digest decides whether anything changed at all; the stored
+    per-document fingerprints then pick a no-op, a counters-only partial
+    update, an incremental update of the changed documents or a full rebuild.
+
+    Parameters:
+    - dry_run: only log the decision
+    - data_dir: directory holding roblox_data.json (and the index state)
+    - report: optional dict filled with the document count, diff, decision and timings
+    """
+    state = None
+    failed_ids = []
+    report = report if report is not None else {}
     try:
-        data_file = '../data/roblox_data.json'
+        data_file = os.path.join(data_dir, DATA_FILE_NAME)
         if not os.path.exists(data_file):
             logger.error(f"Data file not found: {data_file}")
             return 1
-        
-        # Check file modification time
-        file_mtime = os.path.getmtime(data_file)
-        file_time = datetime.fromtimestamp(file_mtime)
-        
-        # Check if we have a record of last indexing
-        last_index_file = '.last_index_time'
-        if os.path.exists(last_index_file):
-            with open(last_index_file, 'r') as f:
-                last_index_time = datetime.fromisoformat(f.read().strip())
-            
-            if file_time <= last_index_time:
-                logger.info("Data file hasn't changed since last indexing - skipping")
-                return 0
-        
-        logger.info(f"Data file modified at {file_time} - reindexing needed")
-        
-        # Perform reindexing
-        result = auto_reindex()
-        
-        # Record successful indexing time
-        if result == 0:
-            with open(last_index_file, 'w') as f:
-                f.write(datetime.now().isoformat())
-        
-        return result
-        
+        source_file = resolve_data_file(data_file)
+        timings = {}
+        report['timings'] = timings
+
+        start = time.monotonic()
+        state = IndexState(state_path(data_file))
+        digest = state.scan_file(source_file)
+        total = state.current_count()
+        timings['fingerprint'] = time.monotonic() - start
+        stored_digest = state.stored_digest()
+
+        es_host = os.environ.get("ELASTICSEARCH_HOST", "http://localhost:9200")
+        es = ElasticsearchManager(host=es_host)
+        if not es.check_connection():
+            logger.error("Failed to connect to Elasticsearch")
+            return 1
+        index_exists = es.es.indices.exists(index=es.index_name)
+
+        start = time.monotonic()
+        if digest == stored_digest and index_exists:
+            diff = {'added': 0, 'removed': 0, 'changed': 0, 'counters': 0}
+        else:
+            diff = state.diff()
+        action = plan(diff, total, stored_digest is not None, index_exists)
+        timings['diff'] = time.monotonic() - start
+
+        if action == NOOP:
+            logger.info(f"Nothing changed ({total} documents, digest {digest})")
+        elif action == COUNTERS:
+            logger.info(f"Only counters changed: {diff['counters']} documents")
+        else:
+            logger.info(f"{diff['added'] + diff['changed']} documents changed or added, {diff['removed']} removed, "
+                        f"{diff['counters']} with new counters (of {total})")
+        logger.info(f"Decision: {action}")
+        report.update({'documents': total, 'diff': diff, 'action': action})
+
+        if not dry_run and action != NOOP:
+            start = time.monotonic()
+            failed = 0
+            if action == REBUILD:
+                # The fingerprints scanned above are committed below, without the documents that failed
+                if auto_reindex(record_state=False, failed_ids=failed_ids, data_dir=data_dir) != 0:
+                    return 1
+            else:
+                _, failed = update_counters(es, state, source_file)
+                if action == INCREMENTAL:
+                    changed_ids = list(state.ids('added')) + list(state.ids('changed'))
+                    _, failed_docs = reindex_documents(es, source_file, changed_ids)
+                    _, failed_deletes = es.bulk_delete(list(state.ids('removed')))
+                    failed += failed_docs + failed_deletes
+                es.es.indices.refresh(index=es.index_name)
+            timings[action] = time.monotonic() - start
+            if failed:
+                logger.error(f"{failed} documents failed - keeping the previous fingerprints so the next check retries")
+                return 1
+        if not dry_run and (action != NOOP or digest != stored_digest):
+            state.commit(digest, datetime.now().isoformat(), failed_ids)
+        if failed_ids:
+            logger.error(f"{len(failed_ids)} documents failed to index - the next check retries them")
+            return 1
+
+        logger.info("Timings: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+        return 0
+
     except Exception as e:
         logger.error(f"Error checking reindex necessity: {str(e)}")
         return 1
+    finally:
+        if state:
+            state.close()
 
-if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--check":
-        # Check if reindexing is needed based on file modification
-        sys.exit(check_and_reindex_if_needed())
-    else:
+def main():
+    parser = argparse.ArgumentParser(description="Recreate the Elasticsearch index, or update it in place with --check")
+    parser.add_argument("--check", action="store_true",
+                        help="Only apply what changed since the last indexing instead of forcing a rebuild")
+    parser.add_argument("--dry-run", action="store_true", help="With --check: only report the decision")
+    parser.add_argument("--stats-json", help="With --check: write the decision and timings to this file")
+    parser.add_argument("--data-dir", default=DATA_DIR, help=f"Directory holding {DATA_FILE_NAME}")
+    args = parser.parse_args()
+    if not args.check and (args.dry_run or args.stats_json):
+        parser.error("--dry-run and --stats-json require --check")
+
+    if not args.check:
         # Force reindexing
-        sys.exit(auto_reindex())
+        return auto_reindex(data_dir=args.data_dir)
+    report = {}
+    exit_code = check_and_reindex_if_needed(dry_run=args.dry_run, report=report, data_dir=args.data_dir)
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump(report, f, indent=2)
+    return exit_code
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -1,12 +1,18 @@
 import json
 import logging
-from elasticsearch import Elasticsearch
+from functools import lru_cache
+
+from elasticsearch import Elasticsearch, NotFoundError
+from game_data import load_games
+from search_backend import SUGGEST_FIELDS, SearchBackend
 from sentence_transformers import SentenceTransformer # Tambahkan import ini
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class ElasticsearchManager:
+class ElasticsearchManager(SearchBackend):
+    name = "elasticsearch"
+
     def __init__(self, host="http://localhost:9200"):
         self.es = Elasticsearch(
             hosts=[host],
@@ -27,6 +33,13 @@ class ElasticsearchManager:
             self.st_model = None
             self.embedding_dims = 0
         
+        # Repeated queries (pagination, reranking) reuse the same query vector
+        self.encode_query = lru_cache(maxsize=1024)(self._encode_query)
+        
+    def _encode_query(self, query_text):
+        """Encode a query string with the SentenceTransformer model, returned as a tuple of floats"""
+        return tuple(self.st_model.encode(query_text).tolist())
+    
     def check_connection(self):
         if self.es.ping():
             logger.info("Connected to Elasticsearch")
@@ -35,6 +48,30 @@ class ElasticsearchManager:
             logger.error("Could not connect to Elasticsearch")
             return False
     
+    def index_exists(self):
+        return self.es.indices.exists(index=self.index_name)
+
+    def index_generation(self):
+        """
+        Token that changes when the index is recreated (new uuid) or its searchable
+        documents change: the index/delete operation and search refresh counts of
+        the primaries, from one index stats call. Writers record nothing, so bulk
+        loads, partial updates and other processes all count.
+
+        The counts restart with the Elasticsearch node, so after a restart a token
+        could in rare cases repeat one seen before it.
+        """
+        try:
+            stats = self.es.indices.stats(index=self.index_name, metric="indexing,refresh")
+            index = next(iter(stats["indices"].values()))
+            indexing = index["primaries"]["indexing"]
+            refresh = index["primaries"]["refresh"]
+            return (f"{index['uuid']}:{indexing['index_total']}:{indexing['delete_total']}:"
+                    f"{refresh.get('external_total', refresh['total'])}")
+        except Exception as e:
+            logger.error(f"Error reading index generation: {e}")
+            return None
+
     def create_index(self):
         """Create index with mapping for Roblox games data"""
         if self.es.indices.exists(index=self.index_name):
@@ -55,7 +92,11 @@ class ElasticsearchManager:
                 "properties": {
                     "id": {"type": "keyword"},
                     "universeId": {"type": "keyword"},
-                    "name": {"type": "text", "analyzer": "standard", "fields": {"keyword": {"type": "keyword"}}},
+                    "name": {"type": "text", "analyzer": "standard", "fields": {
+                        "keyword": {"type": "keyword"},
+                        # Edge n-grams of every word for suggest(): "pet sim" matches "Pet Simulator X"
+                        "prefix": {"type": "text", "analyzer": "name_prefix", "search_analyzer": "name_prefix_search"}
+                    }},
                     "description": {"type": "text", "analyzer": "standard"},
                     "sourceName": {"type": "text"},
                     "sourceDescription": {"type": "text"},
@@ -88,11 +129,24 @@ class ElasticsearchManager:
             },
             "settings": {
                 "analysis": {
+                    "filter": {
+                        "name_edge_ngram": {"type": "edge_ngram", "min_gram": 1, "max_gram": 20}
+                    },
                     "analyzer": {
                         "game_analyzer": {
                             "type": "custom",
                             "tokenizer": "standard",
                             "filter": ["lowercase", "asciifolding", "stop"]
+                        },
+                        "name_prefix": {
+                            "type": "custom",
+                            "tokenizer": "standard",
+                            "filter": ["lowercase", "asciifolding", "name_edge_ngram"]
+                        },
+                        "name_prefix_search": {
+                            "type": "custom",
+                            "tokenizer": "standard",
+                            "filter": ["lowercase", "asciifolding"]
                         }
                     }
                 }
@@ -131,46 +185,58 @@ class ElasticsearchManager:
             logger.error(f"Error deleting index: {str(e)}")
             return False
     
-    def recreate_index(self, data_file=None):
-        """Delete and recreate the index, optionally reloading data"""
+    def recreate_index(self, data_file=None, progress=None, failed_ids=None):
+        """
+        Delete and recreate the index, optionally reloading data (progress, failed_ids: see index_data)
+
+        Errors, including the cancellation of the progress job, are logged and
+        raised. The old index is deleted before the data is reloaded, so a run
+        that fails or is cancelled midway leaves a partially filled index that
+        serves searches until the next successful recreate.
+
+        Returns:
+        - True
+        """
         try:
             # Delete if exists
             if self.es.indices.exists(index=self.index_name):
                 self.es.indices.delete(index=self.index_name)
                 logger.info(f"Deleted existing index: {self.index_name}")
             
-            # Create new index
+            # Create new index (create_index only logs its errors; loading without the mapping would be worse)
             self.create_index()
+            if not self.es.indices.exists(index=self.index_name):
+                raise RuntimeError(f"Could not create index {self.index_name}")
             
             # Reindex data if file provided
             if data_file:
-                self.index_data(data_file)
+                self.index_data(data_file, progress=progress, failed_ids=failed_ids)
                 logger.info(f"Reloaded data from {data_file}")
             
             return True
         except Exception as e:
             logger.error(f"Error recreating index: {str(e)}")
-            return False
+            raise
     
-    def index_data(self, data_file):
-        """Index data from JSON file into Elasticsearch"""
+    def index_data(self, data_file, progress=None, failed_ids=None):
+        """
+        Index data from JSON file into Elasticsearch
+
+        Parameters:
+        - data_file: dataset to index
+        - progress: optional jobs.Job; gets the document total, one `embedded` per game and
+          the documents sent with every bulk request (processed), and may cancel the run
+        - failed_ids: optional list that receives the ids of the documents that failed
+        """
         if not self.st_model:
             logger.warning("SentenceTransformer model not loaded. Data will be indexed without embeddings.")
 
         try:
-            with open(data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # Accepts the JSON list as well as NDJSON (optionally .zst) scraper output
+            data = load_games(data_file)
             
             logger.info(f"Loaded {len(data)} games from {data_file}")
             
-            # Check if data is a list or dict with an array inside
-            if isinstance(data, dict) and any(isinstance(data.get(k), list) for k in data):
-                # Find the key that contains the array of games
-                for k in data:
-                    if isinstance(data[k], list):
-                        data = data[k]
-                        break
-            
             # Debug: Log data type and first few items
             print(f"Data type: {type(data)}, Length: {len(data)}")
             if data and len(data) > 0:
@@ -201,11 +267,15 @@ class ElasticsearchManager:
                     unique_games[game_id_str] = game
             
             logger.info(f"Processing: {len(unique_games)} unique games, {duplicates_found} duplicates removed, {skipped_no_id} skipped (no ID)")
+            if progress:
+                progress.set_total(len(unique_games))
             
             # Bulk indexing with game ID as document ID
             bulk_data = []
             indexed_count = 0
             failed_count = 0
+            sent_count = 0  # Documents already sent in a bulk request
+            reported = (0, 0)  # (sent, failed) as last reported to progress
             
             for game_id, game in unique_games.items():
                 try:
@@ -238,14 +308,24 @@ class ElasticsearchManager:
                             for item in response['items']:
                                 if 'index' in item and item['index'].get('status', 200) >= 400:
                                     failed_count += 1
+                                    if failed_ids is not None:
+                                        failed_ids.append(item['index'].get('_id'))
                                     print(f"Failed to index: {item['index'].get('error', 'Unknown error')}")
                         
+                        sent_count = indexed_count
                         bulk_data = []
                 
                 except Exception as e:
                     print(f"Error preparing game {game_id}: {e}")
                     failed_count += 1
+                    if failed_ids is not None:
+                        failed_ids.append(game_id)
                     continue
+
+                # Outside the try so a cancellation is not swallowed as a per-game error
+                if progress:
+                    progress.update(processed=sent_count - reported[0], embedded=1, failed=failed_count - reported[1])
+                    reported = (sent_count, failed_count)
             
             # Index remaining items
             if bulk_data:
@@ -257,7 +337,12 @@ class ElasticsearchManager:
                     for item in response['items']:
                         if 'index' in item and item['index'].get('status', 200) >= 400:
                             failed_count += 1
+                            if failed_ids is not None:
+                                failed_ids.append(item['index'].get('_id'))
                             print(f"Failed to index: {item['index'].get('error', 'Unknown error')}")
+            if progress:
+                progress.update(processed=indexed_count - reported[0], failed=failed_count - reported[1],
+                                message="Refreshing index")
             
             # Refresh index to make documents searchable
             self.es.indices.refresh(index=self.index_name)
@@ -269,8 +354,81 @@ class ElasticsearchManager:
         except Exception as e:
             logger.error(f"Error indexing data: {e}")
             raise
-    
-    def search(self, query_text, filters=None, size=10, from_=0):
+
+    def embed_games(self, games, batch_size=64):
+        """Add game_embedding to a list of games with one batched encode call (no-op without a model)"""
+        if not self.st_model or not games:
+            return games
+        texts = [f"{game.get('name', '')} {game.get('description', '')}".strip() for game in games]
+        with_text = [i for i, text in enumerate(texts) if text]
+        if with_text:
+            embeddings = self.st_model.encode([texts[i] for i in with_text], batch_size=batch_size)
+            for i, embedding in zip(with_text, embeddings):
+                games[i]['game_embedding'] = embedding.tolist()
+        for i, text in enumerate(texts):
+            if not text and self.embedding_dims > 0:
+                games[i]['game_embedding'] = [0.0] * self.embedding_dims
+        return games
+
+    def bulk_index(self, games, failed_ids=None):
+        """
+        Index (upsert by game id) a list of games in one bulk request
+
+        Parameters:
+        - games: list of game dicts
+        - failed_ids: optional list that receives the ids of the documents that failed
+
+        Returns:
+        - (indexed, failed) document counts
+        """
+        bulk_data = []
+        for game in games:
+            bulk_data.append({"index": {"_index": self.index_name, "_id": str(game['id'])}})
+            bulk_data.append(game)
+        if not bulk_data:
+            return 0, 0
+        return self._bulk(bulk_data, 'index', failed_ids=failed_ids)
+
+    def bulk_update_fields(self, updates, failed_ids=None):
+        """
+        Partially update documents (e.g. only the player counters) without reindexing them
+
+        Parameters:
+        - updates: list of (game_id, {field: value}) pairs
+        - failed_ids: optional list that receives the ids of the documents that failed
+          (a document missing from the index fails with a 404)
+
+        Returns:
+        - (updated, failed) document counts
+        """
+        bulk_data = []
+        for game_id, fields in updates:
+            bulk_data.append({"update": {"_index": self.index_name, "_id": str(game_id)}})
+            bulk_data.append({"doc": fields})
+        return self._bulk(bulk_data, 'update', failed_ids=failed_ids)
+
+    def bulk_delete(self, game_ids):
+        """Delete documents by game id; returns (deleted, failed), a missing document counts as deleted"""
+        bulk_data = [{"delete": {"_index": self.index_name, "_id": str(game_id)}} for game_id in game_ids]
+        return self._bulk(bulk_data, 'delete', header_only=True)
+
+    def _bulk(self, bulk_data, action, header_only=False, failed_ids=None):
+        total = len(bulk_data) if header_only else len(bulk_data) // 2
+        if not total:
+            return 0, 0
+        response = self.es.bulk(body=bulk_data)
+        failed = 0
+        if response.get('errors'):
+            for item in response['items']:
+                status = item.get(action, {}).get('status', 200)
+                if status >= 400 and not (action == 'delete' and status == 404):
+                    failed += 1
+                    if failed_ids is not None:
+                        failed_ids.append(item[action].get('_id'))
+                    logger.error(f"Failed to {action}: {item[action].get('error', 'Unknown error')}")
+        return total - failed, failed
+
+    def search(self, query_text, filters=None, size=10, from_=0, facets=False, facet_terms_size=20):
         """
         Perform search against Elasticsearch index
         
@@ -279,9 +437,48 @@ class ElasticsearchManager:
         - filters: Dictionary of field:value pairs to filter results
         - size: Number of results to return
         - from_: Offset for pagination
+        - facets: Also return facet counts for this query in the same request, as
+          "aggregations" in the get_aggregations shape. The genre filters move to a
+          post_filter, so the genre facets count every genre the rest of the query
+          allows (multi-select); the other facets respect all filters.
+        - facet_terms_size: Number of buckets of each genre facet
         """
         print(f"Elasticsearch search called with: query='{query_text}', size={size}, from_={from_}")
-        
+        final_es_query = self.build_search_body(query_text, filters, size, from_, facets, facet_terms_size)
+
+        try:
+            print(f"Elasticsearch query: {json.dumps(final_es_query, indent=2)}")
+            results = self.es.search(index=self.index_name, body=final_es_query)
+            if facets:
+                results = dict(results)
+                results["aggregations"] = self._flatten_facets(results.get("aggregations", {}))
+            
+            # Log the results
+            total_hits = results.get("hits", {}).get("total", {}).get("value", 0)
+            returned_hits = len(results.get("hits", {}).get("hits", []))
+            print(f"Elasticsearch returned: {returned_hits} documents out of {total_hits} total matches")
+            
+            return results
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            return {"error": str(e)}
+
+    @staticmethod
+    def _has_query_text(query_text):
+        return bool(query_text and query_text.strip() and query_text != "*")
+
+    def build_search_body(self, query_text, filters=None, size=10, from_=0, facets=False, facet_terms_size=20,
+                          query_vector=None):
+        """
+        The request body search() sends, without sending it
+
+        Parameters: as search(), plus
+        - query_vector: Embedding of query_text when already encoded (e.g. in a batch);
+          encoded here when None
+
+        Returns:
+        - the search body dict
+        """
         field_mapping = {
             'genres': ['genre', 'genre_l1', 'genre_l2'],
             'min_playing_now': 'playing',
@@ -296,7 +493,8 @@ class ElasticsearchManager:
             'max_players': 'maxPlayers',
         }
         
-        has_query_text = query_text and query_text.strip() and query_text != "*"
+        has_query_text = self._has_query_text(query_text)
+        genre_filters = []  # Genre filters for the post_filter in facets mode
         
         # Persiapkan base_query
         if has_query_text:
@@ -332,7 +530,7 @@ class ElasticsearchManager:
             # Tambahkan semantic scoring jika model ada dan ada query text
             if self.st_model and self.embedding_dims > 0:
                 try:
-                    query_embedding = self.st_model.encode(query_text).tolist()
+                    query_embedding = list(query_vector if query_vector is not None else self.encode_query(query_text))
                     functions_for_score.append({
                         "script_score": {
                             "script": {
@@ -399,6 +597,8 @@ class ElasticsearchManager:
             print(f"Applying filters: {filters}")
             # Path untuk menambahkan filter adalah di dalam bool query dari function_score
             filter_list_path = final_es_query["query"]["function_score"]["query"]["bool"]["filter"]
+            # With facets the genre filters only apply to the hits (post_filter), not to the genre facets
+            genre_filter_path = genre_filters if facets else filter_list_path
 
             for field, value in filters.items():
                 if field == 'genres' and isinstance(value, list) and value:
@@ -410,7 +610,7 @@ class ElasticsearchManager:
                             {"term": {"genre_l1": selected_genre_value}},
                             {"term": {"genre_l2": selected_genre_value}}
                         ]
-                        filter_list_path.append({
+                        genre_filter_path.append({
                             "bool": {
                                 "should": per_genre_or_queries,
                                 "minimum_should_match": 1
@@ -445,56 +645,129 @@ class ElasticsearchManager:
                         pass # Implementasikan jika perlu
 
 
+        if facets:
+            final_es_query["aggs"] = self._facet_aggs(facet_terms_size, genre_filters)
+            if genre_filters:
+                final_es_query["post_filter"] = {"bool": {"filter": genre_filters}}
+
+        return final_es_query
+
+    def encode_queries(self, query_texts):
+        """
+        Embed several query strings with one model call
+
+        Returns:
+        - dict of query text -> vector (tuple of floats), empty without a model
+        """
+        texts = list(dict.fromkeys(query_texts))
+        if not texts or not self.st_model or self.embedding_dims <= 0:
+            return {}
+        vectors = self.st_model.encode(texts, batch_size=64, show_progress_bar=False)
+        return {text: tuple(vector.tolist()) for text, vector in zip(texts, vectors)}
+
+    def multi_search(self, searches):
+        """
+        Run several searches in one _msearch round-trip
+
+        The query embeddings of all text searches are encoded in one batch first.
+
+        Parameters:
+        - searches: List of dicts of search() keyword arguments
+
+        Returns:
+        - list of search() results in the same order (a failed search is {"error": ...})
+        """
+        if not searches:
+            return []
+        texts = [params["query_text"] for params in searches if self._has_query_text(params.get("query_text"))]
+        vectors = {}
         try:
-            print(f"Elasticsearch query: {json.dumps(final_es_query, indent=2)}")
-            results = self.es.search(index=self.index_name, body=final_es_query)
-            
-            # Log the results
-            total_hits = results.get("hits", {}).get("total", {}).get("value", 0)
-            returned_hits = len(results.get("hits", {}).get("hits", []))
-            print(f"Elasticsearch returned: {returned_hits} documents out of {total_hits} total matches")
-            
-            return results
+            vectors = self.encode_queries(texts)
         except Exception as e:
-            logger.error(f"Search error: {e}")
-            return {"error": str(e)}
+            logger.error(f"Error encoding batch query embeddings: {e}")
+
+        lines = []
+        for params in searches:
+            lines.append({"index": self.index_name})
+            lines.append(self.build_search_body(query_vector=vectors.get(params.get("query_text")), **params))
+        try:
+            responses = self.es.msearch(searches=lines)["responses"]
+        except Exception as e:
+            logger.error(f"Multi-search error: {e}")
+            return [{"error": str(e)} for _ in searches]
+
+        results = []
+        for params, response in zip(searches, responses):
+            response = dict(response)
+            if "error" in response:
+                error = response["error"]
+                results.append({"error": error.get("reason", str(error)) if isinstance(error, dict) else str(error)})
+                continue
+            if params.get("facets"):
+                response["aggregations"] = self._flatten_facets(response.get("aggregations", {}))
+            results.append(response)
+        print(f"Elasticsearch multi-search: {len(searches)} searches in one request")
+        return results
             
-    def get_aggregations(self):
-        """Get aggregations for faceted search"""
-        query = {
-            "size": 0,
-            "aggs": {
-                "genre": {
-                    "terms": {"field": "genre", "size": 20}
-                },
-                "genre_l1": {
-                    "terms": {"field": "genre_l1", "size": 20}
-                },
-                "genre_l2": {
-                    "terms": {"field": "genre_l2", "size": 20}
-                },
-                "creators": {
-                    "terms": {"field": "creator.name.keyword", "size": 20}
-                },
-                "max_players": {
-                    "range": {
-                        "field": "maxPlayers",
-                        "ranges": [
-                            {"to": 10},
-                            {"from": 10, "to": 20},
-                            {"from": 20, "to": 50},
-                            {"from": 50}
-                        ]
-                    }
-                },
-                "player_count": {
-                    "stats": {"field": "playing"}
-                },
-                "visits_stats": {
-                    "stats": {"field": "visits"}
+    # Facets whose counts ignore the genre filters in search(facets=True); the others respect them
+    GENRE_FACETS = ("genre", "genre_l1", "genre_l2")
+
+    def _facet_aggs(self, terms_size=20, genre_filters=None):
+        """
+        The facet aggregations (genre terms, creators, max players ranges, playing and visits stats)
+
+        Parameters:
+        - terms_size: Number of buckets returned for each genre terms aggregation
+        - genre_filters: Genre filter clauses of a search; the non-genre facets are
+          wrapped in a filter aggregation applying them (undone by _flatten_facets)
+        """
+        aggs = {field: {"terms": {"field": field, "size": terms_size}} for field in self.GENRE_FACETS}
+        other = {
+            "creators": {
+                "terms": {"field": "creator.name.keyword", "size": 20}
+            },
+            "max_players": {
+                "range": {
+                    "field": "maxPlayers",
+                    "ranges": [
+                        {"to": 10},
+                        {"from": 10, "to": 20},
+                        {"from": 20, "to": 50},
+                        {"from": 50}
+                    ]
                 }
+            },
+            "player_count": {
+                "stats": {"field": "playing"}
+            },
+            "visits_stats": {
+                "stats": {"field": "visits"}
             }
         }
+        if genre_filters:
+            aggs["genre_filtered"] = {"filter": {"bool": {"filter": genre_filters}}, "aggs": other}
+        else:
+            aggs.update(other)
+        return aggs
+
+    @staticmethod
+    def _flatten_facets(aggregations):
+        aggregations = dict(aggregations)
+        aggregations.update(aggregations.pop("genre_filtered", {}))
+        aggregations.pop("doc_count", None)
+        return aggregations
+
+    def get_aggregations(self, terms_size=20):
+        """
+        Get aggregations for faceted search
+        
+        Parameters:
+        - terms_size: Number of buckets returned for each genre terms aggregation
+        """
+        query = {
+            "size": 0,
+            "aggs": self._facet_aggs(terms_size)
+        }
         
         try:
             results = self.es.search(index=self.index_name, body=query)
@@ -517,6 +790,7 @@ class ElasticsearchManager:
             "sort": [
                 {"playing": {"order": "desc"}}  # Sort by player count, highest first
             ],
+            "_source": {"excludes": ["game_embedding"]},
             "size": size
         }
         
@@ -527,8 +801,105 @@ class ElasticsearchManager:
             logger.error(f"Error fetching trending games: {e}")
             return {"error": str(e)}
 
-    def remove_duplicates(self):
-        """Remove duplicate documents based on game ID"""
+    def suggest(self, prefix, size=8):
+        """
+        Typeahead: games whose name has a word starting with each word of prefix, most played first
+
+        Uses the name.prefix edge n-gram subfield in filter context sorted by
+        playing, so nothing is scored, embedded or highlighted. Indices created
+        before the subfield existed fall back to a phrase prefix on name.
+
+        Parameters:
+        - prefix: What the user typed so far
+        - size: Number of suggestions
+        """
+        query = {
+            "size": size,
+            "_source": SUGGEST_FIELDS,
+            "query": {
+                "bool": {
+                    "filter": [{
+                        "bool": {
+                            "should": [
+                                {"match": {"name.prefix": {"query": prefix, "operator": "and"}}},
+                                {"match_phrase_prefix": {"name": {"query": prefix}}}
+                            ],
+                            "minimum_should_match": 1
+                        }
+                    }]
+                }
+            },
+            "sort": [{"playing": {"order": "desc", "missing": "_last"}}],
+            "track_total_hits": False
+        }
+
+        try:
+            results = self.es.search(index=self.index_name, body=query)
+            return {"suggestions": [hit["_source"] for hit in results["hits"]["hits"]]}
+        except Exception as e:
+            logger.error(f"Suggest error: {e}")
+            return {"error": str(e)}
+
+    def get_games_by_ids(self, game_ids):
+        """
+        Fetch games by universe id (document id), keeping the order of game_ids
+
+        Parameters:
+        - game_ids: List of universe ids; ids that are not indexed are skipped
+        """
+        if not game_ids:
+            return {"hits": {"total": {"value": 0}, "hits": []}}
+        try:
+            results = self.es.mget(index=self.index_name, ids=[str(game_id) for game_id in game_ids],
+                                   _source_excludes=["game_embedding"])
+            hits = [{"_id": doc["_id"], "_source": doc["_source"]} for doc in results["docs"] if doc.get("found")]
+            return {"hits": {"total": {"value": len(hits)}, "hits": hits}}
+        except Exception as e:
+            logger.error(f"Error fetching games by id: {e}")
+            return {"error": str(e)}
+
+    def get_similar_games(self, game_id, size=10):
+        """
+        Nearest games by cosine similarity of game_embedding (brute-force script_score)
+
+        Parameters:
+        - game_id: Universe id of the game to find neighbours for
+        - size: Number of similar games to return
+        """
+        empty = {"hits": {"total": {"value": 0}, "hits": []}}
+        try:
+            doc = self.es.get(index=self.index_name, id=str(game_id), _source_includes=["game_embedding"])
+        except NotFoundError:
+            return empty
+        except Exception as e:
+            logger.error(f"Error fetching game {game_id}: {e}")
+            return {"error": str(e)}
+
+        embedding = doc["_source"].get("game_embedding")
+        if not embedding or not any(embedding):
+            return empty
+
+        query = {
+            "query": {
+                "script_score": {
+                    "query": {"bool": {"must_not": [{"ids": {"values": [str(game_id)]}}]}},
+                    "script": {
+                        "source": "doc['game_embedding'].size() == 0 ? 0 : cosineSimilarity(params.query_vector, 'game_embedding') + 1.0",
+                        "params": {"query_vector": embedding}
+                    }
+                }
+            },
+            "size": size,
+            "_source": {"excludes": ["game_embedding"]}
+        }
+        try:
+            return self.es.search(index=self.index_name, body=query)
+        except Exception as e:
+            logger.error(f"Error fetching similar games: {e}")
+            return {"error": str(e)}
+
+    def remove_duplicates(self, progress=None):
+        """Remove duplicate documents based on game ID (progress: optional jobs.Job, counts deletions)"""
         try:
             # First, get all unique IDs and their document IDs
             query = {
@@ -577,12 +948,16 @@ class ElasticsearchManager:
             # Execute bulk delete
             if delete_actions:
                 logger.info(f"Removing {deleted_count} duplicate documents...")
+                if progress:
+                    progress.set_total(deleted_count)
                 
                 # Process in batches
                 batch_size = 1000
                 for i in range(0, len(delete_actions), batch_size):
                     batch = delete_actions[i:i + batch_size]
                     self.es.bulk(body=batch)
+                    if progress:
+                        progress.update(processed=len(batch), deleted=len(batch))
                 
                 # Refresh index
                 self.es.indices.refresh(index=self.index_name)
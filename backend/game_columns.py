@@ -0,0 +1,258 @@
+import argparse
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from game_data import iter_games
+from index_state import fingerprint
+
+FORMAT_NAME = "roblox-games-columnar"
+FORMAT_VERSION = 1
+COLUMNAR_SUFFIX = ".cols"
+
+# Counters stored as typed arrays; missing or non-finite values become 0 (NaN for price)
+NUMERIC_COLUMNS = {
+    "playing": "int64",
+    "visits": "int64",
+    "maxPlayers": "int32",
+    "favoritedCount": "int64",
+    "price": "float64",
+}
+# Low-cardinality strings stored as int32 codes into a per-column category list (-1 = missing)
+CATEGORY_COLUMNS = ["genre", "genre_l1", "genre_l2"]
+# index_state fingerprints of every record, so --check can diff the dataset without decoding it
+FINGERPRINT_COLUMNS = ["static_hash", "counters_hash"]
+FINGERPRINT_DTYPE = "S16"
+
+_LENGTH = struct.Struct("<I")
+
+
+def is_columnar(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+
+def columnar_path(json_path):
+    """Columnar dataset that sits next to a JSON data file (roblox_data.json -> roblox_data.cols)"""
+    return os.path.splitext(json_path)[0] + COLUMNAR_SUFFIX
+
+
+def _number(value, integer):
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value):
+        return 0 if integer else float("nan")
+    return int(value) if integer else float(value)
+
+
+def _numeric_id(game):
+    try:
+        return int(game.get("id"))
+    except (TypeError, ValueError):
+        return -1
+
+
+class GameColumns:
+    """
+    Read side of the columnar game dataset, a directory with:
+
+    - meta.json: format version, record count, column dtypes and category lists
+    - id.npy: int64 universe id per record (-1 if missing) and id_order.npy, its argsort
+    - <column>.npy: one typed array per numeric / category column, and the
+      index_state static / counters fingerprint of every record (datasets
+      written before those were added lack them; check `columns`)
+    - records.bin + offsets.npy: every full game as a length-prefixed compact JSON record
+
+    Arrays and the record file are memory-mapped, so opening is O(1) and a
+    column read only touches that column's pages.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_NAME or self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset format in {path}: {self.meta.get('format')} "
+                             f"v{self.meta.get('version')}")
+        self.ids = self._load("id")
+        self._id_order = self._load("id_order")
+        self._offsets = self._load("offsets")
+        self._file = open(os.path.join(path, "records.bin"), "rb")
+        # mmap refuses empty files
+        self._records = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if len(self) else b""
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    @property
+    def columns(self):
+        return list(self.meta["columns"])
+
+    def has_fingerprints(self):
+        return all(name in self.meta["columns"] for name in FINGERPRINT_COLUMNS)
+
+    def column(self, name):
+        """Typed, memory-mapped array for a numeric column (codes for a category column, bytes for a fingerprint)"""
+        if name not in self.meta["columns"]:
+            raise KeyError(f"Unknown column: {name}")
+        return self._load(name)
+
+    def categories(self, name):
+        """Category list for a category column, indexed by the codes from column(name)"""
+        return self.meta["categories"][name]
+
+    def record(self, position):
+        """Full game dict for a record position"""
+        start = int(self._offsets[position])
+        (length,) = _LENGTH.unpack_from(self._records, start)
+        return json.loads(self._records[start + 4:start + 4 + length])
+
+    def position(self, game_id):
+        """Record position of a universe id, or None"""
+        try:
+            key = int(game_id)
+        except (TypeError, ValueError):
+            return None
+        index = int(np.searchsorted(self.ids, key, sorter=self._id_order))
+        if index < len(self._id_order) and self.ids[self._id_order[index]] == key:
+            return int(self._id_order[index])
+        return None
+
+    def get(self, game_id):
+        position = self.position(game_id)
+        return self.record(position) if position is not None else None
+
+    def __iter__(self):
+        # Sequential scan over the length prefixes, no offset lookups needed
+        records = self._records
+        start = 0
+        for _ in range(len(self)):
+            (length,) = _LENGTH.unpack_from(records, start)
+            yield json.loads(records[start + 4:start + 4 + length])
+            start += 4 + length
+
+    def close(self):
+        if isinstance(self._records, mmap.mmap):
+            self._records.close()
+        self._file.close()
+
+
+def write_columns(games, path):
+    """
+    Write games to a columnar dataset directory, replacing any existing one
+
+    Records are streamed to disk; only the typed column values are kept in
+    memory until the end. The dataset is built in a temp directory and swapped
+    in afterwards so readers never see a partial dataset.
+
+    Parameters:
+    - games: iterable of game dicts
+    - path: dataset directory, e.g. data/roblox_data.cols
+
+    Returns:
+    - number of records written
+    """
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    ids = []
+    offsets = []
+    numeric = {name: [] for name in NUMERIC_COLUMNS}
+    fingerprints = {name: [] for name in FINGERPRINT_COLUMNS}
+    categories = {name: {} for name in CATEGORY_COLUMNS}
+    codes = {name: [] for name in CATEGORY_COLUMNS}
+    position = 0
+    with open(os.path.join(tmp_path, "records.bin"), "wb") as f:
+        for game in games:
+            payload = json.dumps(game, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            f.write(_LENGTH.pack(len(payload)))
+            f.write(payload)
+            offsets.append(position)
+            position += 4 + len(payload)
+
+            ids.append(_numeric_id(game))
+            for name, values in numeric.items():
+                values.append(_number(game.get(name), integer=NUMERIC_COLUMNS[name] != "float64"))
+            static_hash, counters_hash, _ = fingerprint(game)
+            fingerprints["static_hash"].append(static_hash)
+            fingerprints["counters_hash"].append(counters_hash)
+            for name in CATEGORY_COLUMNS:
+                value = game.get(name)
+                if value is None or value == "":
+                    codes[name].append(-1)
+                else:
+                    codes[name].append(categories[name].setdefault(str(value), len(categories[name])))
+
+    id_array = np.array(ids, dtype=np.int64)
+    np.save(os.path.join(tmp_path, "id.npy"), id_array)
+    np.save(os.path.join(tmp_path, "id_order.npy"), np.argsort(id_array, kind="stable"))
+    np.save(os.path.join(tmp_path, "offsets.npy"), np.array(offsets, dtype=np.int64))
+    columns = {}
+    for name, dtype in NUMERIC_COLUMNS.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.array(numeric[name], dtype=dtype))
+        columns[name] = dtype
+    for name in CATEGORY_COLUMNS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.array(codes[name], dtype=np.int32))
+        columns[name] = "category"
+    for name in FINGERPRINT_COLUMNS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.array(fingerprints[name], dtype=FINGERPRINT_DTYPE))
+        columns[name] = FINGERPRINT_DTYPE
+
+    meta = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "count": len(ids),
+        "columns": columns,
+        "categories": {name: list(values) for name, values in categories.items()},
+        "created_at": time.time(),
+    }
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    old_path = path + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a JSON/NDJSON game file to the columnar dataset format")
+    parser.add_argument("--input", default="./data/roblox_data.json")
+    parser.add_argument("--output", help="Dataset directory (default: input path with .cols suffix)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Data file not found: {args.input}")
+        return 1
+    output = args.output or columnar_path(args.input)
+    try:
+        start_time = time.monotonic()
+        count = write_columns(iter_games(args.input), output)
+        print(f"Wrote {count} games to {output} in {time.monotonic() - start_time:.2f} seconds")
+        return 0
+    except Exception as e:
+        print(f"Error converting {args.input}: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    exit(exit_code)
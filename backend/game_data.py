@@ -0,0 +1,90 @@
+import importlib
+import io
+import json
+import logging
+import os
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst files
+    zstandard = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl', '.ndjson.zst', '.jsonl.zst')
+
+
+def _open_text(path):
+    """Open a data file for text reading, transparently decompressing .zst"""
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} requires the 'zstandard' package")
+        raw = open(path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def _game_columns():
+    # Imported lazily: numpy is only needed for the columnar format, and this
+    # module is loaded both as game_data and as backend.game_data
+    return importlib.import_module(f"{__package__}.game_columns" if __package__ else "game_columns")
+
+
+def resolve_data_file(path):
+    """
+    Prefer the columnar copy of a JSON data file when it is at least as new
+
+    data/roblox_data.json -> data/roblox_data.cols if that dataset exists and
+    was written after the JSON file; otherwise the path is returned unchanged.
+    """
+    columnar = os.path.splitext(path)[0] + ".cols"
+    meta = os.path.join(columnar, "meta.json")
+    if os.path.exists(meta) and (not os.path.exists(path) or os.path.getmtime(meta) >= os.path.getmtime(path)):
+        return columnar
+    return path
+
+
+def iter_games(path):
+    """
+    Yield game dicts from a data file
+
+    Supports the pretty-printed JSON list written by older scrapers (or a dict
+    wrapping that list) and the NDJSON stream written by scraper/sink.py,
+    optionally zstd-compressed, as well as a columnar dataset directory
+    written by game_columns.py.
+    """
+    if os.path.isdir(path):
+        with _game_columns().GameColumns(path) as dataset:
+            yield from dataset
+        return
+
+    if path.endswith(NDJSON_SUFFIXES):
+        with _open_text(path) as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A crash mid-write can leave a truncated last line
+                    logger.warning(f"Skipping malformed line {line_number} in {path}")
+        return
+
+    with _open_text(path) as f:
+        data = json.load(f)
+
+    # Check if data is a list or dict with an array inside
+    if isinstance(data, dict) and any(isinstance(data.get(k), list) for k in data):
+        for k in data:
+            if isinstance(data[k], list):
+                data = data[k]
+                break
+    yield from data
+
+
+def load_games(path):
+    """Load every game from a data file into a list"""
+    return list(iter_games(path))
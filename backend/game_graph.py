@@ -0,0 +1,168 @@
+import argparse
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from game_data import iter_games
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_EDGES_FILE = "./data/roblox_edges.ndjson"
+DEFAULT_GRAPH_FILE = "./data/roblox_graph.npz"
+
+
+class GameGraph:
+    """
+    Roblox "recommended games" graph in CSR form, keyed by universe id.
+
+    - ids: sorted int64 universe ids of every node (sources and targets)
+    - indptr: int64 offsets, the out-edges of ids[i] are indices[indptr[i]:indptr[i + 1]]
+    - indices: int32 positions into ids, in the order Roblox recommended them
+
+    A lookup is a binary search on ids plus a slice, so neighbors() costs
+    O(log n + degree) and the whole graph is three flat arrays.
+    """
+
+    def __init__(self, ids, indptr, indices):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+
+    @property
+    def num_nodes(self):
+        return len(self.ids)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def _position(self, game_id):
+        try:
+            key = int(game_id)
+        except (TypeError, ValueError):
+            return None
+        pos = int(np.searchsorted(self.ids, key))
+        if pos < len(self.ids) and self.ids[pos] == key:
+            return pos
+        return None
+
+    def neighbors(self, game_id, limit=None):
+        """Recommended universe ids for a game as strings, empty if it has no out-edges"""
+        pos = self._position(game_id)
+        if pos is None:
+            return []
+        start, end = self.indptr[pos], self.indptr[pos + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return [str(game_id) for game_id in self.ids[self.indices[start:end]].tolist()]
+
+    def adjacency(self):
+        """Yield (source id, [target ids]) for every node with out-edges"""
+        for pos in np.flatnonzero(np.diff(self.indptr)).tolist():
+            targets = self.ids[self.indices[self.indptr[pos]:self.indptr[pos + 1]]]
+            yield int(self.ids[pos]), targets.tolist()
+
+    @classmethod
+    def from_adjacency(cls, adjacency):
+        """Build the CSR arrays from a dict of source id -> list of target ids (ints)"""
+        nodes = set(adjacency)
+        for targets in adjacency.values():
+            nodes.update(targets)
+        ids = np.array(sorted(nodes), dtype=np.int64)
+
+        degrees = np.zeros(len(ids), dtype=np.int64)
+        sources = np.array(sorted(adjacency), dtype=np.int64)
+        source_positions = np.searchsorted(ids, sources)
+        degrees[source_positions] = [len(adjacency[source]) for source in sources.tolist()]
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+
+        indices = np.empty(int(indptr[-1]), dtype=np.int32)
+        for source, pos in zip(sources.tolist(), source_positions.tolist()):
+            targets = np.array(adjacency[source], dtype=np.int64)
+            indices[indptr[pos]:indptr[pos + 1]] = np.searchsorted(ids, targets)
+        return cls(ids, indptr, indices)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["ids"], data["indptr"], data["indices"])
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temp file first so the API never loads a half-written graph
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, ids=self.ids, indptr=self.indptr, indices=self.indices)
+        os.replace(tmp_path, path)
+
+
+def read_edges(path):
+    """Read the scraper's edge file: one {"source": id, "targets": [ids]} record per line"""
+    adjacency = {}
+    for record in iter_games(path):
+        try:
+            source = int(record["source"])
+            targets = [int(target) for target in record.get("targets") or []]
+        except (KeyError, TypeError, ValueError):
+            continue
+        if targets:
+            # A later crawl of the same game replaces its earlier recommendations
+            adjacency[source] = list(dict.fromkeys(target for target in targets if target != source))
+    return adjacency
+
+
+def build_graph(edges_file, graph_file, rebuild=False):
+    """
+    Merge the edges from a crawl into the stored graph and save it
+
+    Parameters:
+    - edges_file: NDJSON edge file written by the scraper
+    - graph_file: .npz graph to update (created if missing)
+    - rebuild: ignore the stored graph and build from edges_file only
+    """
+    adjacency = {}
+    if not rebuild and os.path.exists(graph_file):
+        adjacency = dict(GameGraph.load(graph_file).adjacency())
+        print(f"Loaded existing graph with {len(adjacency)} games with edges")
+
+    new_edges = read_edges(edges_file)
+    adjacency.update(new_edges)
+    graph = GameGraph.from_adjacency(adjacency)
+    graph.save(graph_file)
+    print(f"Graph saved to {graph_file}: {graph.num_nodes} games, {graph.num_edges} edges "
+          f"({len(new_edges)} games updated from {edges_file})")
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the recommendation graph (CSR .npz) from scraper edges")
+    parser.add_argument("--edges", default=DEFAULT_EDGES_FILE)
+    parser.add_argument("--output", default=DEFAULT_GRAPH_FILE)
+    parser.add_argument("--rebuild", action="store_true", help="Do not merge into the existing graph")
+    parser.add_argument("--stats-json", help="Write node and edge counts (JSON) to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.edges):
+        print(f"Edge file not found: {args.edges}")
+        return 1
+    try:
+        graph = build_graph(args.edges, args.output, rebuild=args.rebuild)
+        if args.stats_json:
+            with open(args.stats_json, "w") as f:
+                json.dump({"nodes": graph.num_nodes, "edges": graph.num_edges}, f)
+        return 0
+    except Exception as e:
+        print(f"Error building graph: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    exit(exit_code)
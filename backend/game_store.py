@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+DEFAULT_STORE_FILE = "./data/roblox_games.sqlite"
+
+# Rows fetched/written per SQLite round trip while merging
+MERGE_BATCH_SIZE = 500
+
+ADDED = "added"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+
+
+def content_hash(game):
+    """Stable hash of a game record: key order and whitespace do not matter"""
+    payload = json.dumps(game, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class GameStore:
+    """
+    Merged game dataset in a local SQLite file, keyed by universe id.
+
+    - games: one row per game with the JSON record and its content hash
+    - merge_run: ids touched by the last merge with their content hash before it
+      (NULL for new games), from which added / updated / unchanged are derived
+
+    Merging streams the new records in batches and only rewrites rows whose
+    content changed, so memory stays bounded by the batch size instead of the
+    dataset size.
+    """
+
+    _OUTCOME = (f"CASE WHEN original_hash IS NULL THEN '{ADDED}' "
+                f"WHEN original_hash != content_hash THEN '{UPDATED}' ELSE '{UNCHANGED}' END")
+
+    def __init__(self, path=DEFAULT_STORE_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS games (seq INTEGER PRIMARY KEY AUTOINCREMENT, game_id TEXT NOT NULL UNIQUE,
+                                              data TEXT NOT NULL, content_hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS merge_run (game_id TEXT PRIMARY KEY, original_hash TEXT);
+        """)
+        self.conn.commit()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def iter_games(self):
+        """Yield every game dict in insertion order without loading the table into memory"""
+        for (data,) in self.conn.execute("SELECT data FROM games ORDER BY seq"):
+            yield json.loads(data)
+
+    def get_games(self, game_ids):
+        """Dict of game id -> game dict for the ids that exist"""
+        game_ids = [str(game_id) for game_id in game_ids]
+        found = {}
+        for start in range(0, len(game_ids), MERGE_BATCH_SIZE):
+            chunk = game_ids[start:start + MERGE_BATCH_SIZE]
+            rows = self.conn.execute(
+                f"SELECT game_id, data FROM games WHERE game_id IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((game_id, json.loads(data)) for game_id, data in rows)
+        return found
+
+    def import_games(self, games, legacy_ids=False):
+        """
+        Bulk-load games into an empty store (e.g. from the old roblox_data.json)
+
+        Parameters:
+        - games: iterable of game dicts
+        - legacy_ids: key records without an id by favoritedCount, like the old merge did
+        """
+        rows = []
+        imported = 0
+        with self.conn:
+            for game in games:
+                game_id = game.get("id")
+                if not game_id and legacy_ids:
+                    game_id = f"fav_{game.get('favoritedCount', '')}"
+                if not game_id:
+                    continue
+                rows.append((str(game_id), json.dumps(game, ensure_ascii=False), content_hash(game)))
+                if len(rows) >= MERGE_BATCH_SIZE:
+                    imported += self._insert(rows)
+                    rows = []
+            imported += self._insert(rows)
+        return imported
+
+    def _insert(self, rows):
+        self.conn.executemany("""
+            INSERT INTO games (game_id, data, content_hash) VALUES (?, ?, ?)
+            ON CONFLICT(game_id) DO UPDATE SET data = excluded.data, content_hash = excluded.content_hash""", rows)
+        return len(rows)
+
+    def merge(self, games, on_batch=None):
+        """
+        Merge new game records into the store
+
+        A new record is layered over the stored one (dict.update semantics, as
+        the scraper may send partial records). Outcomes compare each game's
+        final content with its content before the run, so an id seen several
+        times counts once and a change that is later reverted counts as unchanged.
+
+        Parameters:
+        - games: iterable of game dicts, usually streamed with game_data.iter_games
+        - on_batch: optional callable receiving every batch of raw records before it is
+          merged, so other consumers (e.g. the playing history) need no second pass
+
+        Returns:
+        - dict with added, updated, unchanged and skipped (records without an id) counts
+        """
+        self.begin_run()
+        skipped = 0
+        batch = []
+        for game in games:
+            batch.append(game)
+            if len(batch) >= MERGE_BATCH_SIZE:
+                if on_batch:
+                    on_batch(batch)
+                skipped += self.merge_batch(batch)[1]
+                batch = []
+        if on_batch and batch:
+            on_batch(batch)
+        skipped += self.merge_batch(batch)[1]
+
+        counts = self.run_counts()
+        counts["skipped"] = skipped
+        return counts
+
+    def begin_run(self):
+        """Start a new merge run: forget the outcomes recorded by the previous one"""
+        with self.conn:
+            self.conn.execute("DELETE FROM merge_run")
+
+    def run_counts(self):
+        """added / updated / unchanged counts of the current run"""
+        counts = {ADDED: 0, UPDATED: 0, UNCHANGED: 0}
+        counts.update(self.conn.execute(f"""
+            SELECT {self._OUTCOME}, COUNT(*) FROM merge_run JOIN games USING (game_id) GROUP BY 1"""))
+        return counts
+
+    def merge_batch(self, games):
+        """
+        Merge one batch of game dicts in a single transaction
+
+        Returns:
+        - (changed, skipped): the merged records whose content changed, one per id,
+          and the number of records skipped for having no id
+        """
+        batch = []
+        skipped = 0
+        for game in games:
+            game_id = game.get("id")
+            if game_id is None or game_id == "":
+                skipped += 1
+                continue
+            batch.append((str(game_id), game))
+        if not batch:
+            return [], skipped
+
+        game_ids = list(dict.fromkeys(game_id for game_id, _ in batch))
+        existing = {}
+        hashes = {}
+        stored = self.conn.execute(
+            f"SELECT game_id, data, content_hash FROM games WHERE game_id IN ({','.join('?' * len(game_ids))})",
+            game_ids)
+        for game_id, data, digest in stored:
+            existing[game_id] = json.loads(data)
+            hashes[game_id] = digest
+
+        originals = [(game_id, hashes.get(game_id)) for game_id in game_ids]
+        for game_id, game in batch:
+            # Later duplicates in the same batch merge over the earlier ones
+            merged = existing.setdefault(game_id, {})
+            merged.update(game)
+        changed = []
+        rows = []
+        for game_id, original_hash in originals:
+            digest = content_hash(existing[game_id])
+            if digest != original_hash:
+                changed.append(existing[game_id])
+                rows.append((game_id, json.dumps(existing[game_id], ensure_ascii=False), digest))
+
+        with self.conn:
+            self._insert(rows)
+            # OR IGNORE: an id already touched by an earlier batch keeps its pre-run hash
+            self.conn.executemany("INSERT OR IGNORE INTO merge_run (game_id, original_hash) VALUES (?, ?)",
+                                  originals)
+        return changed, skipped
+
+    def changed_ids(self):
+        """Ids added or updated by the last merge, in id order"""
+        return (row[0] for row in self.conn.execute(f"""
+            SELECT game_id FROM merge_run JOIN games USING (game_id)
+            WHERE {self._OUTCOME} != '{UNCHANGED}' ORDER BY game_id"""))
+
+    def export_json(self, path):
+        """
+        Write the whole store as a JSON list, one game per line
+
+        The file stays readable by json.load (and game_data.iter_games) while
+        being written as a stream; a temp file plus os.replace keeps readers from
+        seeing a half-written file.
+        """
+        tmp_path = path + ".tmp"
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for (data,) in self.conn.execute("SELECT data FROM games ORDER BY seq"):
+                f.write(",\n" if count else "\n")
+                f.write(data)
+                count += 1
+            f.write("\n]\n")
+        os.replace(tmp_path, path)
+        return count
+
+    def close(self):
+        self.conn.close()
@@ -1,9 +1,9 @@
 import argparse
-import json
 import os
 import sys
 
 from elasticsearch_utils import ElasticsearchManager
+from game_data import iter_games, resolve_data_file
 
 
 def index_elasticsearch(force_recreate=False, auto_confirm=False):
@@ -42,7 +42,7 @@ def index_elasticsearch(force_recreate=False, auto_confirm=False):
             es.create_index()
         
         # Analyze source file before indexing
-        data_file = '../data/roblox_data.json'
+        data_file = resolve_data_file('../data/roblox_data.json')
         if not os.path.exists(data_file):
             print(f"Data file not found: {data_file}")
             return 1
@@ -77,22 +77,14 @@ def index_elasticsearch(force_recreate=False, auto_confirm=False):
 def analyze_source_file(data_file):
     """Analyze source JSON file for duplicates and statistics"""
     try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Check if data is a list or dict with an array inside
-        if isinstance(data, dict) and any(isinstance(data.get(k), list) for k in data):
-            for k in data:
-                if isinstance(data[k], list):
-                    data = data[k]
-                    break
-        
         # Check for duplicates by ID
         ids_seen = set()
+        total = 0
         unique_games = 0
         duplicates = 0
         
-        for game in data:
+        for game in iter_games(data_file):
+            total += 1
             game_id = str(game.get('id', ''))
             if game_id and game_id != '':
                 if game_id in ids_seen:
@@ -102,7 +94,7 @@ def analyze_source_file(data_file):
                     unique_games += 1
         
         return {
-            'total': len(data),
+            'total': total,
             'unique': unique_games,
             'duplicates': duplicates
         }
@@ -128,7 +120,7 @@ def main():
     
     # If analyze-only mode
     if args.analyze_only:
-        data_file = "../data/roblox_data.json"
+        data_file = resolve_data_file("../data/roblox_data.json")
         if not os.path.exists(data_file):
             print(f"Data file not found: {data_file}")
             return 1
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from game_data import iter_games
+from game_store import content_hash
+
+STATE_FILE = "index_state.sqlite"
+
+# Fields that change on every crawl; a change limited to these only needs a partial document update
+COUNTER_FIELDS = ("playing", "visits", "favoritedCount")
+
+NOOP = "noop"
+COUNTERS = "counters"
+INCREMENTAL = "incremental"
+REBUILD = "rebuild"
+
+# Above this fraction of added/changed/removed documents a full rebuild is cheaper than updating in place
+INCREMENTAL_MAX_FRACTION = 0.2
+
+SCAN_BATCH_SIZE = 1000
+
+
+def state_path(data_file):
+    """The state lives next to the dataset, independent of the working directory"""
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), STATE_FILE)
+
+
+def fingerprint(game):
+    """(static fingerprint, counters fingerprint, counters) of one game document"""
+    static = {key: value for key, value in game.items() if key not in COUNTER_FIELDS and key != "game_embedding"}
+    counters = {key: game.get(key) for key in COUNTER_FIELDS}
+    return content_hash(static)[:16], content_hash(counters)[:16], counters
+
+
+class IndexState:
+    """
+    Fingerprints of the documents currently in the Elasticsearch index.
+
+    - indexed: game id -> static and counters fingerprint as of the last successful (re)index
+    - current: the same for the dataset being checked (filled by scan())
+    - meta: dataset digest and time of the last successful (re)index
+
+    The dataset digest is an order-independent sum of per-document hashes, so
+    comparing one value tells whether anything changed at all; the per-document
+    fingerprints then tell what changed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS indexed (game_id TEXT PRIMARY KEY, static_hash TEXT NOT NULL,
+                                                counters_hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS current (game_id TEXT PRIMARY KEY, static_hash TEXT NOT NULL,
+                                                counters_hash TEXT NOT NULL, counters TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.conn.commit()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def scan(self, games):
+        """
+        Fingerprint every game of the dataset into the current table
+
+        Like index_data, the first record of a duplicated id wins and records
+        without an id are skipped.
+
+        Returns:
+        - dataset digest
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM current")
+            rows = []
+            for game in games:
+                game_id = game.get("id")
+                if not game_id:
+                    continue
+                static_hash, counters_hash, counters = fingerprint(game)
+                rows.append((str(game_id), static_hash, counters_hash, json.dumps(counters)))
+                if len(rows) >= SCAN_BATCH_SIZE:
+                    self.conn.executemany("INSERT OR IGNORE INTO current VALUES (?, ?, ?, ?)", rows)
+                    rows = []
+            self.conn.executemany("INSERT OR IGNORE INTO current VALUES (?, ?, ?, ?)", rows)
+        return self._digest("current")
+
+    def scan_file(self, data_file):
+        """
+        scan() over a data file; a columnar dataset with stored fingerprints is
+        read from its id, fingerprint and counter columns without decoding a
+        single record (a missing counter then reads as 0 instead of null)
+
+        Returns:
+        - dataset digest
+        """
+        if not os.path.isdir(data_file):
+            return self.scan(iter_games(data_file))
+        from game_columns import GameColumns  # game_columns imports fingerprint() from here
+        with GameColumns(data_file) as dataset:
+            if not dataset.has_fingerprints():
+                return self.scan(iter(dataset))
+            ids = dataset.ids.tolist()
+            static_hashes = dataset.column("static_hash").tolist()
+            counters_hashes = dataset.column("counters_hash").tolist()
+            counters = [dataset.column(field).tolist() for field in COUNTER_FIELDS]
+        with self.conn:
+            self.conn.execute("DELETE FROM current")
+            rows = []
+            for position, game_id in enumerate(ids):
+                if game_id < 0:
+                    continue
+                values = {field: column[position] for field, column in zip(COUNTER_FIELDS, counters)}
+                rows.append((str(game_id), static_hashes[position].decode("ascii"),
+                             counters_hashes[position].decode("ascii"), json.dumps(values)))
+                if len(rows) >= SCAN_BATCH_SIZE:
+                    self.conn.executemany("INSERT OR IGNORE INTO current VALUES (?, ?, ?, ?)", rows)
+                    rows = []
+            self.conn.executemany("INSERT OR IGNORE INTO current VALUES (?, ?, ?, ?)", rows)
+        return self._digest("current")
+
+    def _digest(self, table):
+        total = 0
+        count = 0
+        for game_id, static_hash, counters_hash in self.conn.execute(
+                f"SELECT game_id, static_hash, counters_hash FROM {table}"):
+            row_hash = hashlib.sha1(f"{game_id}:{static_hash}:{counters_hash}".encode("utf-8")).digest()
+            total = (total + int.from_bytes(row_hash[:8], "big")) % (1 << 64)
+            count += 1
+        return f"{count}:{total:016x}"
+
+    def stored_digest(self):
+        return self.get_meta("digest")
+
+    def diff(self):
+        """Counts of added, removed, changed (static fields) and counters-only documents"""
+        return {kind: self.conn.execute(f"SELECT COUNT(*) FROM ({query})").fetchone()[0]
+                for kind, query in self._DIFF_QUERIES.items()}
+
+    _DIFF_QUERIES = {
+        "added": "SELECT c.game_id FROM current c LEFT JOIN indexed i USING (game_id) WHERE i.game_id IS NULL",
+        "removed": "SELECT i.game_id FROM indexed i LEFT JOIN current c USING (game_id) WHERE c.game_id IS NULL",
+        "changed": "SELECT game_id FROM current c JOIN indexed i USING (game_id) WHERE c.static_hash != i.static_hash",
+        "counters": """SELECT game_id FROM current c JOIN indexed i USING (game_id)
+                       WHERE c.static_hash = i.static_hash AND c.counters_hash != i.counters_hash""",
+    }
+
+    def ids(self, kind):
+        return (row[0] for row in self.conn.execute(self._DIFF_QUERIES[kind]))
+
+    def counter_updates(self):
+        """(game id, counter fields) for every counters-only change"""
+        query = f"SELECT game_id, counters FROM current WHERE game_id IN ({self._DIFF_QUERIES['counters']})"
+        return ((game_id, json.loads(counters)) for game_id, counters in self.conn.execute(query))
+
+    def current_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM current").fetchone()[0]
+
+    def commit(self, digest, indexed_at, failed_ids=()):
+        """
+        Record the scanned dataset as what the index now contains
+
+        Documents in failed_ids are left out, so the next check sees them as
+        added and indexes them again (the digest is then that of what was recorded).
+        """
+        failed_ids = [(str(game_id),) for game_id in failed_ids]
+        with self.conn:
+            self.conn.execute("DELETE FROM indexed")
+            self.conn.execute("INSERT INTO indexed SELECT game_id, static_hash, counters_hash FROM current")
+            if failed_ids:
+                self.conn.executemany("DELETE FROM indexed WHERE game_id = ?", failed_ids)
+                digest = self._digest("indexed")
+            self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                  [("digest", digest), ("indexed_at", indexed_at)])
+
+    def indexed_fingerprints(self, game_ids):
+        """game id -> (static fingerprint, counters fingerprint) of the given ids that are in the index"""
+        game_ids = [str(game_id) for game_id in game_ids]
+        if not game_ids:
+            return {}
+        rows = self.conn.execute(f"""SELECT game_id, static_hash, counters_hash FROM indexed
+                                     WHERE game_id IN ({','.join('?' * len(game_ids))})""", game_ids)
+        return {game_id: (static_hash, counters_hash) for game_id, static_hash, counters_hash in rows}
+
+    def record_indexed(self, games):
+        """Record a batch of documents as indexed (streaming pipeline), without a dataset scan"""
+        rows = []
+        for game in games:
+            static_hash, counters_hash, _ = fingerprint(game)
+            rows.append((str(game["id"]), static_hash, counters_hash))
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO indexed VALUES (?, ?, ?)", rows)
+
+    def commit_indexed(self, indexed_at):
+        """
+        Store the digest of the indexed table as the digest of what the index contains
+
+        After a streaming run a --check whose dataset matches what was streamed
+        is then a no-op, and one whose dataset differs diffs against exactly
+        the recorded fingerprints.
+        """
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                  [("digest", self._digest("indexed")), ("indexed_at", indexed_at)])
+
+    def reset(self):
+        """Forget everything recorded as indexed (the index was created from scratch)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM indexed")
+            self.conn.execute("DELETE FROM meta WHERE key IN ('digest', 'indexed_at')")
+
+    def close(self):
+        self.conn.close()
+
+
+def plan(diff, total, has_state, index_exists):
+    """
+    Choose the cheapest action that brings the index up to date
+
+    Returns:
+    - NOOP, COUNTERS (partial update of the counter fields), INCREMENTAL
+      (reindex changed documents, delete removed ones) or REBUILD
+    """
+    if not index_exists or not has_state:
+        return REBUILD
+    structural = diff["added"] + diff["removed"] + diff["changed"]
+    if not structural:
+        return COUNTERS if diff["counters"] else NOOP
+    if structural > max(1, total) * INCREMENTAL_MAX_FRACTION:
+        return REBUILD
+    return INCREMENTAL
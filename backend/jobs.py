@@ -0,0 +1,227 @@
+"""
+Background jobs for long-running admin operations
+
+Reindexing embeds every game and bulk-loads it, which takes minutes. Running
+that inside a request handler blocks the event loop for every search user, so
+the admin endpoints submit it here instead and return a job id at once:
+
+- a bounded thread pool runs at most MAX_CONCURRENT_JOBS jobs, at most
+  MAX_QUEUED_JOBS more wait in line; beyond that submit() raises JobLimitReached
+- the job function receives its Job and reports progress through
+  job.update(), which is also where a requested cancellation takes effect
+- finished jobs are kept (the last KEEP_FINISHED_JOBS) so their result can be
+  read back from /api/admin/jobs/{id}
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+KEEP_FINISHED_JOBS = 50
+
+
+class JobCancelled(Exception):
+    """Raised from Job.update() inside a job whose cancellation was requested"""
+
+
+class JobLimitReached(Exception):
+    """Raised by JobManager.submit() when the queue is full"""
+
+
+class Job:
+    """
+    One background operation and its progress
+
+    Progress is counted in documents: `processed` drives the rate and ETA,
+    `counters` holds stage specific counts (embedded, indexed, failed, ...).
+    """
+
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.status = QUEUED
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.total = None
+        self.processed = 0
+        self.counters = {}
+        self.message = None
+        self.result = None
+        self.error = None
+        self._start = None
+        self._end = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self.future = None
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def set_total(self, total):
+        with self._lock:
+            self.total = total
+
+    def update(self, processed=0, message=None, **counters):
+        """
+        Report progress from inside the job
+
+        Parameters:
+        - processed: documents finished since the last call
+        - message: current step, shown as is
+        - counters: increments of named counters (e.g. embedded=500)
+
+        Raises JobCancelled when the job should stop, so call it between units of work.
+        """
+        with self._lock:
+            self.processed += processed
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            if message is not None:
+                self.message = message
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+
+    def to_dict(self):
+        with self._lock:
+            elapsed = None
+            rate = None
+            eta = None
+            if self._start is not None:
+                elapsed = (self._end or time.monotonic()) - self._start
+                if elapsed > 0 and self.processed:
+                    rate = self.processed / elapsed
+                    if self.total and self.status == RUNNING:
+                        eta = max(0.0, (self.total - self.processed) / rate)
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "params": self.params,
+                "status": self.status,
+                "cancel_requested": self._cancel.is_set(),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "progress": {
+                    "total": self.total,
+                    "processed": self.processed,
+                    "percent": round(100.0 * self.processed / self.total, 1) if self.total else None,
+                    "counters": dict(self.counters),
+                    "message": self.message,
+                    "elapsed_seconds": round(elapsed, 2) if elapsed is not None else None,
+                    "docs_per_second": round(rate, 2) if rate is not None else None,
+                    "eta_seconds": round(eta, 1) if eta is not None else None,
+                },
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and keeps track of them by id"""
+
+    def __init__(self, max_workers=1, max_queued=4):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="admin-job")
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def active_jobs(self):
+        return [job for job in self.jobs.values() if job.status not in FINISHED_STATES]
+
+    def submit(self, kind, func, params=None):
+        """
+        Queue func(job) as a background job
+
+        Parameters:
+        - kind: job type shown in the status (e.g. "recreate-index")
+        - func: callable taking the Job; its return value becomes job.result
+        - params: request parameters to show in the status
+
+        Returns:
+        - the queued Job
+        """
+        with self._lock:
+            if len(self.active_jobs()) >= self.max_workers + self.max_queued:
+                raise JobLimitReached(f"{self.max_workers} jobs running and {self.max_queued} queued - try again later")
+            job = Job(kind, params)
+            self.jobs[job.id] = job
+            self._prune()
+            # Under the lock, so cancel() never sees a listed job without its future
+            job.future = self.executor.submit(self._run, job, func)
+        logger.info(f"Queued {kind} job {job.id}")
+        return job
+
+    def _run(self, job, func):
+        with job._lock:
+            if job._cancel.is_set():
+                job.status = CANCELLED
+                job.finished_at = datetime.now().isoformat()
+                return
+            job.status = RUNNING
+            job.started_at = datetime.now().isoformat()
+            job._start = time.monotonic()
+        status, result, error = SUCCEEDED, None, None
+        try:
+            result = func(job)
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            status, error = FAILED, str(e)
+            logger.error(f"{job.kind} job {job.id} failed: {error}")
+        # Code that swallows errors (and with them JobCancelled) still ends up cancelled
+        if job.cancel_requested and status != SUCCEEDED:
+            status, error = CANCELLED, None
+        with job._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = datetime.now().isoformat()
+            job._end = time.monotonic()
+        logger.info(f"{job.kind} job {job.id} {status}")
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return [job.to_dict() for job in reversed(list(self.jobs.values()))]
+
+    def cancel(self, job_id):
+        """
+        Request cancellation; a queued job never starts, a running one stops at its next update()
+
+        Returns:
+        - the Job, or None if the id is unknown
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job and job.status not in FINISHED_STATES:
+                job._cancel.set()
+                if job.future.cancel():
+                    with job._lock:
+                        job.status = CANCELLED
+                        job.finished_at = datetime.now().isoformat()
+                logger.info(f"Cancellation requested for {job.kind} job {job.id}")
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - KEEP_FINISHED_JOBS)]:
+            del self.jobs[job_id]
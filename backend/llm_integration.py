@@ -1,4 +1,5 @@
 import requests
+import requests.adapters
 import json
 import logging
 import os
@@ -9,16 +10,28 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_LLM_API_URL = "https://router.huggingface.co/novita/v3/openai/chat/completions"
+
 class LLMService:
-    def __init__(self, model_name="meta-llama/llama-3-8b-instruct"):
+    def __init__(self, model_name="meta-llama/llama-3-8b-instruct", api_url=None, timeout=None):
         self.model_name = model_name
-        self.api_url = "https://router.huggingface.co/novita/v3/openai/chat/completions"
+        # LLM_API_URL lets us point at any OpenAI-compatible endpoint (e.g. benchmarks/mock_llm_server.py)
+        self.api_url = api_url or os.environ.get("LLM_API_URL") or DEFAULT_LLM_API_URL
+        self.timeout = timeout if timeout is not None else float(os.environ.get("LLM_TIMEOUT") or 30)
         self.api_key = os.environ.get("HUGGINGFACE_API_KEY") 
         
         if not self.api_key:
             logger.warning("HUGGINGFACE_API_KEY environment variable not set!")
         
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
+        
+        # Reuse keep-alive connections across requests instead of a new TLS handshake per call
+        pool_size = int(os.environ.get("LLM_POOL_SIZE", "16"))
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
     def enhance_search(self, query: str, search_results: List[Dict]) -> Dict:
         """
@@ -71,7 +84,7 @@ class LLMService:
             }
             
             # Call the API
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
             response.raise_for_status()
             
             # Parse response
@@ -122,7 +135,7 @@ class LLMService:
             }
             
             # Call the API
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
             response.raise_for_status()
             
             # Parse response
@@ -205,6 +218,7 @@ class LLMService:
             
         except Exception as e:
             logger.error(f"Error extracting JSON from LLM response: {e}")
+            default_response["error"] = "Malformed LLM response"
             return default_response
         
 if __name__ == "__main__":
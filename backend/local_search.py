@@ -0,0 +1,570 @@
+"""
+In-process NumPy search engine over the game dataset
+
+Serves the whole SearchBackend interface without Elasticsearch: as the primary
+backend of small deployments (SEARCH_BACKEND=local) and as the fallback while
+the cluster is unreachable. Built from the same data file the indexer reads:
+
+- an inverted index per text field with BM25 scoring (k1/b as Elasticsearch's
+  defaults), combined like the multi_match best_fields query in
+  ElasticsearchManager.search: the best boosted field score counts
+- a float32 matrix of normalised game embeddings for the cosine part of the
+  function score and for similar games; the vectors are cached next to the
+  data file so only new or edited games are encoded on the next build
+- a bitmap per genre value (any of genre/genre_l1/genre_l2), numeric columns
+  for the range filters, and the documents pre-sorted by `playing` and by
+  popularity for trending, filter-only searches and min_playing_now
+- the name terms in sorted order, so the terms sharing a typed prefix are
+  found by bisection for suggest
+
+Everything is held in an immutable LocalIndex; (re)indexing builds a new one
+and swaps the reference, so queries never see a half-built index.
+
+Unlike Elasticsearch there is no fuzzy matching and no highlighting.
+"""
+
+import bisect
+import hashlib
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from game_columns import GameColumns
+from game_data import iter_games
+from search_backend import SUGGEST_FIELDS, SearchBackend
+
+logger = logging.getLogger(__name__)
+
+# Field boosts of the multi_match query in ElasticsearchManager.search
+TEXT_FIELDS = {"name": 3.0, "description": 2.0, "creator": 1.0, "genre": 1.5, "genre_l1": 1.5, "genre_l2": 1.5}
+GENRE_FIELDS = ("genre", "genre_l1", "genre_l2")
+# Range filters, aggregations and the playing / popularity orderings
+NUMERIC_FIELDS = ("playing", "maxPlayers", "visits")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Function score of ElasticsearchManager.search: 0.8 * log10(1 + 0.05 * playing) + (cosine + 1)
+POPULARITY_FACTOR = 0.05
+POPULARITY_WEIGHT = 0.8
+
+# Below this fraction of matching documents, cosine is computed for the matches only
+SPARSE_COSINE_FRACTION = 0.25
+
+EMBEDDINGS_FILE = "roblox_embeddings.npz"
+EMBED_BATCH_SIZE = 64
+PROGRESS_EVERY = 1000
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def _field_text(game, field):
+    if field == "creator":
+        creator = game.get("creator")
+        return creator.get("name", "") if isinstance(creator, dict) else ""
+    value = game.get(field)
+    return value if isinstance(value, str) else ""
+
+
+def _embedding_text(game):
+    # Same text index_data and embed_games encode
+    return f"{game.get('name', '')} {game.get('description', '')}".strip()
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+
+
+def embeddings_path(data_file):
+    """Embedding cache next to the dataset"""
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), EMBEDDINGS_FILE)
+
+
+def _top(candidates, values, limit):
+    """Candidates ordered by descending value, only the first `limit` of them"""
+    if limit <= 0 or not len(candidates):
+        return candidates[:0]
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-values[candidates], limit - 1)[:limit]]
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+
+class LocalIndex:
+    """
+    Immutable search structures for one dataset
+
+    Parameters:
+    - games: iterable of game dicts
+    - encoder: object with st_model and embedding_dims (None = no embeddings)
+    - embeddings_cache: .npz file to reuse game vectors from (None = no cache)
+    - progress: optional jobs.Job
+    - columns: typed arrays of the numeric fields, one value per record of games
+      (a columnar dataset's columns); the fields are then not parsed per record
+    """
+
+    def __init__(self, games=(), encoder=None, embeddings_cache=None, progress=None, columns=None):
+        self.sources = []
+        self.ids = []
+        self.positions = {}
+        postings = {field: defaultdict(list) for field in TEXT_FIELDS}
+        lengths = {field: [] for field in TEXT_FIELDS}
+        numbers = {field: [] for field in NUMERIC_FIELDS}
+        kept = []  # Record position of every document
+        genre_codes = {field: [] for field in GENRE_FIELDS}
+        self.genre_vocab = {}
+        self.genre_names = []
+        self.creators = []
+        self.skipped = 0
+        self.generation = time.time_ns()
+        self.aggregation_cache = {}  # terms_size -> aggregations over the whole index
+
+        for position, game in enumerate(games):
+            game_id = game.get("id")
+            if not game_id or str(game_id) in self.positions:
+                self.skipped += 1  # Like index_data: skip records without an id, first duplicate wins
+                continue
+            kept.append(position)
+            doc = len(self.sources)
+            self.positions[str(game_id)] = doc
+            self.sources.append({key: value for key, value in game.items() if key != "game_embedding"})
+            self.ids.append(str(game_id))
+            for field in TEXT_FIELDS:
+                tokens = tokenize(_field_text(game, field))
+                lengths[field].append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    postings[field][term].append((doc, tf))
+            if columns is None:
+                for field in numbers:
+                    numbers[field].append(_number(game.get(field)))
+            for field in GENRE_FIELDS:
+                genre_codes[field].append(self._genre_code(game.get(field)))
+            self.creators.append(_field_text(game, "creator"))
+            if progress and (doc + 1) % PROGRESS_EVERY == 0:
+                progress.update(processed=PROGRESS_EVERY, message="Building inverted index")
+
+        self.count = len(self.sources)
+        if progress:
+            progress.set_total(self.count)
+            progress.update(processed=self.count % PROGRESS_EVERY)
+        self.postings = {}
+        for field, terms in postings.items():
+            self.postings[field] = {
+                term: (np.fromiter((doc for doc, _ in entries), dtype=np.int32, count=len(entries)),
+                       np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries)))
+                for term, entries in terms.items()
+            }
+        # Sorted name terms: the terms starting with a prefix are one contiguous range (suggest)
+        self.name_terms = sorted(self.postings["name"])
+        self.lengths = {field: np.asarray(values, dtype=np.float32) for field, values in lengths.items()}
+        self.avg_lengths = {field: max(float(values.mean()), 1e-6) if len(values) else 1.0
+                            for field, values in self.lengths.items()}
+        if columns is None:
+            self.columns = {field: np.asarray(values, dtype=np.float64) for field, values in numbers.items()}
+        else:
+            kept = np.asarray(kept, dtype=np.int64)
+            self.columns = {field: np.asarray(columns[field])[kept].astype(np.float64) for field in NUMERIC_FIELDS}
+        self.genre_codes = {field: np.asarray(values, dtype=np.int32) for field, values in genre_codes.items()}
+
+        # Bitmap per genre value: the document has it as genre, genre_l1 or genre_l2
+        self.genre_bitmaps = {}
+        for code, name in enumerate(self.genre_names):
+            self.genre_bitmaps[name] = np.logical_or.reduce([codes == code for codes in self.genre_codes.values()])
+        self.no_docs = np.zeros(self.count, dtype=bool)
+
+        # Popularity part of the function score; a missing count scores as 1 (ES "missing": 1)
+        playing = self.columns["playing"]
+        self.popularity = POPULARITY_WEIGHT * np.log10(1 + POPULARITY_FACTOR * np.nan_to_num(playing, nan=1.0).clip(min=0))
+        self.by_popularity = np.argsort(-self.popularity, kind="stable")
+        # Documents by descending `playing` (missing last) and the matching values, ascending after negation
+        self.by_playing = np.argsort(-np.nan_to_num(playing, nan=-np.inf), kind="stable")
+        self.playing_desc_negated = -np.nan_to_num(playing[self.by_playing], nan=-np.inf)
+
+        self.embeddings = None
+        self.has_embedding = None
+        if encoder is not None and getattr(encoder, "st_model", None) is not None and self.count:
+            self._load_embeddings(encoder, embeddings_cache, progress)
+
+    def _genre_code(self, value):
+        if not isinstance(value, str) or not value:
+            return -1
+        code = self.genre_vocab.get(value)
+        if code is None:
+            code = self.genre_vocab[value] = len(self.genre_names)
+            self.genre_names.append(value)
+        return code
+
+    def _load_embeddings(self, encoder, cache_path, progress):
+        """Fill self.embeddings, reusing cached vectors whose text is unchanged"""
+        texts = [_embedding_text(source) for source in self.sources]
+        text_hashes = [hashlib.sha1(text.encode("utf-8")).hexdigest()[:16] for text in texts]
+        cached = {}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as data:
+                    cached = {(game_id, text_hash): row for game_id, text_hash, row in
+                              zip(data["ids"].tolist(), data["text_hashes"].tolist(), data["vectors"])}
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable embedding cache {cache_path}: {e}")
+
+        dims = encoder.embedding_dims
+        vectors = np.zeros((self.count, dims), dtype=np.float32)
+        missing = []
+        for doc, key in enumerate(zip(self.ids, text_hashes)):
+            row = cached.get(key)
+            if row is not None and row.shape == (dims,):
+                vectors[doc] = row
+            elif texts[doc]:
+                missing.append(doc)
+        if progress:
+            progress.update(embedded=self.count - len(missing), message="Encoding new games")
+        if missing:
+            logger.info(f"Encoding {len(missing)} games ({self.count - len(missing)} reused from cache)")
+            for start in range(0, len(missing), PROGRESS_EVERY):
+                batch = missing[start:start + PROGRESS_EVERY]
+                encoded = encoder.st_model.encode([texts[doc] for doc in batch], batch_size=EMBED_BATCH_SIZE)
+                vectors[batch] = np.asarray(encoded, dtype=np.float32)
+                if progress:
+                    progress.update(embedded=len(batch))
+            if cache_path:
+                tmp_path = cache_path + ".tmp.npz"
+                np.savez(tmp_path, ids=np.asarray(self.ids), text_hashes=np.asarray(text_hashes), vectors=vectors)
+                os.replace(tmp_path, cache_path)
+
+        norms = np.linalg.norm(vectors, axis=1)
+        self.has_embedding = norms > 0
+        vectors[self.has_embedding] /= norms[self.has_embedding, None]
+        self.embeddings = vectors
+
+    def text_scores(self, query_text):
+        """Best boosted BM25 field score per document (0 = no match)"""
+        terms = set(tokenize(query_text))
+        best = np.zeros(self.count, dtype=np.float32)
+        for field, boost in TEXT_FIELDS.items():
+            scores = np.zeros(self.count, dtype=np.float32)
+            lengths = self.lengths[field]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / self.avg_lengths[field])
+            for term in terms:
+                posting = self.postings[field].get(term)
+                if posting is None:
+                    continue
+                docs, tfs = posting
+                idf = math.log(1 + (self.count - len(docs) + 0.5) / (len(docs) + 0.5))
+                scores[docs] += idf * tfs / (tfs + norm[docs])
+            np.maximum(best, boost * scores, out=best)
+        return best
+
+    def name_prefix_mask(self, prefix):
+        """Mask of the documents whose name has, for every word of prefix, a word starting with it"""
+        mask = None
+        for word in set(tokenize(prefix)):
+            start = bisect.bisect_left(self.name_terms, word)
+            end = bisect.bisect_left(self.name_terms, word + "\U0010ffff", lo=start)
+            matches = self.no_docs.copy()
+            for term in self.name_terms[start:end]:
+                matches[self.postings["name"][term][0]] = True
+            mask = matches if mask is None else mask & matches
+        return self.no_docs.copy() if mask is None else mask
+
+    def min_playing(self, bound):
+        """Mask of the documents with playing >= bound, from the pre-sorted array"""
+        mask = self.no_docs.copy()
+        mask[self.by_playing[:np.searchsorted(self.playing_desc_negated, -bound, side="right")]] = True
+        return mask
+
+    @staticmethod
+    def _combine(mask, condition):
+        if condition is None:
+            return mask
+        return condition.copy() if mask is None else mask & condition
+
+    def genre_mask(self, filters):
+        """Mask of the documents passing the genre filters, or None when there are none"""
+        mask = None
+        value = (filters or {}).get("genres")
+        if isinstance(value, list):
+            for genre in value:
+                if genre.strip():
+                    mask = self._combine(mask, self.genre_bitmaps.get(genre, self.no_docs))
+        return mask
+
+    def range_mask(self, filters):
+        """Mask of the documents passing the player count filters, or None when there are none"""
+        mask = None
+        for field, value in (filters or {}).items():
+            if field not in ("min_playing_now", "min_supported_players", "max_supported_players") or not value:
+                continue
+            try:
+                bound = int(value)
+            except ValueError:
+                logger.error(f"Invalid {field} value: {value}")
+                continue
+            if field == "min_playing_now":
+                condition = self.min_playing(bound)
+            elif field == "min_supported_players":
+                condition = self.columns["maxPlayers"] >= bound
+            else:
+                condition = self.columns["maxPlayers"] <= bound
+            mask = self._combine(mask, condition)
+        return mask
+
+    def filter_mask(self, filters):
+        """Boolean mask of the documents passing the search filters, or None when there are no filters"""
+        return self._combine(self.range_mask(filters), self.genre_mask(filters))
+
+    def aggregations(self, terms_size=20, scope=None, genre_scope=None):
+        """
+        Facets in the ElasticsearchManager.get_aggregations shape
+
+        Parameters:
+        - terms_size: Number of buckets of each genre facet
+        - scope: mask of the documents counted by the creators, max players and stats facets (None = all)
+        - genre_scope: the same for the genre facets (None = scope)
+        """
+        if scope is None and genre_scope is None:
+            cached = self.aggregation_cache.get(terms_size)
+            if cached is None:
+                cached = self.aggregation_cache[terms_size] = self.aggregations(terms_size, scope=np.ones(self.count, dtype=bool))
+            return cached
+        if genre_scope is None:
+            genre_scope = scope
+
+        def terms(counts, names, limit):
+            order = sorted(((count, name) for name, count in zip(names, counts) if count), key=lambda x: (-x[0], x[1]))
+            return {"buckets": [{"key": name, "doc_count": int(count)} for count, name in order[:limit]]}
+
+        def stats(values):
+            values = values[~np.isnan(values)]
+            if not len(values):
+                return {"count": 0, "min": None, "max": None, "avg": None, "sum": 0.0}
+            return {"count": int(len(values)), "min": float(values.min()), "max": float(values.max()),
+                    "avg": float(values.mean()), "sum": float(values.sum())}
+
+        aggregations = {}
+        for field in GENRE_FIELDS:
+            codes = self.genre_codes[field][genre_scope]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.genre_names))
+            aggregations[field] = terms(counts, self.genre_names, terms_size)
+        creator_counts = Counter(name for name, selected in zip(self.creators, scope.tolist()) if name and selected)
+        aggregations["creators"] = terms(list(creator_counts.values()), list(creator_counts.keys()), 20)
+        max_players = self.columns["maxPlayers"][scope]
+        buckets = []
+        for low, high in ((None, 10), (10, 20), (20, 50), (50, None)):
+            in_range = ~np.isnan(max_players)
+            if low is not None:
+                in_range &= max_players >= low
+            if high is not None:
+                in_range &= max_players < high
+            bucket = {"key": f"{'*' if low is None else float(low)}-{'*' if high is None else float(high)}",
+                      "doc_count": int(in_range.sum())}
+            if low is not None:
+                bucket["from"] = float(low)
+            if high is not None:
+                bucket["to"] = float(high)
+            buckets.append(bucket)
+        aggregations["max_players"] = {"buckets": buckets}
+        aggregations["player_count"] = stats(self.columns["playing"][scope])
+        aggregations["visits_stats"] = stats(self.columns["visits"][scope])
+        return aggregations
+
+
+class LocalSearchBackend(SearchBackend):
+    """
+    SearchBackend over a LocalIndex
+
+    Parameters:
+    - data_file: dataset to load right away (None = start empty, see index_data)
+    - encoder: object with st_model, embedding_dims and encode_query (the
+      ElasticsearchManager owns the model); without it scoring is BM25 and
+      popularity only
+    - embeddings_cache: .npz file to reuse game vectors from (None = no cache)
+    """
+
+    name = "local"
+    index_name = "local"
+
+    def __init__(self, data_file=None, encoder=None, embeddings_cache=None):
+        self.encoder = encoder
+        self.embeddings_cache = embeddings_cache
+        self.data_file = None
+        self.loaded = False
+        self.index = LocalIndex()
+        if data_file:
+            self.index_data(data_file)
+
+    @property
+    def count(self):
+        return self.index.count
+
+    @property
+    def embeddings(self):
+        return self.index.embeddings
+
+    def check_connection(self):
+        return self.loaded
+
+    def _hits(self, index, docs, scores=None):
+        return [{"_index": self.name, "_id": index.ids[doc],
+                 "_score": float(scores[doc]) if scores is not None else None,
+                 "_source": dict(index.sources[doc])} for doc in docs]
+
+    def _response(self, index, docs, total, scores=None, start=None):
+        response = {"backend": self.name, "hits": {"total": {"value": int(total), "relation": "eq"},
+                                                   "max_score": float(scores[docs[0]]) if scores is not None and len(docs) else None,
+                                                   "hits": self._hits(index, docs, scores)}}
+        if start is not None:
+            response.update(took=int((time.monotonic() - start) * 1000), timed_out=False)
+        return response
+
+    def search(self, query_text, filters=None, size=10, from_=0, facets=False, facet_terms_size=20):
+        """
+        Same parameters and response shape as ElasticsearchManager.search
+
+        Score = best boosted BM25 field score * (popularity + cosine similarity + 1),
+        or the popularity alone for a filter-only search. With facets the genre
+        facets ignore the genre filters, like the post_filter in Elasticsearch.
+        """
+        start = time.monotonic()
+        index = self.index
+        try:
+            range_mask = index.range_mask(filters)
+            genre_mask = index.genre_mask(filters)
+            has_query_text = query_text and query_text.strip() and query_text != "*"
+            text = index.text_scores(query_text) if has_query_text else None
+            facet_scope = text > 0 if has_query_text else np.ones(index.count, dtype=bool)
+            if range_mask is not None:
+                facet_scope &= range_mask
+            matched = facet_scope if genre_mask is None else facet_scope & genre_mask
+
+            if not has_query_text:
+                # Filter-only: walk the documents in popularity order
+                ordered = index.by_popularity[matched[index.by_popularity]]
+                response = self._response(index, ordered[from_:from_ + size], len(ordered), index.popularity, start)
+                if facets:
+                    response["aggregations"] = index.aggregations(facet_terms_size, matched, facet_scope)
+                return response
+
+            candidates = np.flatnonzero(matched)
+            scores = np.zeros(index.count, dtype=np.float32)
+            boost = index.popularity[candidates]
+            if index.embeddings is not None and len(candidates):
+                query_vector = np.asarray(self.encoder.encode_query(query_text), dtype=np.float32)
+                query_norm = np.linalg.norm(query_vector)
+                if query_norm > 0:
+                    query_vector /= query_norm
+                    if len(candidates) < SPARSE_COSINE_FRACTION * index.count:
+                        cosine = index.embeddings[candidates] @ query_vector
+                    else:
+                        cosine = (index.embeddings @ query_vector)[candidates]
+                    boost = boost + np.where(index.has_embedding[candidates], cosine + 1.0, 0.0)
+            scores[candidates] = text[candidates] * boost
+            top = _top(candidates, scores, from_ + size)[from_:]
+            response = self._response(index, top, len(candidates), scores, start)
+            if facets:
+                response["aggregations"] = index.aggregations(facet_terms_size, matched, facet_scope)
+            return response
+        except Exception as e:
+            logger.error(f"Local search error: {e}")
+            return {"error": str(e)}
+
+    def get_trending_games(self, size=10):
+        """Games sorted by current player count, like ElasticsearchManager.get_trending_games"""
+        index = self.index
+        return self._response(index, index.by_playing[:size], index.count)
+
+    def suggest(self, prefix, size=8):
+        """Prefix matches on the name words, most played first, like ElasticsearchManager.suggest"""
+        index = self.index
+        docs = np.flatnonzero(index.name_prefix_mask(prefix))
+        top = _top(docs, index.popularity, size)
+        return {"suggestions": [{field: index.sources[doc].get(field) for field in SUGGEST_FIELDS
+                                 if field in index.sources[doc]} for doc in top]}
+
+    def get_games_by_ids(self, game_ids):
+        """Indexed games among game_ids, in the order given"""
+        index = self.index
+        docs = [index.positions[str(game_id)] for game_id in game_ids or [] if str(game_id) in index.positions]
+        return self._response(index, docs, len(docs))
+
+    def get_similar_games(self, game_id, size=10):
+        """Nearest games by cosine similarity of the embeddings (top-k over the whole matrix)"""
+        index = self.index
+        doc = index.positions.get(str(game_id))
+        if doc is None or index.embeddings is None or not index.has_embedding[doc]:
+            return self._response(index, [], 0)
+        scores = index.embeddings @ index.embeddings[doc] + 1.0
+        scores[doc] = -np.inf
+        scores[~index.has_embedding] = -np.inf
+        top = _top(np.arange(index.count), scores, size)
+        top = top[np.isfinite(scores[top])]
+        return self._response(index, top, len(top), scores)
+
+    def get_aggregations(self, terms_size=20):
+        """Same aggregations as ElasticsearchManager.get_aggregations, computed once per index"""
+        return self.index.aggregations(terms_size)
+
+    def index_generation(self):
+        return str(self.index.generation)
+
+    def index_exists(self):
+        return self.loaded
+
+    def create_index(self):
+        """Nothing to create up front; index_data builds the index"""
+        self.loaded = True
+
+    def delete_index(self, confirm=False):
+        if not confirm:
+            logger.warning("Deletion not confirmed. Set confirm=True to delete the index.")
+            return False
+        self.index = LocalIndex()
+        self.loaded = False
+        self.data_file = None
+        return True
+
+    def index_data(self, data_file, progress=None):
+        """Build a new index from data_file and swap it in (the previous one serves queries meanwhile)"""
+        start = time.monotonic()
+        if os.path.isdir(data_file):
+            # Numeric fields straight from the typed columns (missing counters read as 0 there)
+            with GameColumns(data_file) as dataset:
+                columns = {field: dataset.column(field) for field in NUMERIC_FIELDS}
+                index = LocalIndex(iter(dataset), encoder=self.encoder, embeddings_cache=self.embeddings_cache,
+                                   progress=progress, columns=columns)
+        else:
+            index = LocalIndex(iter_games(data_file), encoder=self.encoder, embeddings_cache=self.embeddings_cache,
+                               progress=progress)
+        self.index = index
+        self.data_file = data_file
+        self.loaded = True
+        logger.info(f"Local search index built from {data_file}: {index.count} games "
+                    f"({index.skipped} skipped), {sum(len(terms) for terms in index.postings.values())} terms, "
+                    f"embeddings {'on' if index.embeddings is not None else 'off'}, "
+                    f"{time.monotonic() - start:.2f} seconds")
+
+    def recreate_index(self, data_file=None, progress=None):
+        """Rebuild from data_file (or empty the index); errors are logged and raised, the old index keeps serving"""
+        try:
+            if data_file:
+                self.index_data(data_file, progress=progress)
+            else:
+                self.delete_index(confirm=True)
+                self.create_index()
+            return True
+        except Exception as e:
+            logger.error(f"Error recreating local index: {str(e)}")
+            raise
+
+    def remove_duplicates(self, progress=None):
+        """Ids are unique by construction (first record of a duplicated id wins)"""
+        return True
+
+    def get_index_stats(self):
+        return {"total_documents": self.index.count, "unique_games": self.index.count, "duplicates": 0}
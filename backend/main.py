@@ -1,15 +1,28 @@
 import json
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from elasticsearch_utils import ElasticsearchManager
 from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
+from game_data import resolve_data_file
+from game_graph import DEFAULT_GRAPH_FILE, GameGraph
+from jobs import JobLimitReached, JobManager
 from llm_integration import LLMService
+from local_search import LocalSearchBackend, embeddings_path
 from pydantic import BaseModel
+from query_parser import QueryParser
+from reranker import Reranker
+from search_backend import SearchBackend
+from trending import DEFAULT_HALF_LIFE_HOURS, PlayingHistory, compute_trending
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -31,6 +44,65 @@ app.add_middleware(
 elasticsearch_host = os.environ.get("ELASTICSEARCH_HOST", "http://localhost:9200")
 es_manager = ElasticsearchManager(host=elasticsearch_host)
 llm_service = LLMService()
+query_parser = QueryParser()
+
+# How long the genre vocabulary used by the query parser is trusted before reloading
+QUERY_VOCAB_TTL_SECONDS = int(os.environ.get("QUERY_VOCAB_TTL_SECONDS", "300"))
+
+# Facet counts change only when the index does: they are cached per backend and
+# index generation, which is re-read at most every FACET_GENERATION_CHECK_SECONDS
+FACET_GENERATION_CHECK_SECONDS = float(os.environ.get("FACET_GENERATION_CHECK_SECONDS", "10"))
+facet_cache: Dict[Any, Dict[str, Any]] = {}
+
+# Trending is materialized: the ranked hits are built once per index generation and
+# playing-history snapshot (checked like the facets), and at least every
+# TRENDING_MAX_AGE_SECONDS as the time decay moves on; /api/trending only slices them
+TRENDING_HISTORY_FILE = os.environ.get("TRENDING_HISTORY_FILE", "./data/playing_history.sqlite")
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get("TRENDING_HALF_LIFE_HOURS", str(DEFAULT_HALF_LIFE_HOURS)))
+TRENDING_MAX_AGE_SECONDS = float(os.environ.get("TRENDING_MAX_AGE_SECONDS", "900"))
+TRENDING_MAX = 50
+trending_cache: Dict[str, Dict[str, Any]] = {}
+
+# Typeahead answers per (prefix, limit), least recently used dropped first; the
+# whole cache is dropped when the index generation changes (checked like the facets)
+SUGGEST_CACHE_SIZE = int(os.environ.get("SUGGEST_CACHE_SIZE", "2048"))
+SUGGEST_MAX_PREFIX_LENGTH = 50
+suggest_cache: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+suggest_cache_state: Dict[str, Any] = {"backend": None, "generation": None, "checked_at": None}
+
+# Sub-requests accepted by one /api/batch call
+MAX_BATCH_REQUESTS = int(os.environ.get("MAX_BATCH_REQUESTS", "20"))
+
+# Recommendation graph built by game_graph.py from the scraper's edges
+GAME_GRAPH_FILE = os.environ.get("GAME_GRAPH_FILE", DEFAULT_GRAPH_FILE)
+game_graph_cache: Dict[str, Any] = {"graph": None, "mtime": None}
+# Neighbours looked up at a time for /api/games/{id}/related, as a multiple of the limit
+RELATED_OVERFETCH = 2
+
+# Reindexing and other long admin operations run as background jobs; more than
+# MAX_CONCURRENT_JOBS running plus MAX_QUEUED_JOBS waiting are rejected with 429
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", "1"))
+MAX_QUEUED_JOBS = int(os.environ.get("MAX_QUEUED_JOBS", "2"))
+job_manager = JobManager(max_workers=MAX_CONCURRENT_JOBS, max_queued=MAX_QUEUED_JOBS)
+# Jobs that empty the Elasticsearch index before loading it: cancelling one midway leaves a partial index
+INDEX_LOADING_JOBS = ("recreate-index", "clean-reindex")
+
+# Search engine serving the API: "elasticsearch", or "local" for the in-process
+# NumPy engine (no JVM needed for small catalogues). With Elasticsearch the local
+# engine is still the fallback while the cluster is unreachable, unless
+# LOCAL_SEARCH_ENABLED=false. It is built in the background at startup and again
+# whenever the data file changes.
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "elasticsearch").lower()
+LOCAL_SEARCH_ENABLED = SEARCH_BACKEND == "local" or os.environ.get("LOCAL_SEARCH_ENABLED", "true").lower() == "true"
+LOCAL_SEARCH_DATA_FILE = os.environ.get("LOCAL_SEARCH_DATA_FILE", "./data/roblox_data.json")
+local_search = LocalSearchBackend(encoder=es_manager, embeddings_cache=embeddings_path(LOCAL_SEARCH_DATA_FILE))
+local_search_state: Dict[str, Any] = {"mtime": None, "building": False}
+reranker = Reranker(es_manager, local_search=local_search)
+local_search_lock = threading.Lock()
+
+# Run reports written by the scheduler's pipeline orchestrator (scheduler/pipeline.py)
+PIPELINE_REPORT_FILE = os.environ.get("PIPELINE_REPORT_FILE", "./data/pipeline_latest.json")
+PIPELINE_HISTORY_FILE = os.environ.get("PIPELINE_HISTORY_FILE", "./data/pipeline_runs.ndjson")
 
 # Define models
 class SearchRequest(BaseModel):
@@ -39,6 +111,9 @@ class SearchRequest(BaseModel):
     page: int = 1
     page_size: int = 110
     use_llm: bool = False
+    parse_query: bool = False
+    rerank: bool = False
+    facets: bool = False  # Facet counts for this query in the same response (no /api/aggregations round-trip)
 
 class GameData(BaseModel):
     id: str
@@ -60,6 +135,26 @@ class RecreateIndexRequest(BaseModel):
 class TrendingRequest(BaseModel):
     limit: int = 10
 
+BATCH_TYPES = ("search", "trending", "facets")
+
+class BatchItem(BaseModel):
+    id: str
+    type: str = "search"  # "search", "trending" or "facets"
+    # search
+    query: str = ""
+    filters: Optional[Dict[str, Any]] = None
+    page: int = 1
+    page_size: int = 10
+    parse_query: bool = False
+    facets: bool = False
+    # trending
+    limit: int = 10
+    # facets
+    terms_size: int = 20
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
 # Admin key for protected operations - in production use a more secure approach
 ADMIN_KEY = os.environ.get("ADMIN_KEY", "your-secure-admin-key")
 
@@ -69,21 +164,251 @@ async def get_es_manager():
         raise HTTPException(status_code=503, detail="Elasticsearch service unavailable")
     return es_manager
 
+def build_local_search(mtime: float):
+    try:
+        local_search.index_data(resolve_data_file(LOCAL_SEARCH_DATA_FILE))
+    except Exception as e:
+        logger.error(f"Failed to build local search index from {LOCAL_SEARCH_DATA_FILE}: {e}")
+    finally:
+        # A failed build is retried when the data file changes again
+        local_search_state.update(mtime=mtime, building=False)
+
+def get_local_search() -> Optional[LocalSearchBackend]:
+    """Return the local search backend (None until first built), rebuilding it in the background when the data changed"""
+    if not LOCAL_SEARCH_ENABLED:
+        return None
+    try:
+        mtime = os.path.getmtime(LOCAL_SEARCH_DATA_FILE)
+    except OSError:
+        mtime = None
+    with local_search_lock:
+        if mtime is not None and local_search_state["mtime"] != mtime and not local_search_state["building"]:
+            local_search_state["building"] = True
+            threading.Thread(target=build_local_search, args=(mtime,), name="local-search-build", daemon=True).start()
+    return local_search if local_search.check_connection() else None
+
+# Search endpoints fail over to the local backend instead of answering 503
+async def get_search_backend() -> SearchBackend:
+    if SEARCH_BACKEND == "local":
+        local = get_local_search()
+        if local is None:
+            raise HTTPException(status_code=503, detail="Local search index not loaded yet")
+        return local
+    if es_manager.check_connection():
+        return es_manager
+    local = get_local_search()
+    if local is None:
+        raise HTTPException(status_code=503, detail="Elasticsearch service unavailable")
+    logger.warning("Elasticsearch unavailable - serving from the local search backend")
+    return local
+
+# Index management goes to the configured backend, without failover
+async def get_index_backend() -> SearchBackend:
+    if SEARCH_BACKEND == "local":
+        return local_search
+    return await get_es_manager()
+
+def search_with_failover(es: SearchBackend, query_text: str, filters: Optional[Dict[str, Any]], size: int, from_: int,
+                         facets: bool = False):
+    """Search, retrying on the local backend when Elasticsearch answers with an error"""
+    results = es.search(query_text=query_text, filters=filters, size=size, from_=from_, facets=facets)
+    if "error" in results and es is es_manager:
+        local = get_local_search()
+        if local is not None:
+            logger.warning(f"Elasticsearch search failed ({results['error']}) - retrying on the local search backend")
+            results = local.search(query_text=query_text, filters=filters, size=size, from_=from_, facets=facets)
+    return results
+
+def multi_search_with_failover(es: SearchBackend, searches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Multi-search, retrying the failed searches on the local backend when Elasticsearch errors"""
+    results = es.multi_search(searches)
+    if es is es_manager and any("error" in result for result in results):
+        local = get_local_search()
+        if local is not None:
+            logger.warning("Elasticsearch multi-search failed - retrying the failed searches on the local search backend")
+            results = [local.search(**params) if "error" in result else result
+                       for params, result in zip(searches, results)]
+    return results
+
+def get_cached_aggregations(es: SearchBackend, terms_size: int = 20) -> Dict[str, Any]:
+    """Facets over the whole index, recomputed only when the index generation changed"""
+    key = (es.name, terms_size)
+    entry = facet_cache.get(key)
+    now = time.monotonic()
+    if entry and now - entry["checked_at"] < FACET_GENERATION_CHECK_SECONDS:
+        return entry["aggregations"]
+    generation = es.index_generation()
+    if entry and generation is not None and entry["generation"] == generation:
+        entry["checked_at"] = now
+        return entry["aggregations"]
+    aggregations = es.get_aggregations(terms_size=terms_size)
+    if "error" not in aggregations:
+        facet_cache[key] = {"generation": generation, "checked_at": now, "aggregations": aggregations}
+    return aggregations
+
+def last_playing_snapshot() -> Optional[float]:
+    if not os.path.exists(TRENDING_HISTORY_FILE):
+        return None
+    history = PlayingHistory(TRENDING_HISTORY_FILE)
+    try:
+        return history.last_snapshot()
+    finally:
+        history.close()
+
+def build_trending(es: SearchBackend) -> Dict[str, Any]:
+    """
+    Up to TRENDING_MAX unique trending hits, ranked by decayed player growth from
+    the playing history, or by the current player count while there is none
+    """
+    hits = []
+    ranking = "playing"
+    snapshots = 0
+    if os.path.exists(TRENDING_HISTORY_FILE):
+        history = PlayingHistory(TRENDING_HISTORY_FILE)
+        try:
+            trend = compute_trending(history, time.time(), TRENDING_HALF_LIFE_HOURS)
+            snapshots = history.snapshot_count()
+        finally:
+            history.close()
+        # Extra candidates for games that left the index since their last snapshot
+        candidates = trend["ids"][:TRENDING_MAX * 2].tolist()
+        results = es.get_games_by_ids(candidates) if candidates else {"hits": {"hits": []}}
+        if "error" not in results:
+            rank = {game_id: position for position, game_id in enumerate(candidates)}
+            for hit in results["hits"]["hits"]:
+                position = rank[hit["_id"]]
+                hit["_score"] = round(float(trend["scores"][position]), 4)
+                hit["trend"] = {"playing": int(trend["playing"][position]),
+                                "growth": round(float(trend["growth"][position]), 4)}
+                hits.append(hit)
+            ranking = "playing_history"
+    if not hits:
+        results = es.get_trending_games(size=TRENDING_MAX)
+        if "error" in results:
+            return results
+        hits = results["hits"]["hits"]
+        ranking = "playing"
+
+    seen_ids = set()
+    unique_hits = []
+    for hit in hits:
+        game_id = hit["_source"].get("id")
+        if game_id and game_id not in seen_ids:
+            seen_ids.add(game_id)
+            unique_hits.append(hit)
+    return {
+        "hits": unique_hits[:TRENDING_MAX],
+        "info": {"ranking": ranking, "snapshots": snapshots, "half_life_hours": TRENDING_HALF_LIFE_HOURS,
+                 "computed_at": datetime.now().isoformat()},
+    }
+
+def get_trending(es: SearchBackend) -> Dict[str, Any]:
+    """Materialized trending list, rebuilt when the index, the playing history or its age requires it"""
+    entry = trending_cache.get(es.name)
+    now = time.monotonic()
+    if entry and now - entry["checked_at"] < FACET_GENERATION_CHECK_SECONDS:
+        return entry["trending"]
+    key = (es.index_generation(), last_playing_snapshot())
+    if entry and key[0] is not None and entry["key"] == key and now - entry["built_at"] < TRENDING_MAX_AGE_SECONDS:
+        entry["checked_at"] = now
+        return entry["trending"]
+    trending = build_trending(es)
+    if "error" not in trending:
+        trending_cache[es.name] = {"key": key, "checked_at": now, "built_at": now, "trending": trending}
+    return trending
+
+def get_suggestions(es: SearchBackend, prefix: str, limit: int) -> Dict[str, Any]:
+    """Suggestions for a normalized prefix, from the LRU cache while the index is unchanged"""
+    now = time.monotonic()
+    checked_at = suggest_cache_state["checked_at"]
+    if (suggest_cache_state["backend"] != es.name or checked_at is None
+            or now - checked_at >= FACET_GENERATION_CHECK_SECONDS):
+        generation = es.index_generation()
+        if (suggest_cache_state["backend"] != es.name or generation is None
+                or generation != suggest_cache_state["generation"]):
+            suggest_cache.clear()
+        suggest_cache_state.update(backend=es.name, generation=generation, checked_at=now)
+
+    key = (prefix, limit)
+    cached = suggest_cache.get(key)
+    if cached is not None:
+        suggest_cache.move_to_end(key)
+        return {**cached, "cached": True}
+    result = es.suggest(prefix, size=limit)
+    if "error" not in result:
+        suggest_cache[key] = result
+        if len(suggest_cache) > SUGGEST_CACHE_SIZE:
+            suggest_cache.popitem(last=False)
+    return {**result, "cached": False}
+
+def trending_response(trending: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    if "error" in trending:
+        return trending
+    hits = trending["hits"][:max(1, min(limit, TRENDING_MAX))]
+    return {"hits": {"total": {"value": len(hits)}, "hits": hits}, "trending": trending["info"]}
+
+def get_query_parser(es: SearchBackend) -> QueryParser:
+    """Return the shared query parser, refreshing its genre vocabulary when stale"""
+    if time.time() - query_parser.loaded_at > QUERY_VOCAB_TTL_SECONDS:
+        aggregations = get_cached_aggregations(es, terms_size=200)
+        if "error" not in aggregations:
+            query_parser.set_vocabulary(QueryParser.vocabulary_from_aggregations(aggregations))
+    return query_parser
+
+def submit_job(kind: str, func, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Queue an admin operation and return its id and status URL instead of waiting for it"""
+    try:
+        job = job_manager.submit(kind, func, params)
+    except JobLimitReached as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"status": "accepted", "job_id": job.id, "status_url": f"/api/admin/jobs/{job.id}"}
+
+def get_game_graph() -> Optional[GameGraph]:
+    """Return the recommendation graph, reloading it when the pipeline has written a new file"""
+    try:
+        mtime = os.path.getmtime(GAME_GRAPH_FILE)
+    except OSError:
+        return None
+    if game_graph_cache["mtime"] != mtime:
+        try:
+            game_graph_cache["graph"] = GameGraph.load(GAME_GRAPH_FILE)
+            game_graph_cache["mtime"] = mtime
+            logger.info(f"Loaded recommendation graph: {game_graph_cache['graph'].num_nodes} games, "
+                        f"{game_graph_cache['graph'].num_edges} edges")
+        except Exception as e:
+            logger.error(f"Failed to load recommendation graph from {GAME_GRAPH_FILE}: {e}")
+    return game_graph_cache["graph"]
+
+def merge_parsed_filters(parsed: Dict[str, Any], explicit: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine parser output with user-supplied filters; explicit values win, genres are unioned"""
+    merged = dict(parsed)
+    for field, value in (explicit or {}).items():
+        if field == "genres" and isinstance(value, list):
+            merged["genres"] = list(dict.fromkeys(merged.get("genres", []) + value))
+        elif value not in (None, "", []):
+            merged[field] = value
+    return merged
+
 # Serve static files
 # app.mount("/static", StaticFiles(directory="../frontend"), name="static")
 
+@app.on_event("startup")
+async def warm_local_search():
+    get_local_search()
+
 @app.get("/")
 async def get_index():
     return FileResponse("../frontend/index.html")
 
 @app.get("/health")
-async def health_check(es: ElasticsearchManager = Depends(get_es_manager)):
-    return {"status": "healthy", "elasticsearch": "connected"}
+async def health_check(es: SearchBackend = Depends(get_search_backend)):
+    return {"status": "healthy", "backend": es.name,
+            "elasticsearch": "connected" if es is es_manager else "unavailable"}
 
 @app.post("/api/search")
 async def search(
     request: SearchRequest,
-    es: ElasticsearchManager = Depends(get_es_manager)
+    es: SearchBackend = Depends(get_search_backend)
 ):
     # Calculate from_ for pagination
     from_ = (request.page - 1) * request.page_size
@@ -97,13 +422,18 @@ async def search(
     
     print(f"Requesting {search_size} documents from Elasticsearch to account for duplicates")
     
+    # Turn player counts, genres and popularity words into structured filters
+    query_text = request.query
+    filters = request.filters
+    parsed_query = None
+    if request.parse_query:
+        query_text, parsed_filters = get_query_parser(es).parse(request.query)
+        filters = merge_parsed_filters(parsed_filters, request.filters)
+        parsed_query = {"text": query_text, "filters": parsed_filters}
+        print(f"Parsed query: {parsed_query}")
+    
     # Perform search with larger size
-    search_results = es.search(
-        query_text=request.query,
-        filters=request.filters,
-        size=search_size,
-        from_=from_
-    )
+    search_results = search_with_failover(es, query_text, filters, search_size, from_, facets=request.facets)
     
     # Convert the Elasticsearch response to a dictionary
     search_dict = dict(search_results)
@@ -137,10 +467,27 @@ async def search(
         
         print(f"After deduplication: {len(unique_hits)} unique hits (showing {len(search_dict['hits']['hits'])}), {duplicate_count} duplicates found, original total preserved: {original_total}")
     
+    if parsed_query is not None:
+        search_dict["parsed_query"] = parsed_query
+    
+    if request.facets:
+        search_dict["facets"] = search_dict.pop("aggregations", None)
+    
+    # Optional local rerank of the page under a hard latency budget
+    if request.rerank and search_dict.get("hits", {}).get("hits", []):
+        reranked_hits, rerank_info = await run_in_threadpool(
+            reranker.rerank, request.query, search_dict["hits"]["hits"]
+        )
+        search_dict["hits"]["hits"] = reranked_hits
+        search_dict["rerank"] = rerank_info
+        print(f"Rerank: {rerank_info}")
+    
     # Check if we should enhance with LLM
     if request.use_llm and search_dict.get("hits", {}).get("hits", []):
         try:
-            llm_enhancements = llm_service.enhance_search(
+            # Run the blocking LLM call off the event loop so other searches keep flowing
+            llm_enhancements = await run_in_threadpool(
+                llm_service.enhance_search,
                 query=request.query,
                 search_results=search_dict["hits"]["hits"]
             )
@@ -164,10 +511,80 @@ async def search(
     print(f"Final response: {len(search_dict['hits']['hits'])} hits, total: {search_dict['hits']['total']['value']}")
     return search_dict
 
+def run_batch(es: SearchBackend, items: List[BatchItem]) -> Dict[str, Any]:
+    """Answer the sub-requests of one /api/batch call, keyed by id"""
+    searches = []
+    search_items = []
+    for item in items:
+        if item.type != "search":
+            continue
+        query_text, filters, parsed_query = item.query, item.filters, None
+        if item.parse_query:
+            query_text, parsed_filters = get_query_parser(es).parse(item.query)
+            filters = merge_parsed_filters(parsed_filters, item.filters)
+            parsed_query = {"text": query_text, "filters": parsed_filters}
+        # Over-fetch large pages for deduplication, like /api/search
+        size = min(item.page_size * 2, 200) if item.page_size >= 100 else item.page_size
+        searches.append({"query_text": query_text, "filters": filters, "size": size,
+                         "from_": (item.page - 1) * item.page_size, "facets": item.facets})
+        search_items.append((item, parsed_query))
+
+    results = {}
+    search_results = multi_search_with_failover(es, searches) if searches else []
+    for (item, parsed_query), search_dict in zip(search_items, search_results):
+        search_dict = dict(search_dict)
+        if "hits" in search_dict and "hits" in search_dict["hits"]:
+            seen_ids = set()
+            unique_hits = []
+            for hit in search_dict["hits"]["hits"]:
+                game_id = hit["_source"].get("id")
+                if game_id and game_id not in seen_ids:
+                    seen_ids.add(game_id)
+                    unique_hits.append(hit)
+            search_dict["hits"]["hits"] = unique_hits[:item.page_size]
+        if parsed_query is not None:
+            search_dict["parsed_query"] = parsed_query
+        if item.facets:
+            search_dict["facets"] = search_dict.pop("aggregations", None)
+        results[item.id] = search_dict
+
+    for item in items:
+        if item.type == "trending":
+            results[item.id] = trending_response(get_trending(es), item.limit)
+        elif item.type == "facets":
+            results[item.id] = get_cached_aggregations(es, terms_size=item.terms_size)
+    return {"results": {item.id: results[item.id] for item in items}}
+
+@app.post("/api/batch")
+async def batch(
+    request: BatchRequest,
+    es: SearchBackend = Depends(get_search_backend)
+):
+    """
+    Several search, trending and facet sub-requests in one call, answered by id
+
+    All searches go to the backend as one multi-search: one _msearch round-trip
+    with their query embeddings encoded in one batch. Trending and index-wide
+    facets are already materialized in memory and served from there.
+    """
+    items = request.requests
+    if not items:
+        raise HTTPException(status_code=400, detail="No sub-requests given")
+    if len(items) > MAX_BATCH_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_REQUESTS} sub-requests per batch")
+    ids = [item.id for item in items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Sub-request ids must be unique")
+    unknown = [item.id for item in items if item.type not in BATCH_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown type in sub-requests {unknown}; use one of {list(BATCH_TYPES)}")
+    return await run_in_threadpool(run_batch, es, items)
+
 @app.get("/api/aggregations")
-async def get_aggregations(es: ElasticsearchManager = Depends(get_es_manager)):
-    """Get aggregations for faceted search"""
-    return es.get_aggregations()
+async def get_aggregations(es: SearchBackend = Depends(get_search_backend)):
+    """Get aggregations for faceted search (cached until the index changes)"""
+    return get_cached_aggregations(es)
 
 @app.post("/api/enhance-description")
 async def enhance_description(game_data: GameData):
@@ -179,21 +596,22 @@ async def enhance_description(game_data: GameData):
         logger.error(f"Error enhancing description: {e}")
         raise HTTPException(status_code=500, detail=f"LLM service error: {str(e)}")
 
-@app.post("/api/initialize-data")
-async def initialize_data(es: ElasticsearchManager = Depends(get_es_manager)):
-    """Initialize the Elasticsearch index with Roblox data"""
-    try:
+@app.post("/api/initialize-data", status_code=202)
+async def initialize_data(es: SearchBackend = Depends(get_index_backend)):
+    """Initialize the Elasticsearch index with Roblox data (background job)"""
+    data_file = resolve_data_file("./data/roblox_data.json")
+
+    def run(job):
         es.create_index()
-        es.index_data("./data/roblox_data.json")
-        return {"status": "success", "message": "Data initialized successfully"}
-    except Exception as e:
-        logger.error(f"Error initializing data: {e}")
-        raise HTTPException(status_code=500, detail=f"Data initialization error: {str(e)}")
+        es.index_data(data_file, progress=job)
+        return {"message": "Data initialized successfully"}
+
+    return submit_job("initialize-data", run, {"data_file": data_file})
 
 @app.post("/api/admin/delete-index")
 async def delete_index(
     request: DeleteIndexRequest,
-    es: ElasticsearchManager = Depends(get_es_manager)
+    es: SearchBackend = Depends(get_index_backend)
 ):
     """Delete the Elasticsearch index (admin only)"""
     # Simple security check
@@ -206,12 +624,12 @@ async def delete_index(
     else:
         raise HTTPException(status_code=400, detail="Failed to delete index. Ensure confirm=True is set.")
 
-@app.post("/api/admin/recreate-index")
+@app.post("/api/admin/recreate-index", status_code=202)
 async def recreate_index(
     request: RecreateIndexRequest,
-    es: ElasticsearchManager = Depends(get_es_manager)
+    es: SearchBackend = Depends(get_index_backend)
 ):
-    """Delete and recreate the Elasticsearch index (admin only)"""
+    """Delete and recreate the Elasticsearch index (admin only, background job)"""
     # Simple security check
     if request.admin_key != ADMIN_KEY:
         raise HTTPException(status_code=403, detail="Unauthorized: Invalid admin key")
@@ -220,77 +638,126 @@ async def recreate_index(
     # Validate that data file exists
     if data_file and not os.path.exists(data_file):
         raise HTTPException(status_code=400, detail=f"Data file not found: {data_file}")
-        
-    success = es.recreate_index(data_file=data_file)
-    if success:
+
+    def run(job):
+        # Raises on failure, so the job reports the actual error
+        es.recreate_index(data_file=data_file, progress=job)
         return {
-            "status": "success", 
-            "message": f"Index {es.index_name} recreated" + 
-                      (f" and data loaded from {data_file}" if data_file else "")
+            "message": f"Index {es.index_name} recreated" +
+                       (f" and data loaded from {data_file}" if data_file else "")
         }
-    else:
-        raise HTTPException(status_code=500, detail="Failed to recreate index.")
+
+    return submit_job("recreate-index", run, {"data_file": data_file})
 
 @app.post("/api/trending")
 async def get_trending_games(
     request: TrendingRequest = TrendingRequest(),
-    es: ElasticsearchManager = Depends(get_es_manager)
+    es: SearchBackend = Depends(get_search_backend)
 ):
-    """Get the top trending games based on current player count"""
-    # Ensure limit is within reasonable bounds
-    limit = max(1, min(request.limit, 50))  # Between 1 and 50
-    
-    # Get trending games
-    trending_results = es.get_trending_games(size=limit)
-    
-    # Process results to ensure unique entries and clean format
-    trending_dict = dict(trending_results)
-    if "hits" in trending_dict and "hits" in trending_dict["hits"]:
-        seen_ids = set()
-        unique_hits = []
-        
-        for hit in trending_dict["hits"]["hits"]:
-            game_id = hit["_source"].get("id")
-            if game_id and game_id not in seen_ids:
-                seen_ids.add(game_id)
-                unique_hits.append(hit)
-        
-        # Update hits with deduplicated results
-        trending_dict["hits"]["hits"] = unique_hits
-        trending_dict["hits"]["total"]["value"] = len(unique_hits)
-    
-    return trending_dict
+    """
+    Get the top trending games: decayed growth of the player count over the
+    recorded scrapes, or the current player count before there is a history
+    """
+    trending = await run_in_threadpool(get_trending, es)
+    return trending_response(trending, request.limit)
+
+@app.get("/api/suggest")
+async def suggest(
+    q: str = Query("", max_length=SUGGEST_MAX_PREFIX_LENGTH),
+    limit: int = Query(8, ge=1, le=20),
+    es: SearchBackend = Depends(get_search_backend)
+):
+    """
+    Typeahead suggestions for what the user typed so far
+
+    Game names with a word starting with every typed word, most played first.
+    Unlike /api/search there is no fuzziness, embedding or highlighting, and
+    hot prefixes are answered from memory, so it is cheap enough per keystroke.
+    """
+    start = time.perf_counter()
+    prefix = " ".join(q.lower().split())
+    if not prefix:
+        return {"query": q, "suggestions": [], "cached": False, "took_ms": 0.0}
+    result = get_suggestions(es, prefix, limit)
+    result.update(query=q, took_ms=round((time.perf_counter() - start) * 1000, 2))
+    return result
+
+def fetch_indexed_neighbors(es: SearchBackend, related_ids: List[str], limit: int) -> Dict[str, Any]:
+    """
+    The first `limit` indexed games among related_ids, in graph order
+
+    Not every recommended game was collected, so neighbours are looked up a
+    few times the limit at a time until enough of them are found.
+    """
+    hits = []
+    chunk = limit * RELATED_OVERFETCH
+    for start in range(0, len(related_ids), chunk):
+        results = es.get_games_by_ids(related_ids[start:start + chunk])
+        if "error" in results:
+            return results
+        hits.extend(results["hits"]["hits"])
+        if len(hits) >= limit:
+            break
+    return {"hits": {"total": {"value": len(hits)}, "hits": hits[:limit]}}
+
+@app.get("/api/games/{game_id}/related")
+async def get_related_games(
+    game_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    fallback: bool = True,
+    es: SearchBackend = Depends(get_search_backend)
+):
+    """
+    Games Roblox recommends alongside this one, read from the crawled recommendation graph.
+    Games without edges fall back to embedding nearest neighbours unless fallback=false.
+    """
+    graph = get_game_graph()
+    related_ids = graph.neighbors(game_id) if graph else []
+    source = "graph"
+    results = {"hits": {"total": {"value": 0}, "hits": []}}
+    if related_ids:
+        results = await run_in_threadpool(fetch_indexed_neighbors, es, related_ids, limit)
+    if "error" not in results and not results["hits"]["hits"]:
+        source = "embedding" if fallback else "none"
+        if fallback:
+            results = await run_in_threadpool(es.get_similar_games, game_id, limit)
+
+    if "error" in results:
+        raise HTTPException(status_code=500, detail=f"Related games error: {results['error']}")
+
+    hits = results["hits"]["hits"][:limit]
+    return {
+        "game_id": game_id,
+        "source": source,
+        "hits": {"total": {"value": len(hits)}, "hits": hits}
+    }
 
-@app.post("/api/admin/remove-duplicates")
+@app.post("/api/admin/remove-duplicates", status_code=202)
 async def remove_duplicates(
     admin_key: str,
-    es: ElasticsearchManager = Depends(get_es_manager)
+    es: SearchBackend = Depends(get_index_backend)
 ):
-    """Remove duplicate games from the index (admin only)"""
+    """Remove duplicate games from the index (admin only, background job)"""
     if admin_key != ADMIN_KEY:
         raise HTTPException(status_code=403, detail="Unauthorized: Invalid admin key")
-    
-    # Get stats before cleanup
-    stats_before = es.get_index_stats()
-    
-    success = es.remove_duplicates()
-    if success:
-        # Get stats after cleanup
-        stats_after = es.get_index_stats()
-        
+
+    def run(job):
+        # Get stats before cleanup
+        stats_before = es.get_index_stats()
+        if not es.remove_duplicates(progress=job):
+            raise RuntimeError("Failed to remove duplicates")
         return {
-            "status": "success",
             "message": "Duplicates removed successfully",
             "before": stats_before,
-            "after": stats_after
+            "after": es.get_index_stats()
         }
-    else:
-        raise HTTPException(status_code=500, detail="Failed to remove duplicates")
+
+    return submit_job("remove-duplicates", run)
 
 @app.get("/api/admin/index-stats")
 async def get_index_stats(
     admin_key: str,
-    es: ElasticsearchManager = Depends(get_es_manager)
+    es: SearchBackend = Depends(get_index_backend)
 ):
     """Get index statistics (admin only)"""
     if admin_key != ADMIN_KEY:
@@ -302,12 +769,48 @@ async def get_index_stats(
     else:
         raise HTTPException(status_code=500, detail="Failed to get index statistics")
 
-@app.post("/api/admin/clean-reindex")
+@app.get("/api/admin/pipeline/latest")
+async def get_latest_pipeline_run(admin_key: str):
+    """Report of the latest pipeline run: per-stage status, duration, items and throughput (admin only)"""
+    if admin_key != ADMIN_KEY:
+        raise HTTPException(status_code=403, detail="Unauthorized: Invalid admin key")
+
+    try:
+        with open(PIPELINE_REPORT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No pipeline run recorded yet")
+
+@app.get("/api/admin/pipeline/runs")
+async def get_pipeline_runs(
+    admin_key: str,
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Summaries of the most recent pipeline runs, newest first (admin only)"""
+    if admin_key != ADMIN_KEY:
+        raise HTTPException(status_code=403, detail="Unauthorized: Invalid admin key")
+
+    try:
+        with open(PIPELINE_HISTORY_FILE, "r", encoding="utf-8") as f:
+            runs = deque((line for line in f if line.strip()), maxlen=limit)
+    except FileNotFoundError:
+        return {"runs": []}
+
+    summaries = []
+    for line in reversed(runs):
+        run = json.loads(line)
+        run["stages"] = [{key: stage.get(key) for key in ("name", "status", "duration_seconds", "items",
+                                                          "items_per_second", "reason")}
+                         for stage in run.get("stages", [])]
+        summaries.append(run)
+    return {"runs": summaries}
+
+@app.post("/api/admin/clean-reindex", status_code=202)
 async def clean_reindex(
     request: RecreateIndexRequest,
-    es: ElasticsearchManager = Depends(get_es_manager)
+    es: SearchBackend = Depends(get_index_backend)
 ):
-    """Delete index, recreate, and reindex with clean data (admin only)"""
+    """Delete index, recreate, and reindex with clean data (admin only, background job)"""
     # Simple security check
     if request.admin_key != ADMIN_KEY:
         raise HTTPException(status_code=403, detail="Unauthorized: Invalid admin key")
@@ -316,33 +819,60 @@ async def clean_reindex(
     # Validate that data file exists
     if data_file and not os.path.exists(data_file):
         raise HTTPException(status_code=400, detail=f"Data file not found: {data_file}")
-        
-    try:
+
+    def run(job):
         # Get stats before cleanup
         old_stats = None
-        if es.es.indices.exists(index=es.index_name):
+        if es.index_exists():
             old_stats = es.get_index_stats()
-        
-        # Delete and recreate index
-        success = es.recreate_index(data_file=data_file)
-        
-        if success:
-            # Get new stats
-            new_stats = es.get_index_stats()
-            
-            return {
-                "status": "success", 
-                "message": f"Index {es.index_name} cleaned and reindexed",
-                "old_stats": old_stats,
-                "new_stats": new_stats,
-                "data_file": data_file
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to clean and reindex.")
-            
-    except Exception as e:
-        logger.error(f"Error during clean reindex: {e}")
-        raise HTTPException(status_code=500, detail=f"Clean reindex failed: {str(e)}")
+
+        # Delete and recreate index (raises on failure, so the job reports the actual error)
+        es.recreate_index(data_file=data_file, progress=job)
+
+        return {
+            "message": f"Index {es.index_name} cleaned and reindexed",
+            "old_stats": old_stats,
+            "new_stats": es.get_index_stats(),
+            "data_file": data_file
+        }
+
+    return submit_job("clean-reindex", run, {"data_file": data_file})
+
+@app.get("/api/admin/jobs")
+async def list_jobs(admin_key: str):
+    """Recent background jobs, newest first (admin only)"""
+    if admin_key != ADMIN_KEY:
+        raise HTTPException(status_code=403, detail="Unauthorized: Invalid admin key")
+    return {"jobs": job_manager.list()}
+
+@app.get("/api/admin/jobs/{job_id}")
+async def get_job(job_id: str, admin_key: str):
+    """Status, progress (documents embedded/indexed, rate, ETA) and result of a background job (admin only)"""
+    if admin_key != ADMIN_KEY:
+        raise HTTPException(status_code=403, detail="Unauthorized: Invalid admin key")
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+@app.post("/api/admin/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, admin_key: str):
+    """
+    Cancel a queued or running job; a running reindex stops after the game it is embedding (admin only)
+
+    Cancelling a running Elasticsearch reindex is not safe: the index was
+    already emptied and keeps only the documents loaded so far until the
+    next successful recreate-index.
+    """
+    if admin_key != ADMIN_KEY:
+        raise HTTPException(status_code=403, detail="Unauthorized: Invalid admin key")
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    status = job.to_dict()
+    if job.started_at and job.kind in INDEX_LOADING_JOBS and SEARCH_BACKEND != "local":
+        status["warning"] = "The index keeps only the documents loaded so far - run recreate-index again"
+    return status
 
 @app.get("/api/debug/sample-genres")
 async def debug_sample_genres(
@@ -387,7 +917,7 @@ async def search_games(
     min_playing_now: str = Query("", description="Minimum current players"),
     min_supported_players: str = Query("", description="Minimum supported players"),
     max_supported_players: str = Query("", description="Maximum supported players"),
-    es: ElasticsearchManager = Depends(get_es_manager)
+    es: SearchBackend = Depends(get_search_backend)
 ):
     """Search for Roblox games with optional filters"""
     
@@ -422,7 +952,7 @@ async def search_games(
         logger.info(f"  Final filters: {filters}")
         
         # Perform search
-        search_results = es.search(q, filters=filters, size=size, from_=from_)
+        search_results = search_with_failover(es, q, filters, size, from_)
         
         # Debug the search results
         logger.info(f"Search results type: {type(search_results)}")
@@ -448,6 +978,6 @@ if __name__ == "__main__":
         
         # Check if data file exists
         if os.path.exists("./data/roblox_data.json"):
-            es_manager.index_data("./data/roblox_data.json")
+            es_manager.index_data(resolve_data_file("./data/roblox_data.json"))
             
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,67 +1,139 @@
+import argparse
 import json
 import os
+import sys
+import time
 
-def merge_roblox_data():
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from game_columns import columnar_path, write_columns
+from game_data import iter_games
+from game_store import ADDED, UNCHANGED, UPDATED, GameStore
+from trending import HISTORY_FILE, PlayingHistory
+
+# Scraper output, newest format first (NDJSON stream, optionally zstd-compressed)
+NEW_DATA_FILES = ["roblox_games_gg.ndjson", "roblox_games_gg.ndjson.zst", "roblox_games_gg.json"]
+STORE_FILE = "roblox_games.sqlite"
+MERGED_FILE = "roblox_data.json"
+# Ids added or updated by the last merge, one per line, for incremental indexing
+CHANGED_IDS_FILE = "roblox_changed_ids.txt"
+
+
+def find_new_data_file(data_dir):
+    for name in NEW_DATA_FILES:
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            return path
+    return os.path.join(data_dir, NEW_DATA_FILES[0])
+
+
+def write_changed_ids(store, path):
+    tmp_path = path + ".tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for game_id in store.changed_ids():
+            f.write(game_id + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def export_outputs(store, merged_file):
+    """Rewrite roblox_data.json and its columnar copy from the store"""
+    store.export_json(merged_file)
+    write_columns(store.iter_games(), columnar_path(merged_file))
+
+
+def merge_roblox_data(data_dir=None, new_file=None, export=True):
+    """
+    Merge the scraper output into the game store and export roblox_data.json
+
+    Parameters:
+    - data_dir: directory holding the store and data files (defaults to <repo>/data)
+    - new_file: scraper output to merge (defaults to the newest format found in data_dir)
+    - export: rewrite roblox_data.json and its columnar copy from the store when something changed
+
+    Returns:
+    - dict with the added / updated / unchanged / skipped counts and the number of player
+      counts recorded in the playing history ("snapshot"), or {"error": ...}
+    """
+    store = None
+    history = None
     try:
-        # Define file paths
-        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_dir = os.path.join(base_path, "data")
-        existing_file = os.path.join(data_dir, "roblox_data.json")
-        new_file = os.path.join(data_dir, "roblox_games_gg.json")
-        # Create data directory if it doesn't exist
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
-        
-        # Load existing data
-        existing_data = []
-        if os.path.exists(existing_file):
-            with open(existing_file, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-            print(f"Loaded {len(existing_data)} existing games")
-        
-        # Load new data
-        with open(new_file, 'r', encoding='utf-8') as f:
-            new_data = json.load(f)
-        print(f"Loaded {len(new_data)} new games")
-        
-        # Create dictionary from existing data for fast lookup
-        existing_dict = {}
-        for game in existing_data:
-            # Some entries only have favoritedCount, use id or favoritedCount as identifier
-            game_id = str(game.get('id', f"fav_{game.get('favoritedCount', '')}"))
-            existing_dict[game_id] = game
-        
-        # Merge/update with new data
-        updated_count = 0
-        added_count = 0
-        
-        for game in new_data:
-            game_id = str(game.get('id', ''))
-            if not game_id:
-                continue
-                
-            if game_id in existing_dict:
-                # Update existing entry
-                existing_dict[game_id].update(game)
-                updated_count += 1
-            else:
-                # Add new entry
-                existing_dict[game_id] = game
-                added_count += 1
-        
-        # Convert back to list
-        merged_data = list(existing_dict.values())
-        
-        # Save merged data
-        with open(existing_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"Merge completed: {updated_count} games updated, {added_count} games added")
-        print(f"Total games in merged file: {len(merged_data)}")
-        exit_code = 0
-    except:
-        exit_code = 1
+        if data_dir is None:
+            base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            data_dir = os.path.join(base_path, "data")
+        os.makedirs(data_dir, exist_ok=True)
+        merged_file = os.path.join(data_dir, MERGED_FILE)
+        new_file = new_file or find_new_data_file(data_dir)
+        if not os.path.exists(new_file):
+            return {"error": f"New data file not found: {new_file}"}
+
+        start_time = time.monotonic()
+        store = GameStore(os.path.join(data_dir, STORE_FILE))
+        if not store.count() and os.path.exists(merged_file):
+            # First run with the store: seed it from the previously merged JSON file
+            imported = store.import_games(iter_games(merged_file), legacy_ids=True)
+            print(f"Imported {imported} existing games from {merged_file} into the store")
+
+        # Player counts of this scrape for the trending score, recorded from the same batches
+        # as the merge (one pass over the file); the file time keeps re-merges idempotent
+        taken_at = os.path.getmtime(new_file)
+        history = PlayingHistory(os.path.join(data_dir, HISTORY_FILE))
+        snapshot = 0
+
+        def record_snapshot(batch):
+            nonlocal snapshot
+            snapshot += history.record(batch, taken_at)
+
+        print(f"Reading new games from {new_file}")
+        counts = store.merge(iter_games(new_file), on_batch=record_snapshot)
+        counts["snapshot"] = snapshot
+        history.prune(taken_at)
+        changed = write_changed_ids(store, os.path.join(data_dir, CHANGED_IDS_FILE))
+
+        counts["total"] = store.count()
+        counts["exported"] = False
+        outputs_missing = not os.path.exists(merged_file) or not os.path.exists(columnar_path(merged_file))
+        if export and (changed or outputs_missing):
+            export_outputs(store, merged_file)
+            counts["exported"] = True
+
+        print(f"Merge completed: {counts[ADDED]} games added, {counts[UPDATED]} updated, "
+              f"{counts[UNCHANGED]} unchanged, {counts['skipped']} skipped without id")
+        print(f"Total games in store: {counts['total']}; {changed} changed ids written to {CHANGED_IDS_FILE}")
+        if counts["exported"]:
+            print(f"Exported merged data to {merged_file} and {columnar_path(merged_file)}")
+        else:
+            print(f"No changes - {merged_file} left as is")
+        print(f"Merge took {time.monotonic() - start_time:.2f} seconds")
+        return counts
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        if store:
+            store.close()
+        if history:
+            history.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge scraped games into the game store and roblox_data.json")
+    parser.add_argument("--data-dir", help="Data directory (default: <repo>/data)")
+    parser.add_argument("--new-file", help="Scraper output to merge (default: newest in the data directory)")
+    parser.add_argument("--no-export", action="store_true", help="Only update the store, skip roblox_data.json")
+    parser.add_argument("--stats-json", help="Write the merge counts (JSON) to this file")
+    args = parser.parse_args()
+
+    result = merge_roblox_data(args.data_dir, args.new_file, export=not args.no_export)
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump(result, f, indent=2)
+    if "error" in result:
+        print(f"Error merging games: {result['error']}")
+        return 1
+    return 0
+
 
 if __name__ == "__main__":
-    exit_code = merge_roblox_data()
-    exit(exit_code)
\ No newline at end of file
+    exit_code = main()
+    exit(exit_code)
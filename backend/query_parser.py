@@ -0,0 +1,179 @@
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Genre vocabulary fields as returned by ElasticsearchManager.get_aggregations
+GENRE_FIELDS = ["genre", "genre_l1", "genre_l2"]
+
+# Minimum concurrent players implied by words like "popular" or "trending"
+POPULAR_MIN_PLAYING = 100
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+# Words that appear inside genre names but say nothing on their own ("Vehicle Sim", "Utility & Other")
+GENERIC_GENRE_WORDS = {"all", "and", "sim", "simulator", "game", "games", "other", "the", "avatar"}
+
+_NUM = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+
+# Order matters: more specific patterns run first and consume their span
+PLAYER_PATTERNS = [
+    # "50+ playing", "with 50+ people online"
+    ("min_playing_now", re.compile(r"\b(?:with\s+)?" + _NUM + r"\s*\+\s*(?:people\s+|players\s+)?(?:playing|online|active)\b")),
+    # "at least 100 playing", "more than 20 people online"
+    ("min_playing_now", re.compile(r"\b(?:with\s+)?(?:at\s+least|over|more\s+than)\s+" + _NUM + r"\s+(?:people\s+|players\s+)?(?:playing|online|active)\b")),
+    # "with 200 playing"
+    ("min_playing_now", re.compile(r"\b(?:with\s+)?" + _NUM + r"\s+(?:people\s+)?(?:playing|online)\b")),
+    # "up to 6 players", "max 4 players"
+    ("max_supported_players", re.compile(r"\b(?:up\s+to|max(?:imum)?|at\s+most)\s+" + _NUM + r"\s*-?\s*players?\b")),
+    # "2-4 players": the server has to hold the whole group
+    ("player_range", re.compile(r"\b(?:for\s+)?" + _NUM + r"\s*(?:-|to)\s*" + _NUM + r"\s*-?\s*players?\b")),
+    # "10+ players", "at least 10 players"
+    ("min_supported_players", re.compile(r"\b(?:for\s+)?(?:at\s+least\s+)?" + _NUM + r"\s*\+?\s*-?\s*players?\b")),
+]
+
+POPULARITY_PATTERN = re.compile(r"\b(?:most\s+played|most\s+popular|popular|trending|hot|busy)\b")
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _to_int(token: str) -> int:
+    return NUMBER_WORDS.get(token) or int(token)
+
+
+def _normalize(text: str) -> Tuple[str, ...]:
+    return tuple(WORD_PATTERN.findall(text.lower()))
+
+
+class QueryParser:
+    """
+    Rule-based query understanding that turns free text such as "4 player horror"
+    or "tycoon with 50+ playing" into the structured filters ElasticsearchManager.search
+    already knows how to apply, without a round-trip to the LLM.
+    """
+
+    def __init__(self, vocabulary: Optional[Dict[str, Dict[str, int]]] = None):
+        self.loaded_at = 0.0
+        self.set_vocabulary(vocabulary or {})
+
+    @staticmethod
+    def vocabulary_from_aggregations(aggregations: Dict) -> Dict[str, Dict[str, int]]:
+        """Pull {field: {value: doc_count}} out of a get_aggregations() response"""
+        vocabulary = {}
+        for field in GENRE_FIELDS:
+            buckets = (aggregations.get(field) or {}).get("buckets", [])
+            vocabulary[field] = {b["key"]: b.get("doc_count", 0) for b in buckets if b.get("key")}
+        return vocabulary
+
+    def set_vocabulary(self, vocabulary: Dict[str, Dict[str, int]]):
+        """
+        Build the phrase lookup tables from the genre vocabularies
+
+        Parameters:
+        - vocabulary: {field: {genre value: doc_count}} for genre, genre_l1 and genre_l2
+        """
+        phrases = {}  # normalized full genre name -> (value, doc_count)
+        aliases = {}  # single distinctive word -> (value, doc_count)
+
+        for field in GENRE_FIELDS:
+            for value, count in (vocabulary.get(field) or {}).items():
+                words = _normalize(value)
+                if not words or words == ("all",):
+                    continue
+                if words not in phrases or phrases[words][1] < count:
+                    phrases[words] = (value, count)
+                for word in words:
+                    if len(word) < 3 or word in GENERIC_GENRE_WORDS:
+                        continue
+                    # The most common genre wins an ambiguous word ("obby" -> "Obby & Platformer")
+                    if (word,) not in aliases or aliases[(word,)][1] < count:
+                        aliases[(word,)] = (value, count)
+
+        self.phrases = phrases
+        self.aliases = aliases
+        self.max_phrase_len = max((len(p) for p in phrases), default=1)
+        # An empty vocabulary (none given, or the index has no genres yet) is not a load: retry on next use
+        self.loaded_at = time.time() if phrases else 0.0
+
+    def _match_genre(self, words: Tuple[str, ...]) -> Optional[str]:
+        if words in self.phrases:
+            return self.phrases[words][0]
+        if len(words) == 1:
+            word = words[0]
+            candidates = [(word,)]
+            if word.endswith("s") and len(word) > 3:
+                candidates.append((word[:-1],))  # "tycoons" -> "tycoon"
+            for candidate in candidates:
+                if candidate in self.phrases:
+                    return self.phrases[candidate][0]
+                if candidate in self.aliases:
+                    return self.aliases[candidate][0]
+        return None
+
+    def parse(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Extract structured filters from a free-text query
+
+        Parameters:
+        - query: Raw search text
+
+        Returns:
+        - (remaining free text, filters dict using the keys understood by search())
+        """
+        filters: Dict[str, Any] = {}
+        if not query or not query.strip():
+            return query, filters
+
+        text = query.lower()
+
+        for key, pattern in PLAYER_PATTERNS:
+            match = pattern.search(text)
+            if not match:
+                continue
+            if key == "player_range":
+                high = max(_to_int(match.group(1)), _to_int(match.group(2)))
+                filters.setdefault("min_supported_players", high)
+            else:
+                filters.setdefault(key, _to_int(match.group(1)))
+            text = text[:match.start()] + " " + text[match.end():]
+
+        match = POPULARITY_PATTERN.search(text)
+        if match:
+            filters.setdefault("min_playing_now", POPULAR_MIN_PLAYING)
+            text = text[:match.start()] + " " + text[match.end():]
+
+        # Longest genre phrase first, so "tower defense" beats "tower"
+        words = list(WORD_PATTERN.findall(text))
+        genres: List[str] = []
+        remaining: List[str] = []
+        i = 0
+        while i < len(words):
+            for length in range(min(self.max_phrase_len, len(words) - i), 0, -1):
+                genre = self._match_genre(tuple(words[i:i + length]))
+                if genre:
+                    # search() ANDs every genre filter, so only the first genre becomes a filter;
+                    # later genre words stay in the free text and still contribute to scoring
+                    if not genres:
+                        genres.append(genre)
+                    elif genre not in genres:
+                        remaining.extend(words[i:i + length])
+                    i += length
+                    break
+            else:
+                remaining.append(words[i])
+                i += 1
+
+        if genres:
+            filters["genres"] = genres
+        if not filters:
+            return query, filters
+
+        # Drop connective words left dangling once the structured parts are gone
+        leftovers = [w for w in remaining if w not in {"with", "for", "and", "game", "games", "a", "an", "the"}]
+        return " ".join(leftovers), filters
@@ -0,0 +1,171 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CROSS_ENCODER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class Reranker:
+    """
+    Local second-stage reranker for the top hits of ElasticsearchManager.search.
+
+    Two scorers are supported:
+    - "cross-encoder": a small CPU cross-encoder scoring (query, game text) pairs
+    - "bi-encoder": cosine between the query embedding and the game_embedding
+      already stored with every hit, so no extra model is needed; hits from the
+      local backend (which leaves the vector out of _source) are looked up in
+      its embedding matrix by _id
+
+    Every call runs under a hard time budget; when the budget is blown the
+    original Elasticsearch order is returned untouched.
+    """
+
+    def __init__(self, es_manager=None, mode=None, model_name=None, budget_ms=None, top_n=None, weight=None,
+                 local_search=None):
+        self.es_manager = es_manager
+        self.local_search = local_search
+        self.mode = mode or os.environ.get("RERANK_MODE", "bi-encoder")
+        self.model_name = model_name or os.environ.get("RERANK_MODEL", DEFAULT_CROSS_ENCODER)
+        self.budget_ms = float(budget_ms if budget_ms is not None else os.environ.get("RERANK_BUDGET_MS", "50"))
+        self.top_n = int(top_n if top_n is not None else os.environ.get("RERANK_TOP_N", "50"))
+        # Share of the final score taken by the reranker; the rest keeps the ES score (text + popularity)
+        self.weight = float(weight if weight is not None else os.environ.get("RERANK_WEIGHT", "0.7"))
+        self.batch_size = 16
+        self.cross_encoder = None
+
+        if self.mode == "cross-encoder":
+            try:
+                from sentence_transformers import CrossEncoder
+                self.cross_encoder = CrossEncoder(self.model_name, max_length=256, device="cpu")
+                logger.info(f"Loaded cross-encoder for reranking: {self.model_name}")
+            except Exception as e:
+                logger.error(f"Failed to load cross-encoder '{self.model_name}', falling back to bi-encoder: {e}")
+                self.mode = "bi-encoder"
+
+    @property
+    def available(self):
+        if self.mode == "cross-encoder":
+            return self.cross_encoder is not None
+        return self.es_manager is not None and self.es_manager.st_model is not None
+
+    @staticmethod
+    def _game_text(source: Dict) -> str:
+        genres = " ".join(g for g in (source.get("genre"), source.get("genre_l1"), source.get("genre_l2")) if g)
+        return f"{source.get('name', '')}. {genres}. {(source.get('description') or '')[:300]}"
+
+    def _cross_encoder_scores(self, query: str, hits: List[Dict], deadline: float) -> Optional[np.ndarray]:
+        pairs = [(query, self._game_text(hit["_source"])) for hit in hits]
+        scores = []
+        for start in range(0, len(pairs), self.batch_size):
+            batch_start = time.perf_counter()
+            scores.extend(self.cross_encoder.predict(pairs[start:start + self.batch_size], show_progress_bar=False))
+            now = time.perf_counter()
+            remaining_batches = max(0, -(-(len(pairs) - start - self.batch_size) // self.batch_size))
+            # Give up as soon as the next batches cannot fit in what is left of the budget
+            if now > deadline or (remaining_batches > 0 and now + remaining_batches * (now - batch_start) > deadline):
+                return None
+        return np.asarray(scores, dtype=np.float32)
+
+    def _local_embedding(self, game_id: str, dims: int) -> Optional[np.ndarray]:
+        """Vector of a game in the local backend's embedding matrix, if it has one"""
+        index = self.local_search.index if self.local_search is not None else None
+        if index is None or index.embeddings is None or index.embeddings.shape[1] != dims:
+            return None
+        doc = index.positions.get(str(game_id))
+        if doc is None or not index.has_embedding[doc]:
+            return None
+        return index.embeddings[doc]
+
+    def _bi_encoder_scores(self, query: str, hits: List[Dict], deadline: float, info: Dict) -> Optional[np.ndarray]:
+        query_vector = np.asarray(self.es_manager.encode_query(query), dtype=np.float32)
+        if time.perf_counter() > deadline:
+            return None
+        dims = query_vector.shape[0]
+        matrix = np.zeros((len(hits), dims), dtype=np.float32)
+        found = 0
+        for i, hit in enumerate(hits):
+            embedding = hit["_source"].get("game_embedding")
+            if embedding and len(embedding) == dims:
+                matrix[i] = embedding
+                found += 1
+                continue
+            embedding = self._local_embedding(hit.get("_id", hit["_source"].get("id")), dims)
+            if embedding is not None:
+                matrix[i] = embedding
+                found += 1
+        if not found:
+            # All-zero scores would only keep the ES order while claiming to have reranked
+            info["reason"] = "no game embeddings"
+            return None
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+        norms[norms == 0] = 1.0
+        return matrix @ query_vector / norms
+
+    @staticmethod
+    def _min_max(values: np.ndarray) -> np.ndarray:
+        spread = values.max() - values.min()
+        if spread <= 0:
+            return np.zeros_like(values)
+        return (values - values.min()) / spread
+
+    def rerank(self, query: str, hits: List[Dict], budget_ms: Optional[float] = None) -> Tuple[List[Dict], Dict]:
+        """
+        Rescore the top N hits and return them in the new order
+
+        Parameters:
+        - query: Search text the hits were retrieved for
+        - hits: Elasticsearch hits (with _source and _score), best first
+        - budget_ms: Override of the per-request time budget
+
+        Returns:
+        - (reordered hits, info dict describing what happened)
+        """
+        start = time.perf_counter()
+        budget = self.budget_ms if budget_ms is None else budget_ms
+        info = {"applied": False, "mode": self.mode, "budget_ms": budget, "candidates": 0}
+
+        if not query or not query.strip() or len(hits) < 2:
+            info["reason"] = "nothing to rerank"
+            return hits, info
+        if not self.available:
+            info["reason"] = "reranker unavailable"
+            return hits, info
+
+        head, tail = hits[:self.top_n], hits[self.top_n:]
+        info["candidates"] = len(head)
+        deadline = start + budget / 1000.0
+
+        try:
+            if self.mode == "cross-encoder":
+                model_scores = self._cross_encoder_scores(query, head, deadline)
+            else:
+                model_scores = self._bi_encoder_scores(query, head, deadline, info)
+        except Exception as e:
+            logger.error(f"Reranking failed: {e}")
+            model_scores = None
+            info["reason"] = "error"
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        info["elapsed_ms"] = round(elapsed_ms, 2)
+        if model_scores is None or elapsed_ms > budget:
+            info.setdefault("reason", "budget exceeded")
+            return hits, info
+
+        es_scores = np.asarray([hit.get("_score") or 0.0 for hit in head], dtype=np.float32)
+        combined = self.weight * self._min_max(model_scores) + (1 - self.weight) * self._min_max(es_scores)
+        order = np.argsort(-combined, kind="stable")
+
+        reranked = []
+        for i in order:
+            hit = head[i]
+            hit["_rerank_score"] = float(combined[i])
+            reranked.append(hit)
+
+        info["applied"] = True
+        return reranked + tail, info
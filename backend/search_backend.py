@@ -0,0 +1,91 @@
+from abc import ABC, abstractmethod
+
+# Game fields returned by suggest(): enough to render a typeahead row
+SUGGEST_FIELDS = ["id", "name", "playing", "genre", "imageUrl"]
+
+
+class SearchBackend(ABC):
+    """
+    What the API needs from a search engine
+
+    ElasticsearchManager implements it against the cluster, LocalSearchBackend
+    (local_search.py) in process with NumPy. SEARCH_BACKEND in main.py picks
+    the one that serves requests; with Elasticsearch selected the local one is
+    still used as fallback while the cluster is unreachable. Every method but
+    multi_search is abstract, so a backend missing one fails when created.
+
+    Responses use the Elasticsearch shape ({"hits": {"total": {"value": n},
+    "hits": [...]}}); query errors are returned as {"error": message}.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def check_connection(self):
+        """True when the backend can serve queries"""
+
+    # Queries
+
+    @abstractmethod
+    def search(self, query_text, filters=None, size=10, from_=0, facets=False, facet_terms_size=20):
+        """facets=True adds "aggregations" (get_aggregations shape) counted over this query"""
+
+    def multi_search(self, searches):
+        """Several searches (dicts of search() keyword arguments) -> their results in the same order"""
+        return [self.search(**params) for params in searches]
+
+    @abstractmethod
+    def get_aggregations(self, terms_size=20):
+        ...
+
+    @abstractmethod
+    def get_trending_games(self, size=10):
+        ...
+
+    @abstractmethod
+    def suggest(self, prefix, size=8):
+        """{"suggestions": [SUGGEST_FIELDS of each game]}, names matching prefix word by word, most played first"""
+
+    @abstractmethod
+    def get_games_by_ids(self, game_ids):
+        ...
+
+    @abstractmethod
+    def get_similar_games(self, game_id, size=10):
+        ...
+
+    # Indexing (progress: optional jobs.Job)
+
+    @abstractmethod
+    def index_exists(self):
+        ...
+
+    @abstractmethod
+    def index_generation(self):
+        """Token that changes whenever the indexed documents change (None if unknown)"""
+
+    @abstractmethod
+    def create_index(self):
+        ...
+
+    @abstractmethod
+    def delete_index(self, confirm=False):
+        ...
+
+    @abstractmethod
+    def index_data(self, data_file, progress=None):
+        ...
+
+    @abstractmethod
+    def recreate_index(self, data_file=None, progress=None):
+        """Drop and rebuild the index, optionally loading data_file; returns True, raises on failure"""
+
+    @abstractmethod
+    def remove_duplicates(self, progress=None):
+        ...
+
+    # Stats
+
+    @abstractmethod
+    def get_index_stats(self):
+        """{"total_documents", "unique_games", "duplicates"}, or None on error"""
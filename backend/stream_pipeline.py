@@ -0,0 +1,504 @@
+"""
+Streaming scrape -> merge -> embed -> index pipeline
+
+Instead of crawling everything, then merging, then rebuilding the index,
+games flow through bounded queues as soon as the crawler has their details:
+
+    crawler --> [merge queue] --> merge/dedup --> [embed queue] --> embed --> [index queue] --> bulk index
+
+Each stage after the crawler runs in its own thread and works in micro-batches
+(up to --batch-size items or --max-wait seconds). A full queue blocks the
+stage in front of it; the crawler pauses its recommendation workers while the
+merge queue is above its high-water mark, so memory stays bounded and the
+crawl never outruns indexing. Elasticsearch refreshes every second, so a game
+is searchable a few seconds after its details are fetched.
+
+Only added games and games whose static fields changed are embedded; a game
+whose change is limited to its counters gets a partial update straight from
+the merge stage. Every document that reaches the index is recorded in the
+index state, so a later auto_reindex --check only handles what the stream missed.
+
+Run from the repository root (scheduler container: /app):
+    python -m backend.stream_pipeline --target 10000
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from elasticsearch_utils import ElasticsearchManager
+from game_store import GameStore
+from index_state import IndexState, fingerprint, state_path
+from merge_games import CHANGED_IDS_FILE, MERGED_FILE, STORE_FILE, export_outputs, write_changed_ids
+from trending import HISTORY_FILE, PlayingHistory
+
+from scraper.crawler import (CONCURRENCY, EDGES_FILE, INITIAL_GAME_ID, REQUESTS_PER_SECOND, STRATEGY,
+                             TARGET_GAME_COUNT, CrawlerEngine)
+from scraper.frontier import FRONTIER_STRATEGIES
+from scraper.sink import NDJSONSink
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 2000        # Capacity of each inter-stage queue (games)
+BATCH_SIZE = 200         # Max games per micro-batch
+MAX_WAIT = 1.0           # Max seconds a stage waits to fill a batch
+HIGH_WATER = 0.8         # Crawler pauses while the merge queue is fuller than this fraction
+REPORT_INTERVAL = 5.0
+
+_END = object()  # Marks the end of the stream; each stage forwards it after flushing
+
+
+class Stage(threading.Thread):
+    """
+    One pipeline stage: takes micro-batches of (enqueued_at, game) items from
+    `inbox`, processes them and puts the results on `outbox`.
+
+    Subclasses implement process(games) -> games to forward; setup() and
+    teardown() run on the stage thread (SQLite connections are per thread).
+    Metrics: items in/out, busy time (processing), blocked time (waiting on a
+    full outbox, i.e. backpressure from the next stage) and errors.
+    """
+
+    name = "stage"
+
+    def __init__(self, inbox, outbox=None, batch_size=BATCH_SIZE, max_wait=MAX_WAIT):
+        super().__init__(name=self.name, daemon=True)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.latencies = []  # Seconds from crawl to leaving this stage, for the last stage only
+
+    def setup(self):
+        pass
+
+    def process(self, games):
+        return games
+
+    def teardown(self):
+        pass
+
+    def _collect(self):
+        batch = [self.inbox.get()]
+        deadline = time.monotonic() + self.max_wait
+        while batch[-1] is not _END and len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.inbox.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _forward(self, items):
+        if self.outbox is None:
+            return
+        start = time.monotonic()
+        for item in items:
+            self.outbox.put(item)
+        self.blocked_seconds += time.monotonic() - start
+
+    def run(self):
+        disabled = False
+        try:
+            self.setup()
+        except Exception as e:
+            # Keep draining the inbox so the stages in front of this one never block forever
+            logger.error(f"[{self.name}] setup failed, dropping its input: {e}")
+            self.errors += 1
+            disabled = True
+        finished = False
+        while not finished:
+            batch = self._collect()
+            if batch[-1] is _END:
+                finished = True
+                batch.pop()
+            if not batch:
+                continue
+            self.items_in += len(batch)
+            if disabled:
+                continue
+            start = time.monotonic()
+            try:
+                # Items keep the time they entered the pipeline (earliest per game id) for end-to-end latency
+                enqueued_at = {}
+                for stamp, game in batch:
+                    enqueued_at.setdefault(str(game.get("id")), stamp)
+                output = self.process([game for _, game in batch])
+                items = [(enqueued_at.get(str(game.get("id")), time.time()), game) for game in output]
+            except Exception as e:
+                logger.error(f"[{self.name}] failed on a batch of {len(batch)} games: {e}")
+                self.errors += 1
+                items = []
+            self.busy_seconds += time.monotonic() - start
+            self.batches += 1
+            self.items_out += len(items)
+            if self.outbox is None:
+                now = time.time()
+                self.latencies.extend(now - stamp for stamp, _ in items)
+            self._forward(items)
+        try:
+            self.teardown()
+        finally:
+            if self.outbox is not None:
+                self.outbox.put(_END)
+
+    def metrics(self):
+        metrics = {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "batches": self.batches,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "blocked_seconds": round(self.blocked_seconds, 2),
+            "items_per_busy_second": round(self.items_in / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            "queue": self.inbox.qsize(),
+        }
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            metrics["latency_p50"] = round(latencies[len(latencies) // 2], 2)
+            metrics["latency_p95"] = round(latencies[int(len(latencies) * 0.95)], 2)
+            metrics["latency_max"] = round(latencies[-1], 2)
+        return metrics
+
+
+class MergeStage(Stage):
+    """
+    Upsert into the game store; only new or changed games continue (dedup)
+
+    Of the changed games, those whose static fields match the indexed
+    fingerprint only changed counters: they get a partial update of the
+    counter fields here and skip embedding. Only added games, games with new
+    static content and counter updates that failed (e.g. the document is
+    missing from the index) continue to the embed stage.
+
+    Every game's player count also goes into the playing history, as one
+    snapshot for the whole run (the time the run started).
+    """
+
+    name = "merge"
+
+    def __init__(self, es, store_file, history_file, state_file, inbox, outbox, **kwargs):
+        super().__init__(inbox, outbox, **kwargs)
+        self.es = es
+        self.store_file = store_file
+        self.history_file = history_file
+        self.state_file = state_file
+        self.store = None
+        self.history = None
+        self.state = None
+        self.snapshot_time = time.time()
+        self.counters_updated = 0
+
+    def setup(self):
+        self.store = GameStore(self.store_file)
+        self.store.begin_run()
+        self.history = PlayingHistory(self.history_file)
+        self.state = IndexState(self.state_file)
+
+    def process(self, games):
+        self.history.record(games, self.snapshot_time)
+        changed, _ = self.store.merge_batch(games)
+        indexed = self.state.indexed_fingerprints(game["id"] for game in changed)
+        forward = []
+        counters_only = []
+        for game in changed:
+            static_hash, _, counters = fingerprint(game)
+            known = indexed.get(str(game["id"]))
+            if known and known[0] == static_hash:
+                counters_only.append((game, counters))
+            else:
+                forward.append(game)
+        if counters_only:
+            failed_ids = []
+            self.es.bulk_update_fields([(game["id"], counters) for game, counters in counters_only], failed_ids)
+            failed_ids = set(str(game_id) for game_id in failed_ids)
+            updated = [game for game, _ in counters_only if str(game["id"]) not in failed_ids]
+            self.state.record_indexed(updated)
+            self.counters_updated += len(updated)
+            # A failed partial update (document missing from the index) falls back to a full index
+            forward.extend(game for game, _ in counters_only if str(game["id"]) in failed_ids)
+        return forward
+
+    def teardown(self):
+        if self.store:
+            self.store.close()
+        if self.history:
+            self.history.prune(self.snapshot_time)
+            self.history.close()
+        if self.state:
+            self.state.close()
+
+    def metrics(self):
+        metrics = super().metrics()
+        metrics["counters_updated"] = self.counters_updated
+        return metrics
+
+
+class EmbedStage(Stage):
+    name = "embed"
+
+    def __init__(self, es, inbox, outbox, **kwargs):
+        super().__init__(inbox, outbox, **kwargs)
+        self.es = es
+
+    def process(self, games):
+        return self.es.embed_games(games)
+
+
+class IndexStage(Stage):
+    """Bulk index; the fingerprints of every document indexed are recorded in the index state"""
+
+    name = "index"
+
+    def __init__(self, es, state_file, inbox, **kwargs):
+        super().__init__(inbox, None, **kwargs)
+        self.es = es
+        self.state_file = state_file
+        self.state = None
+        self.failed = 0
+
+    def setup(self):
+        self.state = IndexState(self.state_file)
+        if not self.es.es.indices.exists(index=self.es.index_name):
+            self.es.create_index()
+            self.state.reset()
+
+    def process(self, games):
+        failed_ids = []
+        _, failed = self.es.bulk_index(games, failed_ids)
+        self.failed += failed
+        failed_ids = set(str(game_id) for game_id in failed_ids)
+        indexed = [game for game in games if str(game["id"]) not in failed_ids]
+        self.state.record_indexed(indexed)
+        return indexed
+
+    def teardown(self):
+        if self.state:
+            self.state.commit_indexed(datetime.now().isoformat())
+            self.state.close()
+
+    def metrics(self):
+        metrics = super().metrics()
+        metrics["failed_documents"] = self.failed
+        return metrics
+
+
+class QueueSink:
+    """
+    Crawler sink that feeds the merge queue without blocking the crawler's event loop
+
+    write() runs on the event loop, so it only ever puts without waiting. When
+    the queue is full the record is parked in an overflow list that a worker
+    thread hands over with blocking puts. The overflow only holds what was
+    already in flight: the crawler stops discovering new games while
+    backpressure() reports the merge queue above its high-water mark.
+    """
+
+    def __init__(self, outbox):
+        self.outbox = outbox
+        self.count = 0
+        self.overflow = collections.deque()
+        self.peak_overflow = 0
+        self._lock = threading.Lock()
+        self._draining = False
+
+    def write(self, record):
+        item = (time.time(), record)
+        self.count += 1
+        with self._lock:
+            if not self._draining:
+                try:
+                    self.outbox.put_nowait(item)
+                    return
+                except queue.Full:
+                    pass
+            self.overflow.append(item)
+            self.peak_overflow = max(self.peak_overflow, len(self.overflow))
+            if self._draining:
+                return
+            self._draining = True
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._drain)
+        except RuntimeError:
+            self._drain()  # Not called from an event loop: blocking is fine
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self.overflow:
+                    self._draining = False
+                    return
+                item = self.overflow.popleft()
+            self.outbox.put(item)
+
+    def close(self):
+        """Hand over whatever is still parked (the event loop has stopped by now)"""
+        while True:
+            with self._lock:
+                if not self.overflow:
+                    return
+                item = self.overflow.popleft()
+            self.outbox.put(item)
+
+
+class StreamingPipeline:
+    def __init__(self, es, data_dir, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, max_wait=MAX_WAIT):
+        self.data_dir = data_dir
+        self.merge_queue = queue.Queue(queue_size)
+        embed_queue = queue.Queue(queue_size)
+        index_queue = queue.Queue(queue_size)
+        options = {"batch_size": batch_size, "max_wait": max_wait}
+        # The same state auto_reindex --check diffs the exported dataset against
+        state_file = state_path(os.path.join(data_dir, MERGED_FILE))
+        self.stages = [
+            MergeStage(es, os.path.join(data_dir, STORE_FILE), os.path.join(data_dir, HISTORY_FILE), state_file,
+                       self.merge_queue, embed_queue, **options),
+            EmbedStage(es, embed_queue, index_queue, **options),
+            IndexStage(es, state_file, index_queue, **options),
+        ]
+        self.sink = QueueSink(self.merge_queue)
+        self.high_water = max(1, int(queue_size * HIGH_WATER))
+
+    def backpressure(self):
+        return self.merge_queue.qsize() >= self.high_water
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def finish(self):
+        """Signal end of stream and wait until every stage has drained"""
+        self.sink.close()
+        self.merge_queue.put(_END)
+        for stage in self.stages:
+            stage.join()
+
+    def metrics(self):
+        metrics = {stage.name: stage.metrics() for stage in self.stages}
+        metrics["merge"]["sink_peak_overflow"] = self.sink.peak_overflow
+        return metrics
+
+    def report(self, crawler=None):
+        parts = []
+        if crawler is not None:
+            parts.append(f"crawl {crawler.valid_count} games ({crawler.throughput():.1f}/s)")
+        for stage in self.stages:
+            parts.append(f"{stage.name} {stage.items_in} in/{stage.items_out} out "
+                         f"q={stage.inbox.qsize()} blocked={stage.blocked_seconds:.1f}s")
+        logger.info(" | ".join(parts))
+
+
+async def _report_periodically(pipeline, crawler):
+    while True:
+        await asyncio.sleep(REPORT_INTERVAL)
+        pipeline.report(crawler)
+
+
+async def _crawl(pipeline, crawler):
+    reporter = asyncio.create_task(_report_periodically(pipeline, crawler))
+    try:
+        return await crawler.run()
+    finally:
+        reporter.cancel()
+
+
+def run_pipeline(args):
+    """Crawl and stream games into the store and the index; returns the run summary"""
+    start_time = time.monotonic()
+    es = ElasticsearchManager(host=os.environ.get("ELASTICSEARCH_HOST", "http://localhost:9200"))
+    if not es.check_connection():
+        return {"error": "Could not connect to Elasticsearch"}
+
+    pipeline = StreamingPipeline(es, args.data_dir, queue_size=args.queue_size, batch_size=args.batch_size,
+                                 max_wait=args.max_wait)
+    edge_sink = NDJSONSink(args.edges) if args.edges else None
+    crawler = CrawlerEngine(args.seed or [INITIAL_GAME_ID], target=args.target, strategy=args.strategy,
+                            concurrency=args.concurrency, rate=args.rate, sink=pipeline.sink,
+                            max_seconds=args.max_seconds, edge_sink=edge_sink,
+                            backpressure=pipeline.backpressure)
+    pipeline.start()
+    try:
+        asyncio.run(_crawl(pipeline, crawler))
+    finally:
+        if edge_sink:
+            edge_sink.close()
+        pipeline.finish()
+    crawl_seconds = time.monotonic() - start_time
+    pipeline.report(crawler)
+
+    # Keep the batch tools (index_data, auto_reindex, refresh mode) in sync with the store
+    store = GameStore(os.path.join(args.data_dir, STORE_FILE))
+    try:
+        counts = store.run_counts()
+        write_changed_ids(store, os.path.join(args.data_dir, CHANGED_IDS_FILE))
+        if not args.no_export:
+            export_outputs(store, os.path.join(args.data_dir, MERGED_FILE))
+        counts["total"] = store.count()
+    finally:
+        store.close()
+
+    return {
+        "crawl": crawler.summary(),
+        "stages": pipeline.metrics(),
+        "merge": counts,
+        "duration_seconds": round(time.monotonic() - start_time, 2),
+        "stream_seconds": round(crawl_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming scrape -> merge -> embed -> index pipeline")
+    parser.add_argument("--strategy", choices=sorted(FRONTIER_STRATEGIES), default=STRATEGY)
+    parser.add_argument("--seed", action="append", help="Seed universe ID (repeatable)")
+    parser.add_argument("--target", type=int, default=TARGET_GAME_COUNT)
+    parser.add_argument("--max-seconds", type=float, default=0)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND)
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--edges", default=EDGES_FILE, help="Recommendation edge file (empty string = skip)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT)
+    parser.add_argument("--no-export", action="store_true", help="Skip rewriting roblox_data.json at the end")
+    parser.add_argument("--stats-json", help="Write the run summary and per-stage metrics to this file")
+    args = parser.parse_args()
+
+    try:
+        result = run_pipeline(args)
+    except Exception as e:
+        result = {"error": str(e)}
+    if "error" in result:
+        print(f"Error in streaming pipeline: {result['error']}")
+        return 1
+
+    print(f"Streamed {result['crawl']['games']} games in {result['stream_seconds']:.2f} seconds; "
+          f"merge: {result['merge']}")
+    for name, metrics in result["stages"].items():
+        print(f"  {name}: {metrics}")
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if any(metrics["errors"] for metrics in result["stages"].values()) else 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    exit(exit_code)
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+
+import numpy as np
+
+HISTORY_FILE = "playing_history.sqlite"
+
+# Snapshots older than this are pruned after recording a new one
+HISTORY_DAYS = 30
+
+# Growth older than the half-life counts half as much, twice the half-life a quarter, ...
+DEFAULT_HALF_LIFE_HOURS = 24.0
+
+# How much decayed growth (in log players) weighs against the current player count (also in log players)
+GROWTH_WEIGHT = 2.0
+
+RECORD_BATCH_SIZE = 1000
+
+
+class PlayingHistory:
+    """
+    Player counts per game over time, one snapshot per scrape.
+
+    - snapshots: (game id, snapshot time, playing); recording the same snapshot
+      time again overwrites it, so re-merging one scraper output is idempotent
+
+    Only the counter is kept: a row is a few dozen bytes, so 30 days of daily
+    scrapes of the whole catalogue stay in the tens of megabytes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (game_id TEXT NOT NULL, taken_at REAL NOT NULL,
+                                                  playing INTEGER NOT NULL, PRIMARY KEY (game_id, taken_at));
+            CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at);
+        """)
+        self.conn.commit()
+
+    def record(self, games, taken_at):
+        """
+        Store the player count of every game with an id as of taken_at
+
+        Parameters:
+        - games: iterable of game dicts
+        - taken_at: snapshot time (unix seconds), the same for the whole scrape
+
+        Returns:
+        - number of games recorded
+        """
+        count = 0
+        rows = []
+        for game in games:
+            game_id = game.get("id")
+            if game_id is None:
+                continue
+            rows.append((str(game_id), float(taken_at), max(0, int(game.get("playing") or 0))))
+            if len(rows) >= RECORD_BATCH_SIZE:
+                self._write(rows)
+                count += len(rows)
+                rows = []
+        if rows:
+            self._write(rows)
+            count += len(rows)
+        self.conn.commit()
+        return count
+
+    def prune(self, now):
+        """Drop snapshots older than HISTORY_DAYS before now"""
+        self.conn.execute("DELETE FROM snapshots WHERE taken_at < ?", (now - HISTORY_DAYS * 86400,))
+        self.conn.commit()
+
+    def _write(self, rows):
+        self.conn.executemany("INSERT OR REPLACE INTO snapshots (game_id, taken_at, playing) VALUES (?, ?, ?)", rows)
+
+    def last_snapshot(self):
+        """Time of the newest snapshot, or None when nothing was recorded yet"""
+        return self.conn.execute("SELECT MAX(taken_at) FROM snapshots").fetchone()[0]
+
+    def snapshot_count(self):
+        return self.conn.execute("SELECT COUNT(DISTINCT taken_at) FROM snapshots").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def compute_trending(history, now, half_life_hours=DEFAULT_HALF_LIFE_HOURS):
+    """
+    Rank every game in the history by time-decayed popularity
+
+    score = log1p(latest playing) * d(latest) + GROWTH_WEIGHT * sum(d(t_i) * growth_i)
+
+    where growth_i = log1p(playing_i) - log1p(playing_i-1) between consecutive
+    snapshots of a game and d(t) = 2^(-(now - t) / half_life). Log players make
+    100 -> 200 count as much as 10000 -> 20000, and decaying the level too lets
+    games that dropped out of the crawl fade instead of keeping a stale count.
+
+    Parameters:
+    - history: PlayingHistory
+    - now: reference time (unix seconds)
+    - half_life_hours: decay half-life
+
+    Returns:
+    - dict of arrays sorted by score, highest first: ids, scores, playing (latest), growth (decayed)
+    """
+    rows = history.conn.execute("""
+        SELECT game_id, taken_at, playing, LAG(playing) OVER (PARTITION BY game_id ORDER BY taken_at)
+        FROM snapshots ORDER BY game_id, taken_at
+    """).fetchall()
+    if not rows:
+        return {"ids": np.zeros(0, dtype=object), "scores": np.zeros(0), "playing": np.zeros(0, dtype=np.int64),
+                "growth": np.zeros(0)}
+
+    game_ids, taken_at, playing, previous = zip(*rows)
+    game_ids = np.array(game_ids, dtype=object)
+    taken_at = np.array(taken_at, dtype=np.float64)
+    playing = np.array(playing, dtype=np.int64)
+    level = np.log1p(playing.astype(np.float64))
+    has_previous = np.array([value is not None for value in previous])
+    previous_level = np.log1p(np.array([value or 0 for value in previous], dtype=np.float64))
+
+    # Rows come grouped by game in time order: group numbers and the last row of each group
+    starts = np.r_[True, game_ids[1:] != game_ids[:-1]]
+    group = np.cumsum(starts) - 1
+    last = np.r_[np.flatnonzero(starts)[1:] - 1, len(rows) - 1]
+
+    decay = np.exp2(-np.maximum(0.0, now - taken_at) / (half_life_hours * 3600.0))
+    growth = np.bincount(group, weights=np.where(has_previous, decay * (level - previous_level), 0.0))
+    scores = level[last] * decay[last] + GROWTH_WEIGHT * growth
+
+    order = np.argsort(-scores, kind="stable")
+    return {
+        "ids": game_ids[last][order],
+        "scores": scores[order],
+        "playing": playing[last][order],
+        "growth": growth[order],
+    }
+
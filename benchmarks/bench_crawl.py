@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Reproducible crawler benchmark against the offline mock Roblox API.
+
+Starts benchmarks/mock_roblox_server.py in-process (or uses --mock-url), points
+the scraper at it and runs the crawler engine once per (profile, strategy)
+pair. Each profile sets the mock's latency and fault injection:
+
+    baseline   ~20 ms responses, no faults
+    slow       ~150 ms responses
+    throttled  server-side limit below the crawler's rate, so 429s drive the adaptive limiter
+    faulty     5% random 429s and 5% 503s
+
+Prints games collected, games/s, requests, games/request and the 429/5xx
+counts seen by both client and server.
+
+Usage (from the repository root):
+    python benchmarks/bench_crawl.py --target 2000 --profiles baseline,throttled
+    python benchmarks/bench_crawl.py --mock-url http://localhost:8090 --profiles baseline
+
+The standalone crawler can be pointed at the mock the same way through
+ROBLOX_GAMES_API / ROBLOX_THUMBNAILS_API.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_roblox_server import DEFAULT_CONFIG, start_server  # noqa: E402
+from scraper import roblox_api  # noqa: E402
+from scraper.crawler import CrawlerEngine  # noqa: E402
+from scraper.frontier import FRONTIER_STRATEGIES  # noqa: E402
+from scraper.sink import NDJSONSink  # noqa: E402
+
+PROFILES = {
+    "baseline": {"latency_ms": 20, "jitter_ms": 5},
+    "slow": {"latency_ms": 150, "jitter_ms": 30},
+    "throttled": {"latency_ms": 20, "jitter_ms": 5, "rate_limit_rps": 40, "retry_after": 0.5},
+    "faulty": {"latency_ms": 20, "jitter_ms": 5, "throttle_rate": 0.05, "error_rate": 0.05, "retry_after": 0.2},
+}
+
+
+def mock_request(base_url, path, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def run_case(base_url, profile, strategy, seeds, args, output_dir):
+    config = dict(DEFAULT_CONFIG)
+    config.update(PROFILES[profile])
+    mock_request(base_url, "/config", config)
+    mock_request(base_url, "/reset", {})
+
+    with NDJSONSink(os.path.join(output_dir, f"{profile}-{strategy}.ndjson")) as sink:
+        crawler = CrawlerEngine(seeds, target=args.target, strategy=strategy, concurrency=args.concurrency,
+                                rate=args.rate, sink=sink, max_requests=args.max_requests,
+                                max_seconds=args.max_seconds)
+        asyncio.run(crawler.run())
+    result = crawler.summary()
+    result["profile"] = profile
+    result["server"] = mock_request(base_url, "/stats")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crawler against the mock Roblox API")
+    parser.add_argument("--mock-url", help="Use an already running mock server instead of starting one")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--games", type=int, default=20000, help="Size of the synthetic graph")
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--strategies", default=",".join(FRONTIER_STRATEGIES))
+    parser.add_argument("--target", type=int, default=2000)
+    parser.add_argument("--max-requests", type=int, default=0)
+    parser.add_argument("--max-seconds", type=float, default=120)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=100.0)
+    parser.add_argument("--json", help="Also write the raw results to this file")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.mock_url
+    if not base_url:
+        server = start_server("127.0.0.1", args.port, graph_options={"games": args.games})
+        base_url = f"http://127.0.0.1:{args.port}"
+    base_url = base_url.rstrip("/")
+    roblox_api.GAMES_API = base_url
+    roblox_api.THUMBNAILS_API = base_url
+    seeds = mock_request(base_url, "/stats")["seed_ids"][:1]
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            for profile in args.profiles.split(","):
+                for strategy in args.strategies.split(","):
+                    print(f"Running {profile}/{strategy}...")
+                    results.append(run_case(base_url, profile.strip(), strategy.strip(), seeds, args, output_dir))
+    finally:
+        if server:
+            server.shutdown()
+
+    print()
+    print(f"{'profile':<11}{'strategy':<10}{'games':>7}{'secs':>7}{'games/s':>9}{'requests':>10}"
+          f"{'games/req':>11}{'429 cli':>9}{'429 srv':>9}{'5xx srv':>9}{'req/conn':>10}")
+    for r in results:
+        server_stats = r["server"]
+        games_per_second = r["games"] / r["duration_seconds"] if r["duration_seconds"] else 0.0
+        print(f"{r['profile']:<11}{r['strategy']:<10}{r['games']:>7}{r['duration_seconds']:>7.1f}"
+              f"{games_per_second:>9.1f}{r['requests']:>10}{r['games_per_request']:>11.2f}{r['throttled']:>9}"
+              f"{server_stats['throttled']:>9}{server_stats['errors']:>9}{server_stats['requests_per_connection']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
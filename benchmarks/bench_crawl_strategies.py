@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Compare crawler frontier strategies on games discovered per request.
+
+Runs the crawler engine (scraper/crawler.py) once per strategy from the same
+seeds and under the same request budget, writing records to a throwaway sink,
+and prints games collected, requests spent per endpoint and games/request.
+
+Usage (from the repository root):
+    python benchmarks/bench_crawl_strategies.py --max-requests 500 --target 5000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.crawler import INITIAL_GAME_ID, CrawlerEngine  # noqa: E402
+from scraper.frontier import FRONTIER_STRATEGIES  # noqa: E402
+from scraper.sink import NDJSONSink  # noqa: E402
+
+
+def run_strategy(strategy, seeds, args, output_dir):
+    with NDJSONSink(os.path.join(output_dir, f"{strategy}.ndjson")) as sink:
+        crawler = CrawlerEngine(seeds, target=args.target, strategy=strategy, concurrency=args.concurrency,
+                                rate=args.rate, sink=sink, max_requests=args.max_requests,
+                                max_seconds=args.max_seconds)
+        asyncio.run(crawler.run())
+    return crawler.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crawler frontier strategies")
+    parser.add_argument("--strategies", default=",".join(FRONTIER_STRATEGIES), help="Comma-separated strategies")
+    parser.add_argument("--seed", action="append", help="Seed universe ID (repeatable)")
+    parser.add_argument("--target", type=int, default=5000)
+    parser.add_argument("--max-requests", type=int, default=500, help="Request budget per strategy")
+    parser.add_argument("--max-seconds", type=float, default=0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=20.0)
+    args = parser.parse_args()
+
+    seeds = args.seed or [INITIAL_GAME_ID]
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for strategy in args.strategies.split(","):
+            print(f"Running {strategy}...")
+            results.append(run_strategy(strategy.strip(), seeds, args, output_dir))
+
+    print()
+    print(f"{'strategy':<10}{'games':>8}{'requests':>10}{'recs':>8}{'details':>9}{'thumbs':>8}"
+          f"{'429':>6}{'games/req':>11}{'frontier':>10}{'secs':>8}")
+    for r in results:
+        by_endpoint = r["requests_by_endpoint"]
+        print(f"{r['strategy']:<10}{r['games']:>8}{r['requests']:>10}{by_endpoint.get('recommendations', 0):>8}"
+              f"{by_endpoint.get('details', 0):>9}{by_endpoint.get('thumbnails', 0):>8}{r['throttled']:>6}"
+              f"{r['games_per_request']:>11.2f}{r['frontier_remaining']:>10}{r['duration_seconds']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Load time of the game dataset: pretty-printed JSON vs the columnar format.
+
+Writes a synthetic catalogue (or converts --input) both as the old
+indent=2 roblox_data.json and as a backend/game_columns.py dataset, then
+times the ways the backend reads it:
+
+    json full load        game_data.load_games on the JSON file
+    columns open          open the dataset (memory-mapped, no parsing)
+    columns counters      sum playing and visits as typed arrays
+    columns full load     iterate every record from records.bin
+    columns id lookups    random get(game_id) through the id index
+    fingerprint scan      index_state.IndexState.scan_file (auto_reindex --check)
+                          on the JSON file and on the columnar dataset
+
+Usage (from the repository root):
+    python benchmarks/bench_dataset_load.py --games 100000
+    python benchmarks/bench_dataset_load.py --input data/roblox_data.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from game_columns import GameColumns, write_columns  # noqa: E402
+from game_data import iter_games, load_games  # noqa: E402
+from index_state import IndexState  # noqa: E402
+
+LOOKUPS = 10000
+GENRES = ["Adventure", "RPG", "FPS", "Horror", "Sports", "Town and City", "All"]
+
+
+def synthetic_games(count, seed=42):
+    rng = random.Random(seed)
+    for index in range(count):
+        playing = int(rng.paretovariate(1.1) * 3) - 3
+        yield {
+            "id": 1000000000 + index,
+            "rootPlaceId": 10000000000 + index,
+            "name": f"Game {index}",
+            "description": "An experience description of typical length. " * rng.randint(1, 8),
+            "creator": {"id": rng.randrange(10 ** 8), "name": f"Creator{index % 997}", "type": "User",
+                        "isRNVAccount": False, "hasVerifiedBadge": False},
+            "price": None,
+            "allowedGearGenres": ["All"],
+            "playing": playing,
+            "visits": playing * rng.randint(100, 5000),
+            "maxPlayers": rng.choice([1, 6, 12, 30, 50]),
+            "created": "2021-01-01T00:00:00.000Z",
+            "updated": "2024-01-01T00:00:00.000Z",
+            "genre": rng.choice(GENRES),
+            "genre_l1": rng.choice(GENRES),
+            "genre_l2": rng.choice(GENRES),
+            "favoritedCount": playing * 3,
+            "imageUrl": f"https://tr.rbxcdn.com/{index}/768/432/Image/Png",
+        }
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON vs columnar dataset loading")
+    parser.add_argument("--games", type=int, default=100000, help="Synthetic catalogue size")
+    parser.add_argument("--input", help="Use an existing data file instead of synthetic games")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        json_file = os.path.join(work_dir, "roblox_data.json")
+        columns_dir = os.path.join(work_dir, "roblox_data.cols")
+        games = list(iter_games(args.input)) if args.input else list(synthetic_games(args.games))
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(games, f, indent=2, ensure_ascii=False)
+        convert_seconds, _ = timed(lambda: write_columns(games, columns_dir))
+        count = len(games)
+        probe_ids = [game.get("id") for game in random.Random(1).sample(games, min(LOOKUPS, len(games)))]
+        del games
+
+        json_bytes = os.path.getsize(json_file)
+        columns_bytes = sum(os.path.getsize(os.path.join(columns_dir, name)) for name in os.listdir(columns_dir))
+        print(f"{count} games; JSON {json_bytes / 2 ** 20:.1f} MB, "
+              f"columnar {columns_bytes / 2 ** 20:.1f} MB (converted in {convert_seconds:.2f} s)")
+
+        results = []
+        seconds, games = timed(lambda: load_games(json_file))
+        results.append(("json full load", seconds))
+        seconds, _ = timed(lambda: sum(game.get("playing") or 0 for game in games) + sum(
+            game.get("visits") or 0 for game in games))
+        results.append(("json counters (after load)", seconds))
+        del games
+
+        seconds, dataset = timed(lambda: GameColumns(columns_dir))
+        results.append(("columns open", seconds))
+        seconds, _ = timed(lambda: int(dataset.column("playing").sum()) + int(dataset.column("visits").sum()))
+        results.append(("columns counters", seconds))
+        seconds, _ = timed(lambda: sum(1 for _ in dataset))
+        results.append(("columns full load", seconds))
+        seconds, _ = timed(lambda: [dataset.get(game_id) for game_id in probe_ids])
+        results.append((f"columns {len(probe_ids)} id lookups", seconds))
+        dataset.close()
+
+        for label, path in (("json", json_file), ("columns", columns_dir)):
+            state = IndexState(os.path.join(work_dir, f"index_state_{label}.sqlite"))
+            seconds, _ = timed(lambda: state.scan_file(path))
+            results.append((f"fingerprint scan {label}", seconds))
+            state.close()
+
+    print()
+    print(f"{'operation':<30}{'seconds':>10}")
+    for name, seconds in results:
+        print(f"{name:<30}{seconds:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the use_llm path of /api/search.
+
+Drives concurrent POST /api/search requests with use_llm=true against a running
+API whose LLM_API_URL points at benchmarks/mock_llm_server.py, and sweeps the
+mock through several fault profiles. For every profile it reports tail latency,
+how often the handler fell back to the default enhancements, and how many LLM
+requests each upstream connection carried.
+
+Usage:
+    python benchmarks/mock_llm_server.py --port 8089 &
+    LLM_API_URL=http://localhost:8089/v1/chat/completions LLM_TIMEOUT=2 uvicorn main:app --port 8000
+    python benchmarks/bench_llm_search.py --api-url http://localhost:8000 --mock-url http://localhost:8089
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+PROFILES = {
+    "baseline": {"latency_ms": 300, "error_rate": 0, "timeout_rate": 0, "malformed_rate": 0},
+    "slow": {"latency_ms": 1500, "error_rate": 0, "timeout_rate": 0, "malformed_rate": 0},
+    "errors": {"latency_ms": 300, "error_rate": 0.2, "timeout_rate": 0, "malformed_rate": 0},
+    "timeouts": {"latency_ms": 300, "error_rate": 0, "timeout_rate": 0.1, "malformed_rate": 0},
+    "malformed": {"latency_ms": 300, "error_rate": 0, "timeout_rate": 0, "malformed_rate": 0.3},
+}
+
+QUERIES = ["horror", "tycoon", "obby", "simulator", "racing", "tower defense", "roleplay", "anime fighting"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_profile(api_url, total_requests, concurrency, page_size):
+    """Fire total_requests searches with the given concurrency and collect per-request results"""
+    local = threading.local()
+
+    def one_request(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        payload = {"query": QUERIES[i % len(QUERIES)], "page": 1, "page_size": page_size, "use_llm": True}
+        start = time.perf_counter()
+        try:
+            response = local.session.post(f"{api_url}/api/search", json=payload, timeout=120)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                return elapsed, "http_error"
+            enhancements = response.json().get("llm_enhancements") or {}
+            return elapsed, "fallback" if "error" in enhancements else "ok"
+        except requests.RequestException:
+            return time.perf_counter() - start, "http_error"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_request, range(total_requests)))
+    wall = time.perf_counter() - started
+    return results, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/search with use_llm against the mock LLM server")
+    parser.add_argument("--api-url", default="http://localhost:8000")
+    parser.add_argument("--mock-url", default="http://localhost:8089")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per profile")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated profile names")
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'rps':>7} {'ok':>5} {'fallbk':>6} {'err':>5} {'req/conn':>8}")
+    for name in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+        requests.post(f"{args.mock_url}/config", json=PROFILES[name], timeout=5).raise_for_status()
+        requests.post(f"{args.mock_url}/reset", timeout=5).raise_for_status()
+
+        results, wall = run_profile(args.api_url, args.requests, args.concurrency, args.page_size)
+        stats = requests.get(f"{args.mock_url}/stats", timeout=5).json()
+
+        latencies_ms = [elapsed * 1000 for elapsed, _ in results]
+        outcomes = [outcome for _, outcome in results]
+        print(
+            f"{name:<10} "
+            f"{statistics.median(latencies_ms):>7.0f}ms "
+            f"{percentile(latencies_ms, 95):>6.0f}ms "
+            f"{percentile(latencies_ms, 99):>6.0f}ms "
+            f"{max(latencies_ms):>6.0f}ms "
+            f"{len(results) / wall:>7.1f} "
+            f"{outcomes.count('ok'):>5} "
+            f"{outcomes.count('fallback'):>6} "
+            f"{outcomes.count('http_error'):>5} "
+            f"{stats['requests_per_connection']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Search latency: the in-process fallback backend vs Elasticsearch on the same dataset.
+
+Builds backend/local_search.py's LocalSearchBackend from --input (or a
+synthetic catalogue with a small word vocabulary, so BM25 has something to
+rank) and runs the same query mix through it and, with --es-host, through
+ElasticsearchManager.search against an index loaded from the same file:
+
+    text          one to three vocabulary words
+    text+filter   the same with a genre and a min_playing_now filter
+    filter only   genre filter, no text (sorted by popularity)
+
+Prints p50/p95/mean latency per query kind and backend, and for text
+queries the overlap of the top 10 ids between the two backends.
+
+Usage (from the repository root):
+    python benchmarks/bench_local_search.py --games 20000
+    python benchmarks/bench_local_search.py --input data/roblox_data.json --es-host http://localhost:9200
+
+With --es-host the dataset is indexed into --es-index (default
+roblox_games_bench, deleted afterwards) unless --reuse-index is given.
+Embeddings are only used when the SentenceTransformer model can be loaded,
+for both backends alike.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from game_data import iter_games  # noqa: E402
+from local_search import LocalSearchBackend  # noqa: E402
+
+WORDS = ["obby", "tycoon", "simulator", "horror", "escape", "race", "pet", "anime", "battle", "sword",
+         "zombie", "survival", "roleplay", "city", "island", "dragon", "ninja", "parkour", "story", "fashion",
+         "cooking", "pirate", "space", "school", "hospital", "prison", "farm", "magic", "mining", "tower"]
+FILLER = ["the", "and", "with", "your", "friends", "play", "new", "best", "fun", "game", "world", "update"]
+GENRES = ["Adventure", "RPG", "FPS", "Horror", "Sports", "Town and City", "Obby", "Simulator"]
+
+
+def synthetic_games(count, seed=7):
+    rng = random.Random(seed)
+    for index in range(count):
+        topic = rng.sample(WORDS, 3)
+        playing = int(rng.paretovariate(1.1) * 3) - 3
+        description = " ".join(rng.choice(FILLER + topic) for _ in range(rng.randint(8, 60)))
+        yield {
+            "id": str(1000000000 + index),
+            "name": f"{topic[0].title()} {topic[1].title()} {index}",
+            "description": description,
+            "creator": {"id": rng.randrange(10 ** 8), "name": f"Creator{index % 997}", "type": "User"},
+            "playing": playing,
+            "visits": playing * rng.randint(100, 5000),
+            "maxPlayers": rng.choice([1, 6, 12, 30, 50]),
+            "genre": rng.choice(GENRES),
+            "genre_l1": rng.choice(GENRES),
+            "genre_l2": rng.choice(GENRES),
+            "favoritedCount": playing * 3,
+        }
+
+
+def query_mix(count, seed=11):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        text = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        genre = rng.choice(GENRES)
+        queries.append(("text", text, {}))
+        queries.append(("text+filter", text, {"genres": [genre], "min_playing_now": "5"}))
+        queries.append(("filter only", "", {"genres": [genre]}))
+    return queries
+
+
+def run(backend, queries, size):
+    """Latency in ms per query kind and the top ids of every query"""
+    latencies = {}
+    top_ids = []
+    for kind, text, filters in queries:
+        with contextlib.redirect_stdout(io.StringIO()):  # ElasticsearchManager.search prints every query
+            start = time.perf_counter()
+            results = backend.search(text, filters=filters, size=size, from_=0)
+            elapsed = (time.perf_counter() - start) * 1000
+        if "error" in results:
+            raise RuntimeError(f"{backend.name} search failed: {results['error']}")
+        latencies.setdefault(kind, []).append(elapsed)
+        top_ids.append([hit["_id"] for hit in results["hits"]["hits"]])
+    return latencies, top_ids
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local fallback search against Elasticsearch")
+    parser.add_argument("--games", type=int, default=20000, help="Synthetic catalogue size")
+    parser.add_argument("--input", help="Use an existing data file instead of synthetic games")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per kind")
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--es-host", help="Also benchmark Elasticsearch at this host")
+    parser.add_argument("--es-index", default="roblox_games_bench")
+    parser.add_argument("--reuse-index", action="store_true", help="Do not (re)load --es-index")
+    args = parser.parse_args()
+
+    es = None
+    if args.es_host:
+        from elasticsearch_utils import ElasticsearchManager
+        es = ElasticsearchManager(host=args.es_host)
+        es.index_name = args.es_index
+        if not es.check_connection():
+            print(f"Cannot reach Elasticsearch at {args.es_host}")
+            return 1
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_file = args.input
+        if not data_file:
+            data_file = os.path.join(work_dir, "roblox_data.json")
+            with open(data_file, "w", encoding="utf-8") as f:
+                json.dump(list(synthetic_games(args.games)), f)
+
+        start = time.perf_counter()
+        local = LocalSearchBackend(data_file, encoder=es)
+        print(f"Local index: {local.count} games built in {time.perf_counter() - start:.2f} s "
+              f"(embeddings {'on' if local.embeddings is not None else 'off'})")
+        if es and not args.reuse_index:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                es.recreate_index(data_file=data_file)
+            print(f"Elasticsearch index {args.es_index} loaded in {time.perf_counter() - start:.2f} s")
+
+        queries = query_mix(args.queries)
+        backends = [local] + ([es] if es else [])
+        results = {}
+        for backend in backends:
+            run(backend, queries[:30], args.size)  # Warm caches (query vectors, ES request cache)
+            results[backend.name] = run(backend, queries, args.size)
+
+        if es and not args.reuse_index:
+            es.es.indices.delete(index=args.es_index)
+
+    print()
+    print(f"{'query kind':<14}{'backend':<15}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}")
+    for kind in ("text", "text+filter", "filter only"):
+        for backend in backends:
+            values = results[backend.name][0][kind]
+            print(f"{kind:<14}{backend.name:<15}{percentile(values, 0.5):>9.2f}{percentile(values, 0.95):>9.2f}"
+                  f"{statistics.mean(values):>9.2f}")
+    if es:
+        overlaps = [len(set(local_ids) & set(es_ids)) / max(1, len(es_ids))
+                    for (kind, _, _), local_ids, es_ids in zip(queries, results[local.name][1], results[es.name][1])
+                    if kind == "text"]
+        print(f"\nTop-{args.size} overlap on text queries: {statistics.mean(overlaps):.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    exit(exit_code)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Memory and speed of the crawler's visited/collected id structures.
+
+Compares the old Python structures (set of string ids, dict of string id ->
+flag) with scraper.visited.CompactIdSet, with and without the Bloom-filter
+prefilter, for crawls of 10k, 100k and 1M universe ids. Memory is measured
+with tracemalloc as the retained size after inserting every id; build and
+lookup times come from a separate, untraced run.
+
+Usage (from the repository root):
+    python benchmarks/bench_visited_memory.py --sizes 10000,100000,1000000
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.visited import CompactIdSet  # noqa: E402
+
+LOOKUPS = 200000
+
+
+def build_set(ids, capacity):
+    visited = set()
+    for game_id in ids:
+        visited.add(game_id)
+    return visited
+
+
+def build_dict(ids, capacity):
+    collected = {}
+    for game_id in ids:
+        collected[game_id] = True
+    return collected
+
+
+def build_compact(ids, capacity):
+    visited = CompactIdSet()
+    for game_id in ids:
+        visited.add(game_id)
+    return visited
+
+
+def build_compact_bloom(ids, capacity):
+    visited = CompactIdSet(bloom_capacity=capacity)
+    for game_id in ids:
+        visited.add(game_id)
+    return visited
+
+
+STRUCTURES = {
+    "set[str]": build_set,
+    "dict[str]": build_dict,
+    "compact": build_compact,
+    "compact+bloom": build_compact_bloom,
+}
+
+
+def measure(builder, ids, probes):
+    # Create the string ids inside the measurement, as when they are parsed from API responses
+    gc.collect()
+    tracemalloc.start()
+    structure = builder((str(value) for value in ids), len(ids))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+
+    gc.collect()
+    start = time.perf_counter()
+    structure = builder((str(value) for value in ids), len(ids))
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = sum(1 for game_id in probes if game_id in structure)
+    lookup_seconds = time.perf_counter() - start
+    del structure
+    return retained, build_seconds, lookup_seconds, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark visited-set memory for large crawls")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--structures", default=",".join(STRUCTURES))
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'ids':>9}  {'structure':<14}{'memory MB':>11}{'bytes/id':>10}{'build s':>9}{'lookup us':>11}{'hits':>8}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        # Real universe ids are 9-10 digit numbers that the crawler handles as strings
+        ids = rng.sample(range(10 ** 8, 10 ** 10), size)
+        misses = (str(value) for value in rng.sample(range(10 ** 10, 2 * 10 ** 10), LOOKUPS // 2))
+        probes = [str(value) for value in rng.sample(ids, min(size, LOOKUPS // 2))] + list(misses)
+        for name in args.structures.split(","):
+            retained, build_seconds, lookup_seconds, hits = measure(STRUCTURES[name], ids, probes)
+            print(f"{size:>9}  {name:<14}{retained / 2 ** 20:>11.2f}{retained / size:>10.1f}"
+                  f"{build_seconds:>9.2f}{lookup_seconds / len(probes) * 1e6:>11.2f}{hits:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stand-in for the LLM used by LLMService.
+
+Serves POST .../chat/completions with configurable latency, token streaming,
+error / timeout injection and malformed JSON, so the use_llm search path can be
+measured and regression-tested offline.
+
+Usage:
+    python benchmarks/mock_llm_server.py --port 8089 --latency-ms 400
+    LLM_API_URL=http://localhost:8089/v1/chat/completions uvicorn main:app
+
+Runtime endpoints:
+    GET  /stats   request / connection counters (for connection-reuse checks)
+    POST /config  change fault-injection settings without restarting
+    POST /reset   zero the counters
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    "latency_ms": 300.0,     # Base time before the first byte
+    "jitter_ms": 50.0,       # Uniform +/- jitter added to latency
+    "tokens_per_sec": 200.0, # Streaming speed when the client asks for stream=true
+    "error_rate": 0.0,       # Fraction of requests answered with HTTP 500
+    "timeout_rate": 0.0,     # Fraction of requests that hang for hang_seconds
+    "hang_seconds": 60.0,
+    "malformed_rate": 0.0,   # Fraction of requests whose content is not valid JSON
+}
+
+
+class MockState:
+    def __init__(self, config):
+        self.lock = threading.Lock()
+        self.config = dict(config)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.connections = 0
+            self.errors = 0
+            self.timeouts = 0
+            self.malformed = 0
+            self.streamed = 0
+
+    def bump(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "requests_per_connection": round(self.requests / self.connections, 2) if self.connections else 0.0,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "malformed": self.malformed,
+                "streamed": self.streamed,
+                "config": dict(self.config),
+            }
+
+
+def build_completion_text(prompt):
+    """Produce a plausible enhance_search answer for the given prompt"""
+    query = "games"
+    marker = 'query: "'
+    if marker in prompt:
+        start = prompt.index(marker) + len(marker)
+        query = prompt[start:prompt.find('"', start)] or query
+    game_count = max(1, prompt.count("Game "))
+    answer = {
+        "ranking": list(range(1, game_count + 1)),
+        "alternative_queries": [f"{query} simulator", f"{query} obby", f"multiplayer {query}"],
+        "analysis": f"The top result matches '{query}' through its genre and high player count.",
+    }
+    return json.dumps(answer)
+
+
+def make_handler(state):
+    class MockLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse connections
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                return json.loads(raw or b"{}")
+            except ValueError:
+                return {}
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send_json(200, state.snapshot())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            path = self.path.rstrip("/")
+            body = self._read_body()
+
+            if path == "/config":
+                with state.lock:
+                    for key, value in body.items():
+                        if key in DEFAULT_CONFIG:
+                            state.config[key] = float(value)
+                self._send_json(200, state.snapshot())
+                return
+            if path == "/reset":
+                state.reset()
+                self._send_json(200, state.snapshot())
+                return
+            if not path.endswith("/chat/completions"):
+                self._send_json(404, {"error": "not found"})
+                return
+
+            state.bump("requests")
+            # One handler instance lives per TCP connection; count it on its first completion request
+            if not getattr(self, "counted_connection", False):
+                self.counted_connection = True
+                state.bump("connections")
+            with state.lock:
+                config = dict(state.config)
+
+            roll = random.random()
+            if roll < config["timeout_rate"]:
+                state.bump("timeouts")
+                time.sleep(config["hang_seconds"])
+                self.close_connection = True
+                return
+
+            delay = config["latency_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+            time.sleep(max(delay, 0.0) / 1000.0)
+
+            if roll < config["timeout_rate"] + config["error_rate"]:
+                state.bump("errors")
+                self._send_json(500, {"error": {"message": "injected upstream failure"}})
+                return
+
+            messages = body.get("messages") or [{}]
+            prompt = messages[-1].get("content", "")
+            if roll < config["timeout_rate"] + config["error_rate"] + config["malformed_rate"]:
+                state.bump("malformed")
+                content = '{"ranking": [1, 2, "alternative_queries": oops}'
+            else:
+                content = build_completion_text(prompt)
+
+            if body.get("stream"):
+                state.bump("streamed")
+                self._stream(content, body.get("model", "mock"), config["tokens_per_sec"])
+                return
+
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split())},
+            })
+
+        def _stream(self, content, model, tokens_per_sec):
+            """Send the completion as server-sent events, one whitespace token per chunk"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write_chunk(data):
+                encoded = data.encode("utf-8")
+                self.wfile.write(f"{len(encoded):x}\r\n".encode("ascii") + encoded + b"\r\n")
+                self.wfile.flush()
+
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            interval = 1.0 / tokens_per_sec if tokens_per_sec > 0 else 0.0
+            for token in content.split(" "):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}],
+                }
+                write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                if interval:
+                    time.sleep(interval)
+            write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return MockLLMHandler
+
+
+def start_server(host="127.0.0.1", port=8089, **config):
+    """Start the mock server on a background thread and return it"""
+    merged = dict(DEFAULT_CONFIG)
+    merged.update({k: float(v) for k, v in config.items() if v is not None})
+    state = MockState(merged)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    for key, value in DEFAULT_CONFIG.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float, default=value)
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in DEFAULT_CONFIG}
+    server = start_server(args.host, args.port, **config)
+    print(f"Mock LLM server listening on http://{args.host}:{args.port}/v1/chat/completions")
+    print(f"Config: {config}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Roblox endpoints used by the scraper.
+
+Serves a deterministic synthetic game graph through the same routes and JSON
+shapes as games.roblox.com and thumbnails.roblox.com, with configurable
+latency, 429 / 5xx injection, a server-side request rate limit and
+per-endpoint batch limits, so crawls can be benchmarked and rate-limit
+handling tested without touching the live API.
+
+    GET /v1/games/recommendations/game/{universeId}
+    GET /v1/games?universeIds=1,2,3
+    GET /v1/games/multiget/thumbnails?universeIds=1,2,3&format=png&size=768x432
+
+Game popularity follows a heavy-tailed distribution and recommendations lean
+towards popular games, like the real recommendation feed.
+
+Usage:
+    python benchmarks/mock_roblox_server.py --port 8090 --games 20000 --latency-ms 30
+    ROBLOX_GAMES_API=http://localhost:8090 ROBLOX_THUMBNAILS_API=http://localhost:8090 \\
+        python -m scraper.crawler --seed <seed from /stats> --target 5000
+
+Runtime endpoints:
+    GET  /stats   request counters per endpoint plus the suggested seed ids
+    POST /config  change latency / fault-injection settings without restarting
+    POST /reset   zero the counters
+"""
+
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_CONFIG = {
+    "latency_ms": 30.0,              # Base response time for every request
+    "jitter_ms": 10.0,               # Uniform +/- jitter added to latency
+    "throttle_rate": 0.0,            # Fraction of requests answered with 429
+    "error_rate": 0.0,               # Fraction of requests answered with 503
+    "rate_limit_rps": 0.0,           # Server-side limit across all endpoints, 0 = unlimited
+    "retry_after": 1.0,              # Retry-After seconds sent with every 429
+    "details_batch_limit": 50,       # Max universeIds per /v1/games request, more gives 400
+    "thumbnails_batch_limit": 100,   # Max universeIds per thumbnails request, more gives 400
+}
+
+GRAPH_DEFAULTS = {
+    "games": 20000,       # Number of games in the synthetic graph
+    "degree": 12,         # Recommendations returned per game
+    "popular_share": 0.5, # Fraction of recommendations drawn by popularity instead of locally
+    "seed": 42,
+}
+
+BASE_UNIVERSE_ID = 1000000000
+GENRES = ["Adventure", "Building", "Comedy", "Fighting", "FPS", "Horror", "Medieval", "Military",
+          "Naval", "RPG", "Sci-Fi", "Sports", "Town and City", "Western", "All"]
+SUBGENRES = ["Obby", "Tycoon", "Simulator", "Roleplay", "Tower Defense", "Survival", "Racing", "Puzzle"]
+
+
+class SyntheticGraph:
+    """Deterministic game graph: attributes and edges are derived from (seed, universe id)"""
+
+    def __init__(self, games, degree, popular_share, seed):
+        self.games = int(games)
+        self.degree = int(degree)
+        self.popular_share = popular_share
+        self.seed = int(seed)
+        rng = random.Random(self.seed)
+        # Pareto-distributed player counts: a few huge games and a long tail of empty ones
+        self.playing = [int(rng.paretovariate(1.1) * 3) - 3 for _ in range(self.games)]
+        self.cumulative = []
+        total = 0.0
+        for playing in self.playing:
+            total += playing + 1.0
+            self.cumulative.append(total)
+
+    def universe_id(self, index):
+        return BASE_UNIVERSE_ID + index
+
+    def index(self, universe_id):
+        try:
+            index = int(universe_id) - BASE_UNIVERSE_ID
+        except (TypeError, ValueError):
+            return None
+        return index if 0 <= index < self.games else None
+
+    def most_popular(self, count):
+        order = sorted(range(self.games), key=lambda i: self.playing[i], reverse=True)
+        return [str(self.universe_id(i)) for i in order[:count]]
+
+    def recommendations(self, index):
+        rng = random.Random(self.seed * 1000003 + index)
+        picks = []
+        for _ in range(self.degree):
+            if rng.random() < self.popular_share:
+                picked = bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])
+            else:
+                # Local neighbourhood: similar games sit close together in id space
+                picked = (index + int(rng.gauss(0, 50))) % self.games
+            if picked != index and picked not in picks:
+                picks.append(picked)
+        return [{
+            "universeId": self.universe_id(i),
+            "placeId": self.universe_id(i) * 10,
+            "name": f"Synthetic Game {i}",
+            "playerCount": self.playing[i],
+            "totalUpVotes": self.playing[i] * 5,
+            "totalDownVotes": self.playing[i],
+        } for i in picks]
+
+    def details(self, index):
+        rng = random.Random(self.seed * 7919 + index)
+        playing = self.playing[index]
+        genre = GENRES[index % len(GENRES)]
+        subgenre = SUBGENRES[rng.randrange(len(SUBGENRES))]
+        return {
+            "id": self.universe_id(index),
+            "rootPlaceId": self.universe_id(index) * 10,
+            "name": f"Synthetic Game {index}",
+            "description": f"A {subgenre.lower()} {genre.lower()} experience generated for crawler benchmarks.",
+            "creator": {"id": rng.randrange(1, 10 ** 8), "name": f"Creator{index % 997}", "type": "User"},
+            "price": None,
+            "allowedGearGenres": [genre],
+            "isGenreEnforced": False,
+            "copyingAllowed": False,
+            "playing": playing,
+            "visits": playing * rng.randrange(200, 2000) + rng.randrange(0, 5000),
+            "maxPlayers": rng.choice([1, 4, 6, 8, 10, 12, 20, 30, 50, 100]),
+            "created": "2021-01-01T00:00:00.000Z",
+            "updated": "2024-01-01T00:00:00.000Z",
+            "genre": genre,
+            "genre_l1": subgenre,
+            "genre_l2": genre,
+            "favoritedCount": playing * 3,
+        }
+
+    def thumbnail(self, index):
+        return {
+            "universeId": self.universe_id(index),
+            "error": None,
+            "thumbnails": [{
+                "targetId": self.universe_id(index) * 10,
+                "state": "Completed",
+                "imageUrl": f"https://tr.rbxcdn.com/mock/{self.universe_id(index)}/768/432/Image/Png",
+                "version": "TN3",
+            }],
+        }
+
+
+class MockState:
+    def __init__(self, config, graph):
+        self.lock = threading.Lock()
+        self.config = dict(config)
+        self.graph = graph
+        self.tokens = 0.0
+        self.tokens_updated = time.monotonic()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = {"recommendations": 0, "details": 0, "thumbnails": 0}
+            self.connections = 0
+            self.throttled = 0
+            self.errors = 0
+            self.rejected_batches = 0
+            self.ids_served = 0
+
+    def bump(self, counter, amount=1):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def count_request(self, endpoint):
+        with self.lock:
+            self.requests[endpoint] += 1
+
+    def over_rate_limit(self):
+        """Server-side token bucket shared by all endpoints"""
+        limit = self.config["rate_limit_rps"]
+        if limit <= 0:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(limit, self.tokens + (now - self.tokens_updated) * limit)
+            self.tokens_updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return False
+            return True
+
+    def snapshot(self):
+        with self.lock:
+            total = sum(self.requests.values())
+            return {
+                "requests": total,
+                "requests_by_endpoint": dict(self.requests),
+                "connections": self.connections,
+                "requests_per_connection": round(total / self.connections, 2) if self.connections else 0.0,
+                "throttled": self.throttled,
+                "errors": self.errors,
+                "rejected_batches": self.rejected_batches,
+                "ids_served": self.ids_served,
+                "games": self.graph.games,
+                "seed_ids": self.graph.most_popular(3),
+                "config": dict(self.config),
+            }
+
+
+def make_handler(state):
+    class MockRobloxHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            state.bump("connections")
+
+        def _send_json(self, status, body, headers=None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            try:
+                return json.loads(self.rfile.read(length))
+            except ValueError:
+                return {}
+
+        def _universe_ids(self, query):
+            raw = ",".join(query.get("universeIds", []))
+            return [value for value in raw.split(",") if value]
+
+        def _inject_faults(self):
+            """Apply latency, rate limiting and random 429/503; True if a fault response was sent"""
+            config = state.config
+            delay = config["latency_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+            if state.over_rate_limit() or random.random() < config["throttle_rate"]:
+                state.bump("throttled")
+                self._send_json(429, {"errors": [{"code": 0, "message": "Too many requests"}]},
+                                {"Retry-After": str(config["retry_after"])})
+                return True
+            if random.random() < config["error_rate"]:
+                state.bump("errors")
+                self._send_json(503, {"errors": [{"code": 0, "message": "Service unavailable"}]})
+                return True
+            return False
+
+        def _too_many_ids(self, ids, limit_key):
+            if len(ids) > state.config[limit_key]:
+                state.bump("rejected_batches")
+                self._send_json(400, {"errors": [{"code": 8, "message": "Too many ids"}]})
+                return True
+            return False
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            graph = state.graph
+
+            if url.path == "/stats":
+                self._send_json(200, state.snapshot())
+            elif url.path.startswith("/v1/games/recommendations/game/"):
+                state.count_request("recommendations")
+                if self._inject_faults():
+                    return
+                index = graph.index(url.path.rsplit("/", 1)[-1])
+                games = graph.recommendations(index) if index is not None else []
+                state.bump("ids_served", len(games))
+                self._send_json(200, {"games": games, "nextPaginationKey": None})
+            elif url.path == "/v1/games/multiget/thumbnails":
+                state.count_request("thumbnails")
+                if self._inject_faults():
+                    return
+                ids = self._universe_ids(query)
+                if self._too_many_ids(ids, "thumbnails_batch_limit"):
+                    return
+                data = [graph.thumbnail(i) for i in (graph.index(value) for value in ids) if i is not None]
+                state.bump("ids_served", len(data))
+                self._send_json(200, {"data": data})
+            elif url.path == "/v1/games":
+                state.count_request("details")
+                if self._inject_faults():
+                    return
+                ids = self._universe_ids(query)
+                if self._too_many_ids(ids, "details_batch_limit"):
+                    return
+                data = [graph.details(i) for i in (graph.index(value) for value in ids) if i is not None]
+                state.bump("ids_served", len(data))
+                self._send_json(200, {"data": data})
+            else:
+                self._send_json(404, {"errors": [{"code": 0, "message": "NotFound"}]})
+
+        def do_POST(self):
+            if self.path == "/config":
+                updates = self._read_body()
+                with state.lock:
+                    for key, value in updates.items():
+                        if key in state.config:
+                            state.config[key] = float(value)
+                self._send_json(200, {"config": dict(state.config)})
+            elif self.path == "/reset":
+                state.reset()
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"errors": [{"code": 0, "message": "NotFound"}]})
+
+    return MockRobloxHandler
+
+
+def start_server(host="127.0.0.1", port=8090, graph_options=None, **config):
+    """Start the mock server on a background thread and return it"""
+    merged = dict(DEFAULT_CONFIG)
+    merged.update({k: float(v) for k, v in config.items() if v is not None})
+    options = dict(GRAPH_DEFAULTS)
+    options.update(graph_options or {})
+    state = MockState(merged, SyntheticGraph(**options))
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Roblox games/thumbnails API for offline crawler benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    for key, value in GRAPH_DEFAULTS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    for key, value in DEFAULT_CONFIG.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float, default=value)
+    args = parser.parse_args()
+
+    graph_options = {key: getattr(args, key) for key in GRAPH_DEFAULTS}
+    config = {key: getattr(args, key) for key in DEFAULT_CONFIG}
+    server = start_server(args.host, args.port, graph_options=graph_options, **config)
+    print(f"Mock Roblox API listening on http://{args.host}:{args.port}")
+    print(f"Graph: {graph_options}, seed ids: {server.state.graph.most_popular(3)}")
+    print(f"Config: {config}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Pipeline orchestrator: scrape -> merge -> graph -> embed/index
+
+Replaces the step list in run_pipeline.sh. Each stage runs as a subprocess
+(the same commands cron used to run) and reports its item counts through a
+--stats-json file. The orchestrator:
+
+- holds an exclusive file lock so overlapping cron runs exit immediately
+- skips a stage when the digest of its input files equals the digest from its
+  last successful run (scraping has no local inputs and always runs; indexing
+  always runs because the index can change or vanish without its input
+  changing, and auto_reindex --check is a cheap no-op when nothing did)
+- records per-stage status, duration, item count and throughput in
+  data/pipeline_runs.ndjson (one run per line) and data/pipeline_latest.json,
+  which the API serves at /api/admin/pipeline/latest
+
+Usage (scheduler container, from /app):
+    python pipeline.py --strategy bfs --target 10000
+    python pipeline.py --mode stream
+    python pipeline.py --skip-scrape --force
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+# backend/ and scraper/ sit next to this file in the container (/app) and one level up in the repository
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.environ.get("PIPELINE_APP_DIR", HERE if os.path.isdir(os.path.join(HERE, "backend"))
+                         else os.path.dirname(HERE))
+
+LOCK_FILE = "pipeline.lock"
+HISTORY_FILE = "pipeline_runs.ndjson"
+LATEST_FILE = "pipeline_latest.json"
+STATE_FILE = "pipeline_state.json"  # Input digest of each stage's last successful run
+
+SCRAPER_OUTPUTS = ["roblox_games_gg.ndjson", "roblox_games_gg.ndjson.zst", "roblox_games_gg.json"]
+CRAWL_STATE_FILE = "crawl_state.sqlite"
+EDGES_FILE = "roblox_edges.ndjson"
+GRAPH_FILE = "roblox_graph.npz"
+MERGED_FILE = "roblox_data.json"
+
+OK = "ok"
+SKIPPED = "skipped"
+FAILED = "failed"
+NOT_RUN = "not_run"
+
+
+class Stage:
+    """
+    One pipeline step
+
+    - command: argv, run from cwd; "{stats}" is replaced by the --stats-json path
+    - inputs: data files whose digest decides whether the stage can be skipped
+      (None = always run, e.g. the crawler whose input is the live API)
+    - count_items: stats dict -> number of items the stage processed
+    - required_input: skip the stage when none of its inputs exists
+    - skip_unchanged: False to run the stage even when its inputs are unchanged
+    """
+
+    def __init__(self, name, command, cwd, inputs=None, count_items=None, required_input=False,
+                 skip_unchanged=True):
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.inputs = inputs
+        self.count_items = count_items or (lambda stats: None)
+        self.required_input = required_input
+        self.skip_unchanged = skip_unchanged
+
+
+def file_digest(paths):
+    """sha1 over the content of the existing files, in order; None when none exists"""
+    digest = hashlib.sha1()
+    found = False
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        found = True
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest() if found else None
+
+
+def build_stages(args):
+    python = sys.executable
+    data_dir = args.data_dir
+    backend_dir = os.path.join(APP_DIR, "backend")
+    crawl_options = ["--strategy", args.strategy, "--target", str(args.target)]
+    graph = Stage("graph",
+                  [python, "-m", "backend.game_graph", "--edges", os.path.join(data_dir, EDGES_FILE),
+                   "--output", os.path.join(data_dir, GRAPH_FILE), "--stats-json", "{stats}"],
+                  APP_DIR, inputs=[os.path.join(data_dir, EDGES_FILE)],
+                  count_items=lambda stats: stats.get("edges"), required_input=True)
+
+    if args.mode == "stream":
+        return [
+            Stage("stream", [python, "-m", "backend.stream_pipeline", *crawl_options,
+                             "--data-dir", data_dir, "--edges", os.path.join(data_dir, EDGES_FILE),
+                             "--stats-json", "{stats}"],
+                  APP_DIR, count_items=lambda stats: stats.get("crawl", {}).get("games")),
+            graph,
+        ]
+
+    stages = []
+    if not args.skip_scrape:
+        stages.append(Stage("scrape", [python, "-m", "scraper.crawler", *crawl_options,
+                                       "--output", os.path.join(data_dir, SCRAPER_OUTPUTS[0]),
+                                       "--edges", os.path.join(data_dir, EDGES_FILE),
+                                       "--state", os.path.join(data_dir, CRAWL_STATE_FILE),
+                                       "--stats-json", "{stats}"],
+                            APP_DIR, count_items=lambda stats: stats.get("games")))
+    stages += [
+        Stage("merge", [python, "-m", "backend.merge_games", "--data-dir", data_dir, "--stats-json", "{stats}"],
+              APP_DIR, inputs=[os.path.join(data_dir, name) for name in SCRAPER_OUTPUTS],
+              count_items=lambda stats: sum(stats.get(key, 0) for key in ("added", "updated", "unchanged")),
+              required_input=True),
+        graph,
+        # auto_reindex embeds and indexes in one pass; --check picks no-op / partial update / rebuild.
+        # Never skipped on an unchanged dataset: the index may have been lost or recreated meanwhile
+        Stage("index", [python, "auto_reindex.py", "--check", "--data-dir", data_dir, "--stats-json", "{stats}"],
+              backend_dir, inputs=[os.path.join(data_dir, MERGED_FILE)],
+              count_items=lambda stats: stats.get("documents"), required_input=True, skip_unchanged=False),
+    ]
+    return stages
+
+
+def run_stage(stage, state, force):
+    """Run (or skip) one stage and return its report entry"""
+    entry = {"name": stage.name, "started_at": datetime.now().isoformat()}
+    digest = file_digest(stage.inputs) if stage.inputs is not None else None
+    entry["input_digest"] = digest
+    if stage.inputs is not None and digest is None and stage.required_input:
+        entry.update(status=SKIPPED, reason="input missing", duration_seconds=0.0)
+        return entry
+    if not force and stage.skip_unchanged and digest is not None and state.get(stage.name) == digest:
+        entry.update(status=SKIPPED, reason="inputs unchanged since last successful run", duration_seconds=0.0)
+        return entry
+
+    with tempfile.NamedTemporaryFile("r", suffix=".json", prefix=f"pipeline-{stage.name}-") as stats_file:
+        command = [stats_file.name if part == "{stats}" else part for part in stage.command]
+        print(f"[pipeline] {stage.name}: {' '.join(command)}", flush=True)
+        start = time.monotonic()
+        exit_code = subprocess.call(command, cwd=stage.cwd)
+        duration = time.monotonic() - start
+        try:
+            stats = json.load(stats_file)
+        except ValueError:
+            stats = {}
+
+    items = stage.count_items(stats) if stats else None
+    entry.update(
+        status=OK if exit_code == 0 else FAILED,
+        exit_code=exit_code,
+        duration_seconds=round(duration, 2),
+        items=items,
+        items_per_second=round(items / duration, 2) if items and duration > 0 else None,
+        stats=stats,
+    )
+    if exit_code == 0 and digest is not None:
+        state[stage.name] = digest
+    return entry
+
+
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_pipeline(args):
+    data_dir = args.data_dir
+    os.makedirs(data_dir, exist_ok=True)
+    lock = open(os.path.join(data_dir, LOCK_FILE), "a+")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.seek(0)
+        print(f"[pipeline] Another run holds {LOCK_FILE} ({lock.read().strip() or 'unknown'}) - skipping this run")
+        lock.close()
+        return 0
+
+    try:
+        lock.seek(0)
+        lock.truncate()
+        lock.write(f"pid {os.getpid()} since {datetime.now().isoformat()}\n")
+        lock.flush()
+
+        state_path = os.path.join(data_dir, STATE_FILE)
+        state = load_json(state_path, {})
+        report = {"run_id": uuid.uuid4().hex[:12], "mode": args.mode, "started_at": datetime.now().isoformat(),
+                  "stages": []}
+        start = time.monotonic()
+        status = OK
+        for stage in build_stages(args):
+            if status == FAILED:
+                report["stages"].append({"name": stage.name, "status": NOT_RUN})
+                continue
+            entry = run_stage(stage, state, args.force)
+            report["stages"].append(entry)
+            print(f"[pipeline] {stage.name}: {entry['status']} in {entry['duration_seconds']:.2f}s"
+                  + (f", {entry['items']} items" if entry.get("items") is not None else "")
+                  + (f" ({entry['reason']})" if entry.get("reason") else ""), flush=True)
+            if entry["status"] == FAILED:
+                status = FAILED
+            else:
+                write_json_atomic(state_path, state)
+
+        report.update(status=status, finished_at=datetime.now().isoformat(),
+                      duration_seconds=round(time.monotonic() - start, 2))
+        with open(os.path.join(data_dir, HISTORY_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+        write_json_atomic(os.path.join(data_dir, LATEST_FILE), report)
+        print(f"[pipeline] Run {report['run_id']} {status} in {report['duration_seconds']:.2f}s")
+        return 0 if status == OK else 1
+    finally:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        lock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Roblox data pipeline with locking, timings and skip logic")
+    parser.add_argument("--mode", choices=["batch", "stream"], default=os.environ.get("PIPELINE_MODE", "batch"))
+    parser.add_argument("--strategy", default=os.environ.get("CRAWL_STRATEGY", "bfs"))
+    parser.add_argument("--target", type=int, default=int(os.environ.get("CRAWL_TARGET", "10000")))
+    parser.add_argument("--data-dir", default=os.path.join(APP_DIR, "data"))
+    parser.add_argument("--skip-scrape", action="store_true", help="Only process the data already on disk")
+    parser.add_argument("--force", action="store_true", help="Run every stage even if its inputs are unchanged")
+    args = parser.parse_args()
+    args.data_dir = os.path.abspath(args.data_dir)
+
+    try:
+        return run_pipeline(args)
+    except Exception as e:
+        print(f"[pipeline] Error: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    exit(exit_code)
@@ -1,5 +1,4 @@
 #!/bin/bash
-set -e  # Exit immediately if a command exits with non-zero status
 
 # Add a test message to verify cron is executing the script
 echo "=======================================" >> /var/log/cron.log
@@ -9,35 +8,17 @@ echo "=======================================" >> /var/log/cron.log
 # Log start time
 echo "Starting Roblox data pipeline - $(date)"
 
-# Step 1: Run the scraper and wait for completion
-echo "Step 1: Running BFS scraper"
+# The orchestrator runs scrape -> merge -> graph -> index (or the streaming
+# pipeline when PIPELINE_MODE=stream), skips stages whose inputs did not change
+# and records per-stage timings in data/pipeline_runs.ndjson. It holds
+# data/pipeline.lock, so a run that overlaps the previous one exits right away.
 cd /app
-/usr/local/bin/python -m scraper.RobloxScraperBFS
+/usr/local/bin/python /app/pipeline.py --mode "${PIPELINE_MODE:-batch}" \
+    --strategy "${CRAWL_STRATEGY:-bfs}" --target "${CRAWL_TARGET:-10000}"
 if [ $? -ne 0 ]; then
-    echo "Error: Scraper failed"
+    echo "Error: Pipeline failed - see data/pipeline_latest.json"
     exit 1
 fi
-echo "Scraper completed successfully"
-
-# Step 2: Merge games
-echo "Step 2: Merging game data"
-cd /app
-/usr/local/bin/python -m backend.merge_games
-if [ $? -ne 0 ]; then
-    echo "Error: Merge failed"
-    exit 1
-fi
-echo "Merge completed successfully"
-
-# Step 3: Index in Elasticsearch (with auto flag for no prompts)
-echo "Step 3: Indexing data in Elasticsearch"
-cd /app/backend
-/usr/local/bin/python index_data.py --auto --force
-if [ $? -ne 0 ]; then
-    echo "Error: Indexing failed"
-    exit 1
-fi
-echo "Indexing completed successfully"
 
 # Log completion
-echo "Pipeline completed successfully - $(date)"
\ No newline at end of file
+echo "Pipeline completed successfully - $(date)"
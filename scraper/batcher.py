@@ -0,0 +1,164 @@
+import asyncio
+
+from scraper.roblox_api import (DETAILS_BATCH_LIMIT, THUMBNAILS_BATCH_LIMIT,
+                                fetch_games_details, fetch_games_thumbnails)
+
+
+class EndpointBatcher:
+    """
+    Mengemas universe ID menjadi batch sebesar mungkin untuk satu endpoint.
+
+    Batch dikirim begitu penuh atau setelah menunggu `linger` detik, dengan
+    maksimal `max_in_flight` request bersamaan. Jika request gagal, ID-nya
+    dicoba ulang sampai `max_retries` dan ukuran batch diperkecil, lalu
+    dinaikkan lagi ke batas endpoint setelah request berhasil. ID yang tidak
+    ada di respons yang berhasil tidak dicoba ulang: endpoint thumbnail
+    memang melewatkan game tanpa ikon, jadi retry hanya membuang request.
+    """
+
+    def __init__(self, name, fetch, max_batch, on_result, on_give_up,
+                 max_in_flight=4, linger=0.05, max_retries=2, min_batch=5):
+        self.name = name
+        self.fetch = fetch
+        self.max_batch = max_batch
+        self.batch_size = max_batch
+        self.min_batch = min(min_batch, max_batch)
+        self.on_result = on_result
+        self.on_give_up = on_give_up
+        self.linger = linger
+        self.max_retries = max_retries
+        self.max_in_flight = max_in_flight
+        # Di Python 3.9 Queue/Semaphore terikat ke event loop saat dibuat,
+        # jadi keduanya baru dibuat saat pertama dipakai di dalam loop yang berjalan
+        self._queue = None
+        self._in_flight = None
+        self.batches_sent = 0
+        self.retried_ids = 0
+        self._tasks = set()
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    @property
+    def in_flight(self):
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._in_flight
+
+    def submit(self, game_id, attempt=0):
+        self.queue.put_nowait((game_id, attempt))
+
+    async def run(self, session, limiter, stats):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self.in_flight.acquire()
+            task = asyncio.create_task(self._dispatch(session, limiter, stats, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, session, limiter, stats, batch):
+        try:
+            self.batches_sent += 1
+            results = await self.fetch(session, limiter, [game_id for game_id, _ in batch], stats)
+            if results is None:
+                # Seluruh request gagal: kecilkan batch dan ulangi semua ID
+                self.batch_size = max(self.min_batch, self.batch_size // 2)
+            else:
+                self.batch_size = min(self.max_batch, self.batch_size * 2)
+
+            for game_id, attempt in batch:
+                if results is not None and game_id in results:
+                    self.on_result(game_id, results[game_id])
+                elif results is not None:
+                    # Respons berhasil tapi tanpa ID ini: endpoint tidak punya datanya
+                    self.on_give_up(game_id)
+                elif attempt < self.max_retries:
+                    self.retried_ids += 1
+                    self.submit(game_id, attempt + 1)
+                else:
+                    self.on_give_up(game_id)
+        finally:
+            self.in_flight.release()
+            for _ in batch:
+                self.queue.task_done()
+
+
+class DetailBatcher:
+    """
+    Tahap batching detail + thumbnail yang berjalan terpisah dari ekspansi frontier.
+
+    Setiap ID yang di-submit dikirim ke dua EndpointBatcher (detail dan
+    thumbnail) yang berjalan bersamaan. Game dianggap selesai saat kedua
+    endpoint sudah menjawab, lalu `on_complete(game_id, details)` dipanggil
+    (details None jika detail game tidak bisa diambil).
+    """
+
+    def __init__(self, on_complete, details_batch=DETAILS_BATCH_LIMIT, thumbnails_batch=THUMBNAILS_BATCH_LIMIT,
+                 max_in_flight=4, max_retries=2):
+        self.on_complete = on_complete
+        self.details = {}
+        self.thumbnails = {}
+        self.details_batcher = EndpointBatcher(
+            'details', fetch_games_details, details_batch,
+            self._on_details, lambda game_id: self._on_details(game_id, None),
+            max_in_flight=max_in_flight, max_retries=max_retries)
+        self.thumbnails_batcher = EndpointBatcher(
+            'thumbnails', fetch_games_thumbnails, thumbnails_batch,
+            self._on_thumbnail, lambda game_id: self._on_thumbnail(game_id, None),
+            max_in_flight=max_in_flight, max_retries=max_retries)
+        self._runners = []
+
+    def start(self, session, limiter, stats):
+        self._runners = [
+            asyncio.create_task(self.details_batcher.run(session, limiter, stats)),
+            asyncio.create_task(self.thumbnails_batcher.run(session, limiter, stats)),
+        ]
+
+    def submit(self, game_id, thumbnail=True):
+        """Antrekan game; thumbnail=False untuk refresh yang hanya butuh detail terbaru"""
+        self.details_batcher.submit(game_id)
+        if thumbnail:
+            self.thumbnails_batcher.submit(game_id)
+        else:
+            self.thumbnails[game_id] = None
+
+    def _on_details(self, game_id, details):
+        self.details[game_id] = details
+        self._maybe_complete(game_id)
+
+    def _on_thumbnail(self, game_id, image_url):
+        self.thumbnails[game_id] = image_url
+        self._maybe_complete(game_id)
+
+    def _maybe_complete(self, game_id):
+        if game_id not in self.details or game_id not in self.thumbnails:
+            return
+        details = self.details.pop(game_id)
+        image_url = self.thumbnails.pop(game_id)
+        if details is not None:
+            details['universeId'] = game_id
+            if image_url:
+                details['imageUrl'] = image_url
+        self.on_complete(game_id, details)
+
+    async def close(self):
+        """Tunggu semua batch (termasuk retry) selesai lalu hentikan packer"""
+        await self.details_batcher.queue.join()
+        await self.thumbnails_batcher.queue.join()
+        for task in self._runners:
+            task.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+
+DEFAULT_STATE_FILE = './data/crawl_state.sqlite'
+
+
+class CrawlState:
+    """
+    Penyimpanan state crawl yang tahan crash (SQLite mode WAL).
+
+    - frontier: semua ID yang pernah dimasukkan ke frontier, berurutan, dengan prioritasnya
+    - visited: ID yang rekomendasinya sudah selesai diproses
+    - games: ID yang sudah terkumpul, data NULL selama detailnya belum diambil
+    - refresh_log: waktu refresh terakhir tiap game (tidak dihapus saat crawl baru)
+
+    Frontier aktif = ID di tabel frontier yang belum ada di visited, sehingga
+    checkpoint cukup menulis perubahan (delta) sejak checkpoint sebelumnya.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (seq INTEGER PRIMARY KEY AUTOINCREMENT, game_id TEXT NOT NULL,
+                                                 priority REAL NOT NULL DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS visited (game_id TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS games (game_id TEXT PRIMARY KEY, data TEXT);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS refresh_log (game_id TEXT PRIMARY KEY, refreshed_at REAL NOT NULL);
+        """)
+        self.conn.commit()
+
+    def reset(self):
+        """Hapus state lama untuk crawl baru"""
+        with self.conn:
+            for table in ("frontier", "visited", "games", "meta"):
+                self.conn.execute(f"DELETE FROM {table}")
+
+    def has_state(self):
+        return self.conn.execute("SELECT 1 FROM frontier LIMIT 1").fetchone() is not None
+
+    def load_frontier(self):
+        """Frontier aktif berurutan: pasangan (ID, prioritas) yang belum ada di visited"""
+        return self.conn.execute("""
+            SELECT game_id, priority FROM frontier
+            WHERE game_id NOT IN (SELECT game_id FROM visited)
+            GROUP BY game_id ORDER BY MIN(seq)""").fetchall()
+
+    def iter_visited(self):
+        return (row[0] for row in self.conn.execute("SELECT game_id FROM visited"))
+
+    def iter_games(self, completed):
+        """ID game yang sudah lengkap (completed=True) atau masih menunggu detail; data tidak dimuat ke memori"""
+        condition = "IS NOT NULL" if completed else "IS NULL"
+        return (row[0] for row in self.conn.execute(f"SELECT game_id FROM games WHERE data {condition}"))
+
+    def last_refreshed(self):
+        """Dict universe ID -> timestamp refresh terakhir"""
+        return dict(self.conn.execute("SELECT game_id, refreshed_at FROM refresh_log"))
+
+    def checkpoint(self, enqueued=(), processed=(), discovered=(), completed=(), refreshed=()):
+        """
+        Tulis delta sejak checkpoint terakhir dalam satu transaksi
+
+        Parameters:
+        - enqueued: pasangan (ID, prioritas) yang dimasukkan ke frontier
+        - processed: ID yang rekomendasinya sudah selesai diproses
+        - discovered: ID baru yang menunggu detail
+        - completed: pasangan (ID, data game) yang detailnya sudah lengkap
+        - refreshed: pasangan (ID, timestamp) game lama yang detailnya sudah di-refresh
+        """
+        with self.conn:
+            self.conn.executemany("INSERT INTO frontier (game_id, priority) VALUES (?, ?)", enqueued)
+            self.conn.executemany("INSERT OR IGNORE INTO visited (game_id) VALUES (?)", ((i,) for i in processed))
+            self.conn.executemany("INSERT OR IGNORE INTO games (game_id, data) VALUES (?, NULL)", ((i,) for i in discovered))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO games (game_id, data) VALUES (?, ?)",
+                ((game_id, json.dumps(data, ensure_ascii=False)) for game_id, data in completed))
+            self.conn.executemany("INSERT OR REPLACE INTO refresh_log (game_id, refreshed_at) VALUES (?, ?)", refreshed)
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def close(self):
+        self.conn.close()
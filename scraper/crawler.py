@@ -0,0 +1,432 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+import aiohttp
+
+from scraper.batcher import DetailBatcher
+from scraper.crawl_state import DEFAULT_STATE_FILE, CrawlState
+from scraper.frontier import FRONTIER_STRATEGIES, create_frontier
+from scraper.refresh import KNOWN_GAMES_FILE, RefreshScheduler, load_known_games
+from scraper.rate_limiter import TokenBucket
+from scraper.roblox_api import (DETAILS_BATCH_LIMIT, HEADERS,
+                                THUMBNAILS_BATCH_LIMIT, CrawlStats,
+                                fetch_recommendations)
+from scraper.sink import NDJSONSink, iter_records
+from scraper.visited import CompactIdSet
+
+# Konfigurasi
+INITIAL_GAME_ID = '7018190066'
+TARGET_GAME_COUNT = 10000
+STRATEGY = 'bfs'  # bfs, dfs, atau best (best-first menurut playerCount)
+CONCURRENCY = 8  # Jumlah worker rekomendasi yang berjalan bersamaan
+REQUESTS_PER_SECOND = 20.0  # Batas global untuk semua endpoint
+OUTPUT_FILE = './data/roblox_games_gg.ndjson'  # Tambahkan .zst untuk kompresi zstd
+EDGES_FILE = './data/roblox_edges.ndjson'  # Edge rekomendasi {"source", "targets"} untuk backend/game_graph.py
+PROGRESS_INTERVAL = 5.0
+CHECKPOINT_INTERVAL = 10.0  # Detik antar checkpoint state ke SQLite
+DISCOVERY_RATIO = 0.25  # Mode refresh: porsi request untuk mencari game baru
+DISCOVERY_SEEDS = 20  # Mode refresh: jumlah game terpopuler sebagai seed penemuan
+
+
+class CrawlerEngine:
+    """
+    Crawler asyncio dengan strategi frontier yang bisa dipilih (lihat scraper/frontier.py).
+
+    N worker rekomendasi mengambil game dari frontier bersama, semua request
+    melewati satu TokenBucket global dan satu connection pool keep-alive.
+    Detail dan thumbnail diambil oleh DetailBatcher yang berjalan terpisah.
+    Crawl berhenti saat frontier habis, target tercapai, atau batas
+    `max_requests` / `max_seconds` terlampaui.
+    """
+
+    def __init__(self, initial_ids, target=TARGET_GAME_COUNT, strategy=STRATEGY, concurrency=CONCURRENCY,
+                 rate=REQUESTS_PER_SECOND, details_batch=DETAILS_BATCH_LIMIT,
+                 thumbnails_batch=THUMBNAILS_BATCH_LIMIT, state=None, resume=False, sink=None,
+                 refresh_scheduler=None, refresh_limit=0, discovery_ratio=DISCOVERY_RATIO,
+                 max_requests=0, max_seconds=0, edge_sink=None, backpressure=None):
+        self.initial_ids = [str(game_id) for game_id in initial_ids]
+        self.target = target
+        self.strategy = strategy
+        self.concurrency = concurrency
+        self.max_requests = max_requests
+        self.max_seconds = max_seconds
+        self.limiter = TokenBucket(rate)
+        self.stats = CrawlStats()
+
+        # Record lengkap langsung dialirkan ke sink; di memori hanya disimpan ID numerik yang ringkas
+        self.collected_games = CompactIdSet()  # Semua ID yang dikumpulkan, termasuk yang menunggu detail
+        self.completed_count = 0
+        self.visited_for_recommendations = CompactIdSet()
+        # Frontier dan event berhenti dibuat di run(): di Python 3.9 primitive asyncio
+        # terikat ke event loop saat dibuat, sedangkan engine dibuat sebelum asyncio.run()
+        self.frontier = None
+        self.stopped = None
+        self.batcher = DetailBatcher(self.on_game_complete, details_batch=details_batch,
+                                     thumbnails_batch=thumbnails_batch)
+        self.started_at = None
+        self.sink = sink
+        self.edge_sink = edge_sink
+        # Callable opsional yang bernilai True selama konsumen sink (mis. pipeline indexing) masih penuh
+        self.backpressure = backpressure
+        self.total_visits = 0
+
+        # Mode refresh: game lama di-refresh lewat detail saja, tanpa graf rekomendasi
+        self.refresh_scheduler = refresh_scheduler
+        self.refresh_limit = refresh_limit
+        self.discovery_ratio = discovery_ratio
+        self.known_ids = refresh_scheduler.known_ids if refresh_scheduler else CompactIdSet()
+        self.refresh_pending = set()
+        self.refreshed_count = 0
+        self.refresh_requests = 0
+        self.discovery_requests = 0
+        self._new_refreshed = []
+
+        # State tahan crash: perubahan dikumpulkan lalu ditulis per checkpoint
+        self.state = state
+        self.resume = resume
+        self._new_enqueued = []
+        self._new_processed = []
+        self._new_discovered = []
+        self._new_completed = []
+
+    @property
+    def valid_count(self):
+        return self.completed_count
+
+    def throughput(self):
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0
+        return self.valid_count / elapsed if elapsed > 0 else 0.0
+
+    def requests_per_game(self):
+        valid = self.valid_count
+        return self.stats.requests / valid if valid else 0.0
+
+    def games_per_request(self):
+        return self.valid_count / self.stats.requests if self.stats.requests else 0.0
+
+    def limit_reached(self):
+        """Batas request untuk benchmark antar strategi; batas waktu ditangani di run()"""
+        return bool(self.max_requests) and self.stats.requests >= self.max_requests
+
+    def on_game_complete(self, game_id, details):
+        """Callback dari DetailBatcher saat detail dan thumbnail sebuah game sudah lengkap"""
+        if game_id in self.refresh_pending:
+            self.refresh_pending.discard(game_id)
+            if details is not None:
+                if self.sink:
+                    self.sink.write(details)
+                self.refreshed_count += 1
+                self._new_refreshed.append((game_id, time.time()))
+            return
+        if details is not None:
+            # Record langsung dialirkan ke sink, di memori cukup dihitung
+            if self.sink:
+                self.sink.write(details)
+            self.total_visits += details.get('visits') or 0
+            self.completed_count += 1
+            self._new_completed.append((game_id, details))
+
+    def enqueue(self, game_id, priority=0):
+        self.frontier.push(game_id, priority)
+        self._new_enqueued.append((game_id, priority))
+
+    def is_new(self, game_id):
+        return game_id not in self.collected_games and game_id not in self.known_ids
+
+    def discover(self, game_id):
+        self.collected_games.add(game_id)
+        self._new_discovered.append(game_id)
+        self.batcher.submit(game_id)
+
+    def checkpoint(self):
+        """Simpan delta state sejak checkpoint terakhir"""
+        if not self.state:
+            return
+        enqueued, self._new_enqueued = self._new_enqueued, []
+        processed, self._new_processed = self._new_processed, []
+        discovered, self._new_discovered = self._new_discovered, []
+        completed, self._new_completed = self._new_completed, []
+        refreshed, self._new_refreshed = self._new_refreshed, []
+        self.state.checkpoint(enqueued, processed, discovered, completed, refreshed)
+
+    async def checkpoint_periodically(self):
+        while True:
+            await asyncio.sleep(CHECKPOINT_INTERVAL)
+            self.checkpoint()
+
+    def restore(self):
+        """Muat frontier, visited dan koleksi dari state sebelumnya (mode --resume)"""
+        frontier = self.state.load_frontier()
+        self.visited_for_recommendations.update(self.state.iter_visited())
+        self.collected_games.update(self.state.iter_games(completed=True))
+        self.completed_count = len(self.collected_games)
+        for game_id, priority in frontier:
+            self.frontier.push(game_id, priority)
+        pending = list(self.state.iter_games(completed=False))
+        self.collected_games.update(pending)
+        recovered = self.recover_written(pending)
+        pending = [game_id for game_id in pending if game_id not in recovered]
+        for game_id in pending:
+            self.batcher.submit(game_id)
+        print(f"Melanjutkan crawl: frontier {len(frontier)}, visited {len(self.visited_for_recommendations)}, "
+              f"terkumpul {self.valid_count} ({len(recovered)} dipulihkan dari output), menunggu detail {len(pending)}")
+
+    def recover_written(self, pending):
+        """
+        Pulihkan game yang sudah ditulis ke sink tapi belum tercatat selesai,
+        karena crash terjadi sebelum checkpoint berikutnya. Semua ID di file
+        output dianggap selesai, baik yang masih menunggu detail di state
+        maupun yang belum tercatat sama sekali, supaya tidak diambil ulang
+        dan ditulis dua kali.
+
+        Returns:
+        - set ID di `pending` yang ternyata sudah ada di output
+        """
+        output = getattr(self.sink, 'path', None)
+        if not output or not os.path.exists(output):
+            return set()
+        pending = set(pending)
+        recovered = set()
+        for record in iter_records(output):
+            if record.get('id') is None:
+                continue
+            game_id = str(record['id'])
+            if game_id in pending:
+                pending.discard(game_id)
+                recovered.add(game_id)
+            elif game_id in self.collected_games:
+                continue  # Sudah tercatat selesai (atau duplikat di output)
+            else:
+                self.collected_games.add(game_id)
+            self.total_visits += record.get('visits') or 0
+            self.completed_count += 1
+            self._new_completed.append((game_id, record))
+        return recovered
+
+    def discovery_allowed(self):
+        """Mode refresh: penemuan hanya boleh memakai `discovery_ratio` dari total request"""
+        if not self.refresh_scheduler or self.discovery_ratio >= 1:
+            return True
+        budget = self.discovery_ratio / (1 - self.discovery_ratio) * self.refresh_requests
+        return self.discovery_requests < budget + 1
+
+    async def recommendation_worker(self, session):
+        """Worker yang mengambil game dari frontier dan menambahkan rekomendasinya"""
+        while True:
+            while not self.discovery_allowed() or (self.backpressure and self.backpressure()):
+                await asyncio.sleep(0.05)
+            if self.limit_reached():
+                # Sisa frontier tetap di state sehingga bisa dilanjutkan dengan --resume
+                self.stopped.set()
+                return
+            current_game_id = await self.frontier.get()
+            try:
+                if current_game_id in self.visited_for_recommendations:
+                    continue
+                self.visited_for_recommendations.add(current_game_id)
+                if len(self.collected_games) >= self.target:
+                    continue
+
+                self.discovery_requests += 1
+                recommendations = await fetch_recommendations(session, self.limiter, current_game_id, self.stats)
+                if self.edge_sink and recommendations:
+                    self.edge_sink.write({"source": current_game_id,
+                                          "targets": [game_id for game_id, _ in recommendations]})
+                for game_id, player_count in recommendations:
+                    if self.is_new(game_id) and len(self.collected_games) < self.target:
+                        self.discover(game_id)
+                    if game_id not in self.visited_for_recommendations:
+                        self.enqueue(game_id, player_count)
+                # Baru dianggap visited di state setelah anak-anaknya masuk frontier
+                self._new_processed.append(current_game_id)
+            finally:
+                self.frontier.task_done()
+
+    async def refresh_worker(self):
+        """Masukkan game lama ke batcher detail sesuai urutan prioritas refresh"""
+        batch_size = self.batcher.details_batcher.max_batch
+        submitted = 0
+        while len(self.refresh_scheduler) and (not self.refresh_limit or submitted < self.refresh_limit):
+            size = batch_size if not self.refresh_limit else min(batch_size, self.refresh_limit - submitted)
+            for game_id in self.refresh_scheduler.next_batch(size):
+                self.refresh_pending.add(game_id)
+                self.batcher.submit(game_id, thumbnail=False)
+                submitted += 1
+            self.refresh_requests += 1
+            # Backpressure: jangan menumpuk lebih dari beberapa batch di antrean detail
+            while self.batcher.details_batcher.queue.qsize() > batch_size * 4:
+                await asyncio.sleep(0.05)
+
+    async def report_progress(self):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            print(f"[{self.strategy}] Frontier: {self.frontier.qsize()}, Terkumpul: {self.valid_count}/{self.target}, "
+                  f"Request: {self.stats.requests}, 429: {self.stats.throttled}, "
+                  f"Rate: {self.limiter.rate:.1f} req/s, Throughput: {self.throughput():.2f} game/s, "
+                  f"Game/request: {self.games_per_request():.2f}"
+                  + (f", Refresh: {self.refreshed_count}" if self.refresh_scheduler else ""))
+
+    async def run(self):
+        self.started_at = time.monotonic()
+        self.frontier = create_frontier(self.strategy)
+        self.stopped = asyncio.Event()
+        discovery_workers = self.concurrency
+        if self.refresh_scheduler and self.discovery_ratio <= 0:
+            discovery_workers = 0
+
+        if self.state and self.resume and self.state.has_state():
+            self.restore()
+        else:
+            if self.state:
+                self.state.reset()
+            if discovery_workers:
+                for game_id in self.initial_ids:
+                    if self.is_new(game_id):
+                        self.discover(game_id)
+                    self.enqueue(game_id)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency * 2, keepalive_timeout=60, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=timeout) as session:
+            self.batcher.start(session, self.limiter, self.stats)
+            workers = [asyncio.create_task(self.recommendation_worker(session)) for _ in range(discovery_workers)]
+            refresher = asyncio.create_task(self.refresh_worker()) if self.refresh_scheduler else None
+            background = [asyncio.create_task(self.report_progress()),
+                          asyncio.create_task(self.checkpoint_periodically())]
+
+            try:
+                if refresher:
+                    # Mode refresh: penemuan berjalan berdampingan dan berhenti bersama refresh;
+                    # sisa frontier tetap tersimpan di state untuk run berikutnya
+                    done = refresher
+                else:
+                    # Selesai jika frontier habis (atau target tercapai dan sisa frontier dilewati)
+                    done = asyncio.create_task(self.frontier.join())
+                stop = asyncio.create_task(self.stopped.wait())
+                await asyncio.wait([done, stop], timeout=self.max_seconds or None,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in workers + [done, stop]:
+                    task.cancel()
+                await asyncio.gather(*workers, done, stop, return_exceptions=True)
+
+                # Tunggu semua batch detail/thumbnail yang tersisa
+                await self.batcher.close()
+            finally:
+                for task in background:
+                    task.cancel()
+                await asyncio.gather(*background, return_exceptions=True)
+                self.checkpoint()
+
+        return self.valid_count
+
+    def summary(self):
+        """Ringkasan hasil crawl untuk log dan perbandingan antar strategi"""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0
+        return {
+            "strategy": self.strategy,
+            "games": self.valid_count,
+            "ids_discovered": len(self.collected_games),
+            "requests": self.stats.requests,
+            "requests_by_endpoint": dict(self.stats.requests_by_endpoint),
+            "throttled": self.stats.throttled,
+            "failed": self.stats.failed,
+            "games_per_request": round(self.games_per_request(), 4),
+            "frontier_remaining": self.frontier.qsize() if self.frontier else 0,
+            "refreshed": self.refreshed_count,
+            "duration_seconds": round(elapsed, 2),
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Roblox game crawler engine')
+    parser.add_argument('--strategy', choices=sorted(FRONTIER_STRATEGIES), default=STRATEGY,
+                        help='Strategi frontier: bfs, dfs, atau best (best-first menurut playerCount)')
+    parser.add_argument('--seed', action='append', help='Universe ID awal (boleh lebih dari satu)')
+    parser.add_argument('--target', type=int, default=TARGET_GAME_COUNT, help='Jumlah game yang dikumpulkan')
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help='Berhenti menjelajah setelah sekian request (0 = tanpa batas)')
+    parser.add_argument('--max-seconds', type=float, default=0,
+                        help='Berhenti menjelajah setelah sekian detik (0 = tanpa batas)')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help='Maksimum request per detik')
+    parser.add_argument('--details-batch', type=int, default=DETAILS_BATCH_LIMIT, help='Ukuran batch endpoint detail')
+    parser.add_argument('--thumbnails-batch', type=int, default=THUMBNAILS_BATCH_LIMIT, help='Ukuran batch endpoint thumbnail')
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--edges', default=EDGES_FILE,
+                        help='File NDJSON untuk edge rekomendasi (string kosong = tidak disimpan)')
+    parser.add_argument('--state', default=DEFAULT_STATE_FILE, help='File SQLite untuk state crawl')
+    parser.add_argument('--resume', action='store_true', help='Lanjutkan crawl dari checkpoint terakhir')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Refresh detail game yang sudah dikenal berdasarkan prioritas, tanpa graf rekomendasi')
+    parser.add_argument('--known-games', default=KNOWN_GAMES_FILE, help='File data game yang sudah dikenal (mode refresh)')
+    parser.add_argument('--refresh-limit', type=int, default=0, help='Maksimum game yang di-refresh (0 = semua)')
+    parser.add_argument('--discovery-ratio', type=float, default=DISCOVERY_RATIO,
+                        help='Mode refresh: porsi worker untuk penemuan game baru (0 = refresh saja)')
+    parser.add_argument('--stats-json', help='Tulis ringkasan crawl (JSON) ke file ini untuk benchmark')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        seeds = args.seed or [INITIAL_GAME_ID]
+        state = CrawlState(args.state)
+
+        refresh_scheduler = None
+        if args.refresh:
+            refresh_scheduler = RefreshScheduler(load_known_games(args.known_games), state.last_refreshed())
+            seeds = args.seed or refresh_scheduler.most_popular(DISCOVERY_SEEDS) or [INITIAL_GAME_ID]
+            print(f"Mode refresh: {len(refresh_scheduler)} game dikenal, rasio penemuan {args.discovery_ratio}")
+
+        print(f'Memulai Roblox game crawler (strategi {args.strategy})...')
+        print(f"Target: {args.target} game dari {seeds[:5]}, {args.concurrency} worker, {args.rate} req/s")
+        if args.max_requests or args.max_seconds:
+            print(f"Batas: {args.max_requests or '-'} request, {args.max_seconds or '-'} detik")
+
+        start_time = datetime.now()
+        # Saat resume, record lama di file output dipertahankan dan record baru ditambahkan
+        sink = NDJSONSink(args.output, append=args.resume)
+        edge_sink = NDJSONSink(args.edges, append=args.resume) if args.edges else None
+        state.set_meta('strategy', args.strategy)
+        crawler = CrawlerEngine(seeds, target=args.target, strategy=args.strategy, concurrency=args.concurrency,
+                                rate=args.rate, details_batch=args.details_batch,
+                                thumbnails_batch=args.thumbnails_batch, state=state, resume=args.resume,
+                                sink=sink, refresh_scheduler=refresh_scheduler, refresh_limit=args.refresh_limit,
+                                discovery_ratio=args.discovery_ratio, max_requests=args.max_requests,
+                                max_seconds=args.max_seconds, edge_sink=edge_sink)
+        try:
+            valid_count = asyncio.run(crawler.run())
+        finally:
+            sink.close()
+            if edge_sink:
+                edge_sink.close()
+            state.close()
+        duration = (datetime.now() - start_time).total_seconds()
+
+        print(f"\nPengumpulan selesai! {valid_count} game valid terkumpul dari {len(crawler.collected_games)} ID.")
+        print(f"Waktu yang dibutuhkan: {duration:.2f} detik")
+        print(f"Throughput: {valid_count / duration if duration else 0:.2f} game/detik, "
+              f"{crawler.stats.requests} request ({crawler.games_per_request():.2f} game/request), "
+              f"{crawler.stats.throttled} respons 429")
+        print(f"Request per endpoint: {crawler.stats.requests_by_endpoint}")
+        if refresh_scheduler:
+            print(f"Game di-refresh: {crawler.refreshed_count}")
+        print(f'Hasil disimpan ke {args.output} ({sink.count} record baru)')
+        if edge_sink:
+            print(f'Edge rekomendasi disimpan ke {args.edges} ({edge_sink.count} game)')
+        if args.stats_json:
+            with open(args.stats_json, 'w', encoding='utf-8') as f:
+                json.dump(crawler.summary(), f, indent=2)
+        return 0
+    except Exception as e:
+        print(f"Error in crawler: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    exit(exit_code)
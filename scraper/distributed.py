@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import aiohttp
+
+from scraper.batcher import DetailBatcher
+from scraper.crawler import (CONCURRENCY, EDGES_FILE, INITIAL_GAME_ID, OUTPUT_FILE, REQUESTS_PER_SECOND,
+                             STRATEGY, TARGET_GAME_COUNT)
+from scraper.frontier import FRONTIER_STRATEGIES
+from scraper.rate_limiter import TokenBucket
+from scraper.roblox_api import HEADERS, CrawlStats, fetch_recommendations
+from scraper.shared_frontier import DEFAULT_SHARED_STATE_FILE, SharedFrontier
+from scraper.sink import NDJSONSink
+
+# Konfigurasi
+WORKERS = 4
+LEASE_SECONDS = 60.0  # Baris yang disewa worker crash bisa diambil worker lain setelah ini
+FRONTIER_LEASE_SIZE = 16  # ID frontier per lease, diekspansi bersamaan oleh satu worker
+GAMES_LEASE_SIZE = 100  # ID game per lease untuk diambil detailnya
+POLL_INTERVAL = 0.5  # Jeda worker saat tidak ada pekerjaan yang bisa disewa
+EXPORT_INTERVAL = 5.0  # Detik antar ekspor record ke sink oleh koordinator
+
+
+class CrawlWorker:
+    """
+    Satu proses worker crawl terdistribusi.
+
+    Worker menyewa batch ID frontier dan ID game dari SharedFrontier, mengambil
+    rekomendasi serta detail/thumbnail lewat DetailBatcher, lalu menulis
+    hasilnya kembali ke store bersama. Rate limit global dibagi rata oleh
+    koordinator ke setiap worker.
+    """
+
+    def __init__(self, store, worker_id, strategy=STRATEGY, rate=REQUESTS_PER_SECOND,
+                 concurrency=CONCURRENCY, lease_seconds=LEASE_SECONDS):
+        self.store = store
+        self.worker_id = worker_id
+        self.strategy = strategy
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.limiter = TokenBucket(rate)
+        self.stats = CrawlStats()
+        self.batcher = DetailBatcher(self.on_game_complete)
+        self._completed = []
+        self.games_done = 0
+
+    def on_game_complete(self, game_id, details):
+        self._completed.append((game_id, details))
+
+    def flush(self):
+        if self._completed:
+            completed, self._completed = self._completed, []
+            self.store.complete_games(completed)
+            self.games_done += sum(1 for _, details in completed if details is not None)
+
+    async def expand(self, session, game_ids):
+        """Ambil rekomendasi beberapa ID frontier bersamaan"""
+        results = await asyncio.gather(*(
+            fetch_recommendations(session, self.limiter, game_id, self.stats) for game_id in game_ids))
+        return dict(zip(game_ids, results))
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency * 2, keepalive_timeout=60, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=timeout) as session:
+            self.batcher.start(session, self.limiter, self.stats)
+            try:
+                while True:
+                    # Backpressure: sewa detail baru hanya jika antrean batcher hampir kosong,
+                    # agar sewaan tidak kedaluwarsa sebelum sempat diambil
+                    game_ids = []
+                    if self.batcher.details_batcher.queue.qsize() < GAMES_LEASE_SIZE:
+                        game_ids = self.store.lease_games(self.worker_id, GAMES_LEASE_SIZE, self.lease_seconds)
+                    for game_id in game_ids:
+                        self.batcher.submit(game_id)
+
+                    lease_size = min(FRONTIER_LEASE_SIZE, self.concurrency * 2)
+                    frontier_ids = self.store.lease_frontier(self.worker_id, lease_size, self.lease_seconds,
+                                                             self.strategy)
+                    if frontier_ids:
+                        self.store.complete_frontier(await self.expand(session, frontier_ids))
+                    self.flush()
+
+                    if not game_ids and not frontier_ids:
+                        # Tunggu detail yang masih diproses batcher sebelum memutuskan selesai
+                        await self.batcher.details_batcher.queue.join()
+                        await self.batcher.thumbnails_batcher.queue.join()
+                        self.flush()
+                        if self.store.is_finished():
+                            break
+                        await asyncio.sleep(POLL_INTERVAL)
+            finally:
+                await self.batcher.close()
+                self.flush()
+        return self.games_done
+
+
+def run_worker(args):
+    store = SharedFrontier(args.db)
+    try:
+        worker = CrawlWorker(store, args.worker_id, strategy=args.strategy, rate=args.rate,
+                             concurrency=args.concurrency, lease_seconds=args.lease_seconds)
+        games_done = asyncio.run(worker.run())
+        print(f"[{args.worker_id}] selesai: {games_done} game, {worker.stats.requests} request, "
+              f"{worker.stats.throttled} respons 429")
+        return 0
+    except Exception as e:
+        print(f"[{args.worker_id}] Error in worker: {str(e)}")
+        return 1
+    finally:
+        store.close()
+
+
+def spawn_worker(args, index):
+    command = [sys.executable, '-m', 'scraper.distributed', 'worker', '--db', args.db,
+               '--worker-id', f'{os.uname().nodename}-{os.getpid()}-w{index}', '--strategy', args.strategy,
+               '--rate', str(args.rate / args.workers), '--concurrency', str(args.concurrency),
+               '--lease-seconds', str(args.lease_seconds)]
+    return subprocess.Popen(command)
+
+
+def run_coordinator(args):
+    """
+    Siapkan store bersama, jalankan N worker lokal, dan alirkan record selesai ke sink.
+
+    Worker yang crash tidak menghentikan crawl: sewaannya kedaluwarsa dan diambil
+    worker lain. Dengan --restart-workers, worker yang crash juga dijalankan ulang.
+    """
+    store = SharedFrontier(args.db)
+    sink = None
+    edge_sink = None
+    try:
+        seeds = args.seed or [INITIAL_GAME_ID]
+        if args.resume and store.game_count():
+            store.set_target(args.target)
+            print(f"Melanjutkan crawl terdistribusi: {store.counts()}")
+        else:
+            store.reset(seeds, args.target)
+
+        print(f"Memulai crawl terdistribusi: {args.workers} worker, strategi {args.strategy}, "
+              f"target {args.target}, {args.rate} req/s total")
+        start_time = datetime.now()
+        # Saat resume, record yang sudah diekspor tetap di file output
+        sink = NDJSONSink(args.output, append=args.resume)
+        edge_sink = NDJSONSink(args.edges, append=args.resume) if args.edges else None
+        workers = {index: spawn_worker(args, index) for index in range(args.workers)}
+        restarts = 0
+
+        last_report = time.monotonic()
+        while workers:
+            time.sleep(min(EXPORT_INTERVAL, 1.0))
+            for index, process in list(workers.items()):
+                code = process.poll()
+                if code is None:
+                    continue
+                del workers[index]
+                if code != 0:
+                    print(f"Worker {index} berhenti dengan kode {code}; sewaannya akan diambil worker lain")
+                    if args.restart_workers and not store.is_finished():
+                        restarts += 1
+                        workers[index] = spawn_worker(args, index)
+            if time.monotonic() - last_report >= EXPORT_INTERVAL:
+                store.export_new(sink)
+                if edge_sink:
+                    store.export_edges(edge_sink)
+                counts = store.counts()
+                print(f"Games: {counts['games']}, Frontier: {counts['frontier']}, Worker aktif: {len(workers)}")
+                last_report = time.monotonic()
+
+        store.export_new(sink)
+        if edge_sink:
+            store.export_edges(edge_sink)
+        counts = store.counts()
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"\nPengumpulan selesai! {counts['games']['done']} game valid, {counts['games']['failed']} gagal, "
+              f"{counts['frontier']['done']} ID diekspansi, {restarts} worker dijalankan ulang")
+        print(f"Waktu yang dibutuhkan: {duration:.2f} detik")
+        print(f'Hasil disimpan ke {args.output} ({sink.count} record baru)')
+        return 0 if store.is_finished() else 1
+    except Exception as e:
+        print(f"Error in coordinator: {str(e)}")
+        return 1
+    finally:
+        if sink:
+            sink.close()
+        if edge_sink:
+            edge_sink.close()
+        store.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Crawl Roblox terdistribusi dengan frontier bersama')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    def add_common(sub):
+        sub.add_argument('--db', default=DEFAULT_SHARED_STATE_FILE, help='File SQLite bersama')
+        sub.add_argument('--strategy', choices=sorted(FRONTIER_STRATEGIES), default=STRATEGY)
+        sub.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Request rekomendasi bersamaan per worker')
+        sub.add_argument('--lease-seconds', type=float, default=LEASE_SECONDS)
+
+    coordinator = subparsers.add_parser('coordinator', help='Jalankan koordinator dan N worker lokal')
+    add_common(coordinator)
+    coordinator.add_argument('--workers', type=int, default=WORKERS)
+    coordinator.add_argument('--seed', action='append', help='Universe ID awal (boleh lebih dari satu)')
+    coordinator.add_argument('--target', type=int, default=TARGET_GAME_COUNT)
+    coordinator.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help='Total request per detik semua worker')
+    coordinator.add_argument('--output', default=OUTPUT_FILE)
+    coordinator.add_argument('--edges', default=EDGES_FILE,
+                             help='File NDJSON untuk edge rekomendasi (string kosong = tidak disimpan)')
+    coordinator.add_argument('--resume', action='store_true', help='Lanjutkan crawl dari store bersama')
+    coordinator.add_argument('--restart-workers', action='store_true', help='Jalankan ulang worker yang crash')
+
+    worker = subparsers.add_parser('worker', help='Jalankan satu worker (biasanya dipanggil koordinator)')
+    add_common(worker)
+    worker.add_argument('--worker-id', default=f'{os.uname().nodename}-{os.getpid()}')
+    worker.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND / WORKERS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.mode == 'worker':
+        return run_worker(args)
+    return run_coordinator(args)
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    exit(exit_code)
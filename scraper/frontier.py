@@ -0,0 +1,78 @@
+import asyncio
+import heapq
+import itertools
+from collections import deque
+
+
+class Frontier(asyncio.Queue):
+    """
+    Antrean frontier crawler; strategi ditentukan oleh cara item disimpan dan diambil.
+
+    Item dimasukkan lewat `push(game_id, priority)` dan `get()` mengembalikan
+    universe ID saja, sehingga crawler tidak perlu tahu strategi yang dipakai.
+    `priority` hanya dipakai oleh BestFirstFrontier (playerCount dari respons
+    rekomendasi); strategi lain mengabaikannya.
+    """
+
+    name = None
+
+    def push(self, game_id, priority=0):
+        self.put_nowait((game_id, priority))
+
+
+class BFSFrontier(Frontier):
+    """FIFO: menjelajah graf rekomendasi per level, meluas dari seed"""
+
+    name = 'bfs'
+
+    def _init(self, maxsize):
+        self._queue = deque()
+
+    def _put(self, item):
+        self._queue.append(item[0])
+
+    def _get(self):
+        return self._queue.popleft()
+
+
+class DFSFrontier(Frontier):
+    """LIFO: selalu mengikuti rekomendasi terbaru lebih dulu, menjauh cepat dari seed"""
+
+    name = 'dfs'
+
+    def _init(self, maxsize):
+        self._queue = []
+
+    def _put(self, item):
+        self._queue.append(item[0])
+
+    def _get(self):
+        return self._queue.pop()
+
+
+class BestFirstFrontier(Frontier):
+    """Max-heap menurut popularitas: game dengan pemain terbanyak diekspansi lebih dulu"""
+
+    name = 'best'
+
+    def _init(self, maxsize):
+        self._queue = []
+        self._counter = itertools.count()  # Pemecah seri: prioritas sama -> urutan masuk (FIFO)
+
+    def _put(self, item):
+        game_id, priority = item
+        heapq.heappush(self._queue, (-(priority or 0), next(self._counter), game_id))
+
+    def _get(self):
+        return heapq.heappop(self._queue)[2]
+
+
+FRONTIER_STRATEGIES = {cls.name: cls for cls in (BFSFrontier, DFSFrontier, BestFirstFrontier)}
+
+
+def create_frontier(strategy):
+    try:
+        return FRONTIER_STRATEGIES[strategy]()
+    except KeyError:
+        raise ValueError(f"Strategi frontier tidak dikenal: {strategy} "
+                         f"(pilihan: {', '.join(FRONTIER_STRATEGIES)})")
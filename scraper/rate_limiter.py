@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket global untuk semua request ke Roblox API.
+
+    Rate menyesuaikan diri: setiap respons 429 memotong rate menjadi setengah
+    (dan menghormati header Retry-After), lalu rate naik lagi sedikit demi
+    sedikit setiap kali request berhasil sampai kembali ke max_rate.
+    """
+
+    def __init__(self, rate, capacity=None, min_rate=1.0, increase_step=0.5):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.min_rate = float(min_rate)
+        self.increase_step = float(increase_step)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.throttled_count = 0
+        self._lock = None  # Dibuat saat acquire pertama, di dalam event loop yang berjalan
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    async def acquire(self, tokens=1.0):
+        """Tunggu sampai token tersedia lalu ambil"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def on_throttle(self, retry_after=None):
+        """Dipanggil saat server membalas 429: perlambat secara multiplikatif"""
+        self.throttled_count += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        pause = float(retry_after) if retry_after else 1.0 / self.rate
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def on_success(self):
+        """Dipanggil saat request berhasil: naikkan rate secara aditif"""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
@@ -0,0 +1,75 @@
+import heapq
+import math
+import os
+import time
+
+from backend.game_data import iter_games, resolve_data_file
+from scraper.visited import CompactIdSet
+
+KNOWN_GAMES_FILE = './data/roblox_data.json'
+
+
+def refresh_priority(playing, visits, age_seconds):
+    """
+    Prioritas refresh sebuah game: game populer yang lama tidak di-refresh naik ke atas
+
+    `playing` paling cepat basi dan paling berpengaruh ke ranking/trending,
+    sehingga bobotnya lebih besar daripada `visits`.
+    """
+    popularity = 1.0 + math.log1p(max(playing or 0, 0)) + 0.25 * math.log1p(max(visits or 0, 0))
+    return popularity * (1.0 + age_seconds / 3600.0)
+
+
+def load_known_games(path=KNOWN_GAMES_FILE):
+    """
+    Baca (universe ID, playing, visits) untuk semua game yang sudah dikenal
+
+    Jika salinan kolomnar (roblox_data.cols) masih terbaru, ID dan counter
+    dibaca langsung dari kolomnya tanpa men-decode record JSON sama sekali.
+    """
+    path = resolve_data_file(path)
+    if os.path.isdir(path):
+        from backend.game_columns import GameColumns  # numpy hanya dibutuhkan untuk format kolomnar
+        with GameColumns(path) as dataset:
+            columns = zip(dataset.ids.tolist(), dataset.column('playing').tolist(), dataset.column('visits').tolist())
+            for game_id, playing, visits in columns:
+                if game_id >= 0:
+                    yield str(game_id), playing, visits
+        return
+    for game in iter_games(path):
+        game_id = game.get('universeId') or game.get('id')
+        if game_id:
+            yield str(game_id), game.get('playing') or 0, game.get('visits') or 0
+
+
+class RefreshScheduler:
+    """Priority queue universe ID yang akan di-refresh, diurutkan dengan refresh_priority"""
+
+    def __init__(self, known_games, last_refreshed=None, now=None):
+        now = now or time.time()
+        last_refreshed = last_refreshed or {}
+        self.known_ids = CompactIdSet()
+        self.heap = []
+        self.popularity = []
+        for game_id, playing, visits in known_games:
+            if game_id in self.known_ids:
+                continue
+            self.known_ids.add(game_id)
+            # Game yang belum pernah di-refresh dianggap berumur satu minggu
+            age = now - last_refreshed.get(game_id, now - 7 * 24 * 3600)
+            self.heap.append((-refresh_priority(playing, visits, age), game_id))
+            self.popularity.append((playing, game_id))
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def next_batch(self, size):
+        batch = []
+        while self.heap and len(batch) < size:
+            batch.append(heapq.heappop(self.heap)[1])
+        return batch
+
+    def most_popular(self, count):
+        """ID dengan playing tertinggi, dipakai sebagai seed untuk penemuan game baru"""
+        return [game_id for _, game_id in heapq.nlargest(count, self.popularity)]
@@ -0,0 +1,102 @@
+import asyncio
+import os
+
+import aiohttp
+
+# Endpoint Roblox API (bisa diarahkan ke server tiruan, mis. benchmarks/mock_roblox_server.py)
+GAMES_API = os.environ.get("ROBLOX_GAMES_API", "https://games.roblox.com").rstrip("/")
+THUMBNAILS_API = os.environ.get("ROBLOX_THUMBNAILS_API", "https://thumbnails.roblox.com").rstrip("/")
+
+HEADERS = {
+    'Accept': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Jumlah universe ID maksimum per request yang diterima masing-masing endpoint batch
+DETAILS_BATCH_LIMIT = 50
+THUMBNAILS_BATCH_LIMIT = 100
+
+MAX_RETRIES = 3
+
+
+class CrawlStats:
+    """Penghitung request untuk laporan throughput"""
+
+    def __init__(self):
+        self.requests = 0
+        self.throttled = 0
+        self.failed = 0
+        self.requests_by_endpoint = {}
+
+
+async def get_json(session, limiter, url, stats=None, endpoint='other'):
+    """GET dengan rate limiter global, retry untuk 429/5xx, dan None jika tetap gagal"""
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire()
+        if stats:
+            stats.requests += 1
+            stats.requests_by_endpoint[endpoint] = stats.requests_by_endpoint.get(endpoint, 0) + 1
+        try:
+            async with session.get(url) as response:
+                if response.status == 429:
+                    if stats:
+                        stats.throttled += 1
+                    limiter.on_throttle(response.headers.get('Retry-After'))
+                    continue
+                if response.status >= 500:
+                    await asyncio.sleep(0.5 * (2 ** attempt))
+                    continue
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+                limiter.on_success()
+                return data
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            if attempt == MAX_RETRIES:
+                print(f"Error fetching {url}: {str(e)}")
+            else:
+                await asyncio.sleep(0.5 * (2 ** attempt))
+    if stats:
+        stats.failed += 1
+    return None
+
+
+async def fetch_recommendations(session, limiter, game_id, stats=None):
+    """Mengambil rekomendasi untuk satu game sebagai daftar (universe ID, playerCount)"""
+    url = f"{GAMES_API}/v1/games/recommendations/game/{game_id}"
+    data = await get_json(session, limiter, url, stats, 'recommendations')
+    if not data:
+        return []
+    return [(str(game['universeId']), game.get('playerCount') or 0)
+            for game in data.get('games', []) if 'universeId' in game]
+
+
+async def fetch_games_details(session, limiter, game_ids, stats=None):
+    """Mengambil detail batch game, hasil berupa dict universe ID -> data game (None jika request gagal)"""
+    if not game_ids:
+        return {}
+    url = f"{GAMES_API}/v1/games?universeIds={','.join(game_ids)}"
+    data = await get_json(session, limiter, url, stats, 'details')
+    if data is None:
+        return None
+    results = {}
+    for game in data.get('data') or []:
+        if 'id' in game:
+            results[str(game['id'])] = game
+    return results
+
+
+async def fetch_games_thumbnails(session, limiter, game_ids, stats=None):
+    """Mengambil thumbnail batch game, hasil berupa dict universe ID -> imageUrl (None jika request gagal)"""
+    if not game_ids:
+        return {}
+    url = (f"{THUMBNAILS_API}/v1/games/multiget/thumbnails"
+           f"?universeIds={','.join(game_ids)}&format=png&size=768x432")
+    data = await get_json(session, limiter, url, stats, 'thumbnails')
+    if data is None:
+        return None
+    results = {}
+    for item in data.get('data') or []:
+        thumbnails = item.get('thumbnails') or []
+        if thumbnails and thumbnails[0].get('imageUrl'):
+            results[str(item['universeId'])] = thumbnails[0]['imageUrl']
+    return results
@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+DEFAULT_SHARED_STATE_FILE = './data/crawl_shared.sqlite'
+
+# Status baris di tabel frontier dan games
+PENDING, LEASED, DONE, FAILED = 0, 1, 2, 3
+
+# Urutan pengambilan frontier per strategi (lihat scraper/frontier.py untuk versi in-memory)
+LEASE_ORDER = {
+    'bfs': 'seq ASC',
+    'dfs': 'seq DESC',
+    'best': 'priority DESC, seq ASC',
+}
+
+
+class SharedFrontier:
+    """
+    Frontier, visited set, dan record game bersama untuk crawl multi-proses (SQLite mode WAL).
+
+    - frontier: setiap ID hanya masuk sekali (PRIMARY KEY), sehingga tabel ini
+      sekaligus menjadi visited set bersama; baris DONE sudah diekspansi
+    - games: ID yang dikumpulkan; detailnya diambil oleh worker yang menyewa baris itu
+    - edges: daftar rekomendasi per ID yang sudah diekspansi, diekspor koordinator
+
+    Worker menyewa (lease) batch baris PENDING atau baris LEASED yang masa
+    sewanya habis, sehingga pekerjaan worker yang crash otomatis diambil
+    worker lain setelah `lease_seconds`. Semua penulisan idempoten: worker
+    yang terlambat menyelesaikan baris yang sudah diambil alih tidak merusak data.
+    """
+
+    def __init__(self, path=DEFAULT_SHARED_STATE_FILE, timeout=30.0):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # isolation_level=None: transaksi diatur manual dengan BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, game_id TEXT NOT NULL UNIQUE,
+                priority REAL NOT NULL DEFAULT 0, status INTEGER NOT NULL DEFAULT 0,
+                owner TEXT, lease_expires REAL);
+            CREATE INDEX IF NOT EXISTS frontier_status ON frontier (status, seq);
+            CREATE TABLE IF NOT EXISTS games (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, game_id TEXT NOT NULL UNIQUE,
+                status INTEGER NOT NULL DEFAULT 0, owner TEXT, lease_expires REAL,
+                data TEXT, exported INTEGER NOT NULL DEFAULT 0);
+            CREATE INDEX IF NOT EXISTS games_status ON games (status, seq);
+            CREATE INDEX IF NOT EXISTS games_export ON games (exported, status);
+            CREATE TABLE IF NOT EXISTS edges (
+                source TEXT PRIMARY KEY, targets TEXT NOT NULL, exported INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        """Transaksi tulis; BEGIN IMMEDIATE langsung mengambil lock writer agar tidak deadlock"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def reset(self, seeds, target):
+        """Mulai crawl baru dari seed"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM frontier")
+            conn.execute("DELETE FROM games")
+            conn.execute("DELETE FROM edges")
+            conn.execute("DELETE FROM meta")
+            conn.executemany("INSERT OR IGNORE INTO frontier (game_id) VALUES (?)", ((i,) for i in seeds))
+            conn.executemany("INSERT OR IGNORE INTO games (game_id) VALUES (?)", ((i,) for i in seeds[:target]))
+            conn.execute("INSERT INTO meta (key, value) VALUES ('target', ?)", (json.dumps(target),))
+
+    def set_target(self, target):
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('target', ?)", (json.dumps(target),))
+
+    def target(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'target'").fetchone()
+        return json.loads(row[0]) if row else 0
+
+    def _lease(self, table, owner, size, lease_seconds, order):
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT game_id FROM {table} "
+                f"WHERE status = ? OR (status = ? AND lease_expires < ?) ORDER BY {order} LIMIT ?",
+                (PENDING, LEASED, now, size)).fetchall()
+            ids = [row[0] for row in rows]
+            conn.executemany(
+                f"UPDATE {table} SET status = ?, owner = ?, lease_expires = ? WHERE game_id = ?",
+                ((LEASED, owner, now + lease_seconds, game_id) for game_id in ids))
+        return ids
+
+    def lease_frontier(self, owner, size, lease_seconds, strategy='bfs'):
+        """Sewa batch ID frontier untuk diambil rekomendasinya"""
+        if self.game_count() >= self.target():
+            return []
+        return self._lease('frontier', owner, size, lease_seconds, LEASE_ORDER[strategy])
+
+    def lease_games(self, owner, size, lease_seconds):
+        """Sewa batch ID game yang detailnya belum diambil"""
+        return self._lease('games', owner, size, lease_seconds, 'seq ASC')
+
+    def complete_frontier(self, expanded):
+        """
+        Simpan hasil ekspansi beberapa ID frontier dalam satu transaksi
+
+        Parameters:
+        - expanded: dict ID frontier -> daftar (ID rekomendasi, playerCount)
+
+        ID baru masuk ke games selama jumlahnya belum mencapai target, jadi
+        target tetap tepat walau banyak worker menulis bersamaan.
+        """
+        with self._transaction() as conn:
+            target = self.target()
+            count = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+            for game_id, recommendations in expanded.items():
+                conn.executemany("INSERT OR IGNORE INTO frontier (game_id, priority) VALUES (?, ?)", recommendations)
+                if recommendations:
+                    conn.execute("INSERT OR REPLACE INTO edges (source, targets) VALUES (?, ?)",
+                                 (game_id, json.dumps([child_id for child_id, _ in recommendations])))
+                for child_id, _ in recommendations:
+                    if count >= target:
+                        break
+                    count += conn.execute("INSERT OR IGNORE INTO games (game_id) VALUES (?)", (child_id,)).rowcount
+                conn.execute("UPDATE frontier SET status = ?, owner = NULL, lease_expires = NULL WHERE game_id = ?",
+                             (DONE, game_id))
+
+    def complete_games(self, results):
+        """Simpan pasangan (ID, data game); data None berarti detail gagal diambil"""
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE games SET status = ?, data = ?, owner = NULL, lease_expires = NULL WHERE game_id = ?",
+                ((DONE if data is not None else FAILED,
+                  json.dumps(data, ensure_ascii=False) if data is not None else None, game_id)
+                 for game_id, data in results))
+
+    def game_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def counts(self):
+        """Jumlah baris per status untuk frontier dan games"""
+        result = {}
+        for table in ('frontier', 'games'):
+            rows = dict(self.conn.execute(f"SELECT status, COUNT(*) FROM {table} GROUP BY status"))
+            result[table] = {name: rows.get(status, 0) for name, status in
+                             (('pending', PENDING), ('leased', LEASED), ('done', DONE), ('failed', FAILED))}
+        return result
+
+    def is_finished(self):
+        """Crawl selesai jika semua detail sudah diambil dan frontier habis atau target tercapai"""
+        counts = self.counts()
+        games_open = counts['games']['pending'] + counts['games']['leased']
+        frontier_open = counts['frontier']['pending'] + counts['frontier']['leased']
+        return games_open == 0 and (frontier_open == 0 or self.game_count() >= self.target())
+
+    def export_new(self, sink, batch_size=1000):
+        """Tulis record yang belum diekspor ke sink (hanya dipanggil koordinator), return jumlahnya"""
+        exported = 0
+        while True:
+            rows = self.conn.execute(
+                "SELECT game_id, data FROM games WHERE exported = 0 AND status = ? LIMIT ?",
+                (DONE, batch_size)).fetchall()
+            if not rows:
+                return exported
+            for _, data in rows:
+                sink.write(json.loads(data))
+            with self._transaction() as conn:
+                conn.executemany("UPDATE games SET exported = 1 WHERE game_id = ?", ((row[0],) for row in rows))
+            exported += len(rows)
+
+    def export_edges(self, sink, batch_size=1000):
+        """Tulis edge rekomendasi yang belum diekspor ke sink, return jumlah game"""
+        exported = 0
+        while True:
+            rows = self.conn.execute("SELECT source, targets FROM edges WHERE exported = 0 LIMIT ?",
+                                     (batch_size,)).fetchall()
+            if not rows:
+                return exported
+            for source, targets in rows:
+                sink.write({"source": source, "targets": json.loads(targets)})
+            with self._transaction() as conn:
+                conn.executemany("UPDATE edges SET exported = 1 WHERE source = ?", ((row[0],) for row in rows))
+            exported += len(rows)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,104 @@
+import io
+import json
+import os
+import time
+
+try:
+    import zstandard
+except ImportError:  # Kompresi zstd opsional
+    zstandard = None
+
+
+class NDJSONSink:
+    """
+    Output append-only: satu record game per baris JSON, ditulis begitu detailnya lengkap.
+
+    File berakhiran .zst dikompresi dengan zstd (butuh paket `zstandard`).
+    Data di-flush setiap record dan di-fsync per `fsync_every` record atau
+    setiap `fsync_interval` detik, sehingga crash hanya kehilangan sedikit data.
+    """
+
+    def __init__(self, path, append=False, fsync_every=500, fsync_interval=5.0):
+        self.path = path
+        self.compressed = path.endswith('.zst')
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._raw = open(path, 'ab' if append else 'wb')
+        if append and not self.compressed and self._raw.tell() > 0:
+            # Crash di tengah penulisan bisa menyisakan baris terpotong; record baru mulai di baris baru
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._raw.write(b'\n')
+        if self.compressed:
+            if zstandard is None:
+                raise RuntimeError("Output .zst membutuhkan paket 'zstandard' (pip install zstandard)")
+            # Setiap sesi menulis frame zstd sendiri; frame yang disambung tetap valid
+            self._writer = zstandard.ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self._writer = self._raw
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        self._writer.write(line.encode('utf-8'))
+        self.count += 1
+        self._unsynced += 1
+        if self.compressed:
+            self._writer.flush(zstandard.FLUSH_BLOCK)
+        self._raw.flush()
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        os.fsync(self._raw.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self.compressed:
+            self._writer.flush(zstandard.FLUSH_FRAME)
+            self._writer.close()
+        self._raw.flush()
+        self.sync()
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(path):
+    """
+    Baca kembali record dari output NDJSONSink (.zst juga); baris terpotong
+    dan frame zstd yang tidak lengkap akibat crash dilewati
+    """
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Membaca output .zst membutuhkan paket 'zstandard' (pip install zstandard)")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        f = io.TextIOWrapper(reader, encoding='utf-8', errors='replace')
+        errors = (zstandard.ZstdError,)
+    else:
+        f = open(path, 'r', encoding='utf-8', errors='replace')
+        errors = ()
+    with f:
+        try:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+        except errors:
+            return
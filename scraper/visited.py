@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+
+
+def _mix64(key):
+    """splitmix64: sebar bit universe ID agar posisi Bloom filter merata"""
+    key = (key + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    key = ((key ^ (key >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    key = ((key ^ (key >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return key ^ (key >> 31)
+
+
+class BloomFilter:
+    """
+    Bloom filter sederhana di atas bytearray (indexing per bit lebih cepat daripada array numpy).
+
+    Jawaban "tidak ada" selalu benar; jawaban "ada" bisa salah dengan peluang
+    sekitar `error_rate` selama isi filter tidak melebihi `capacity`.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        h = _mix64(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1  # Double hashing: posisi ke-i = h1 + i * h2
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class CompactIdSet:
+    """
+    Set universe ID numerik yang hemat memori: array int64 terurut ditambah buffer kecil.
+
+    ID baru masuk ke buffer (set Python) dan digabung ke array terurut saat
+    buffer melebihi 1/16 ukuran array (minimal `buffer_limit`), sehingga biaya
+    merge teramortisasi dan memori per ID mendekati 8 byte. Lookup memakai
+    binary search (np.searchsorted). ID boleh berupa str atau int; iterasi
+    menghasilkan int. Dengan `bloom_capacity`, Bloom filter dipakai sebagai
+    prefilter sebelum lookup.
+    """
+
+    def __init__(self, ids=(), buffer_limit=65536, bloom_capacity=0, bloom_error_rate=0.01):
+        self.buffer_limit = buffer_limit
+        self._sorted = np.empty(0, dtype=np.int64)
+        self._buffer = set()
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        self.update(ids)
+
+    def __len__(self):
+        return len(self._sorted) + len(self._buffer)
+
+    def __contains__(self, game_id):
+        key = int(game_id)
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        if key in self._buffer:
+            return True
+        index = np.searchsorted(self._sorted, key)
+        return index < len(self._sorted) and self._sorted[index] == key
+
+    def __iter__(self):
+        self._merge()
+        return (int(key) for key in self._sorted)
+
+    def add(self, game_id):
+        key = int(game_id)
+        if key in self:
+            return
+        self._buffer.add(key)
+        if self.bloom is not None:
+            self.bloom.add(key)
+        if len(self._buffer) >= max(self.buffer_limit, len(self._sorted) >> 4):
+            self._merge()
+
+    def update(self, ids):
+        """Tambah banyak ID sekaligus (misalnya saat memuat state) tanpa lewat buffer"""
+        keys = np.fromiter((int(game_id) for game_id in ids), dtype=np.int64)
+        if not len(keys):
+            return
+        if self.bloom is not None:
+            for key in keys.tolist():
+                self.bloom.add(key)
+        self._merge(keys)
+
+    def _merge(self, extra=None):
+        parts = [self._sorted]
+        if self._buffer:
+            parts.append(np.sort(np.fromiter(self._buffer, dtype=np.int64, count=len(self._buffer))))
+            self._buffer.clear()
+        if extra is not None:
+            parts.append(np.sort(extra))
+        if len(parts) > 1:
+            merged = np.concatenate(parts)
+            # Bagian-bagian yang sudah terurut membuat timsort (kind='stable') hampir linear
+            merged.sort(kind='stable')
+            if len(merged) > 1:
+                merged = merged[np.concatenate(([True], merged[1:] != merged[:-1]))]
+            self._sorted = merged
+
+    @property
+    def nbytes(self):
+        """Perkiraan memori: array terurut, buffer (~70 byte per entri set int), dan Bloom filter"""
+        bloom = self.bloom.nbytes if self.bloom is not None else 0
+        return self._sorted.nbytes + len(self._buffer) * 70 + bloom